@@ -0,0 +1,84 @@
+"""
+比較 Chrome 舊設定與效能設定的啟動時間與記憶體用量
+
+    python -m benchmarks.chrome_profile --drivers 4 --url https://www.setn.com/ViewAll.aspx
+
+每個設定依序啟動多個瀏覽器，記錄啟動與開啟頁面的時間，
+全部開啟後統計每個瀏覽器的行程樹(chromedriver + chrome)記憶體
+記憶體以 Linux 的 PSS 計算，共用的頁面平均分攤，避免 RSS 重複計算
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from selenium import webdriver
+
+from config.crawler.config import ChromeProfileConfig
+from scrapers.chrome_profile import build_chrome_options
+from utils.process_memory import tree_memory_mb
+
+PROFILES: Dict[str, ChromeProfileConfig] = {
+    'legacy': ChromeProfileConfig(optimized=False),
+    'optimized': ChromeProfileConfig(),
+}
+
+
+def driver_memory_mb(driver: webdriver.Chrome) -> float:
+    return tree_memory_mb(driver.service.process.pid)
+
+
+def run_profile(profile: ChromeProfileConfig, drivers: int,
+                url: Optional[str]) -> Dict[str, float]:
+    startup: List[float] = []
+    page_load: List[float] = []
+    opened: List[webdriver.Chrome] = []
+    try:
+        for _ in range(drivers):
+            start = time.perf_counter()
+            driver = webdriver.Chrome(options=build_chrome_options(profile))
+            startup.append(time.perf_counter() - start)
+            opened.append(driver)
+            if url:
+                start = time.perf_counter()
+                driver.get(url)
+                page_load.append(time.perf_counter() - start)
+
+        memory = [driver_memory_mb(driver) for driver in opened]
+    finally:
+        for driver in opened:
+            driver.quit()
+
+    result = {
+        'startup_mean_s': statistics.mean(startup),
+        'startup_max_s': max(startup),
+        'memory_mean_mb': statistics.mean(memory),
+        'memory_total_mb': sum(memory),
+    }
+    if page_load:
+        result['page_load_mean_s'] = statistics.mean(page_load)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--drivers', type=int, default=3,
+                        help='每個設定同時開啟的瀏覽器數')
+    parser.add_argument('--url', default=None, help='啟動後開啟的頁面')
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES),
+                        choices=list(PROFILES))
+    args = parser.parse_args()
+
+    results = {name: run_profile(PROFILES[name], args.drivers, args.url)
+               for name in args.profiles}
+
+    metrics = sorted({key for result in results.values() for key in result})
+    print(f"{'metric':<18}" + ''.join(f"{name:>12}" for name in results))
+    for metric in metrics:
+        print(f"{metric:<18}" + ''.join(
+            f"{result.get(metric, float('nan')):>12.2f}"
+            for result in results.values()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+第二層爬蟲的離線網頁語料
+
+    python -m benchmarks.corpus record https://www.setn.com/News.aspx?NewsID=1581720 ...
+    python -m benchmarks.corpus synthetic --count 200
+    python -m benchmarks.corpus list
+
+網頁以 SegmentedFilePageStore 壓縮保存，manifest.jsonl 記錄每筆的URL與儲存鍵
+讀取時以 mmap 逐筆解壓，不需要一次載入整個語料
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from benchmarks.synthetic import SETN_ARTICLE_URL, article_html
+from config.storage.config import PageStoreConfig
+from scrapers.registry import get_fetcher_class
+from utils.page_store import SegmentedFilePageStore
+
+DEFAULT_ROOT = 'benchmarks/fixtures/corpus'
+
+
+@dataclass
+class FixturePage:
+    url: str
+    html: str
+    recorded_at: float
+
+
+class FixtureCorpus:
+    """
+    離線網頁語料
+    Args:
+        root: 語料目錄，pages/ 為分段檔儲存，manifest.jsonl 為清單
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.root / 'manifest.jsonl'
+        # 語料不淘汰，以內容雜湊去重
+        self.store = SegmentedFilePageStore(PageStoreConfig(
+            root_dir=str(self.root / 'pages'), dedup=True, ttl_seconds=None,
+            max_total_bytes=None, mmap_reads=True))
+        self._entries: Dict[str, dict] = {}
+        if self.manifest_path.exists():
+            with open(self.manifest_path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry['url']] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def urls(self) -> List[str]:
+        return list(self._entries)
+
+    def add(self, url: str, html: str):
+        """加入一筆網頁，相同URL以新內容取代"""
+        ref = self.store.put_sync(url, html)
+        entry = {'url': url, 'ref': ref, 'recorded_at': time.time()}
+        self._entries[url] = entry
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def get(self, url: str) -> Optional[FixturePage]:
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        html = self.store.get_sync(entry['ref'])
+        if html is None:
+            return None
+        return FixturePage(url, html, entry['recorded_at'])
+
+    def __iter__(self) -> Iterator[FixturePage]:
+        for url in self._entries:
+            page = self.get(url)
+            if page is not None:
+                yield page
+
+    def digest(self) -> str:
+        """語料內容的摘要，用來確認基準值與目前語料相同"""
+        digest = hashlib.sha256()
+        for url, entry in sorted(self._entries.items()):
+            digest.update(url.encode('utf-8'))
+            digest.update(entry['ref'].encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    async def record(self, urls: Iterable[str]) -> int:
+        """從網站下載並保存網頁，返回成功筆數"""
+        recorded = 0
+        for url in urls:
+            fetcher_class = get_fetcher_class(url)
+            if fetcher_class is None:
+                print(f"略過沒有第二層爬蟲的URL: {url}")
+                continue
+            async with fetcher_class() as fetcher:
+                try:
+                    html = await fetcher.fetch_html(url)
+                except Exception as e:
+                    print(f"下載 {url} 失敗: {e}")
+                    continue
+            self.add(url, html)
+            recorded += 1
+        return recorded
+
+    def add_synthetic(self, count: int, seed: int = 0,
+                      start_id: int = 1_600_000) -> int:
+        """加入合成的三立新聞頁，沒有網路時也能建立固定的語料"""
+        for news_id in range(start_id, start_id + count):
+            self.add(SETN_ARTICLE_URL.format(news_id=news_id),
+                     article_html(news_id, seed=seed))
+        return count
+
+    def close(self):
+        self.store.close_sync()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='第二層爬蟲的離線網頁語料')
+    parser.add_argument('--root', default=DEFAULT_ROOT)
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help='下載並保存網頁')
+    record.add_argument('urls', nargs='+')
+    synthetic = commands.add_parser('synthetic', help='加入合成網頁')
+    synthetic.add_argument('--count', type=int, default=200)
+    synthetic.add_argument('--seed', type=int, default=0)
+    commands.add_parser('list', help='列出語料內容')
+    args = parser.parse_args()
+
+    corpus = FixtureCorpus(args.root)
+    try:
+        if args.command == 'record':
+            count = asyncio.run(corpus.record(args.urls))
+            print(f"已保存 {count} 筆網頁")
+        elif args.command == 'synthetic':
+            count = corpus.add_synthetic(args.count, args.seed)
+            print(f"已加入 {count} 筆合成網頁")
+        else:
+            for url in corpus.urls:
+                print(url)
+        print(f"語料共 {len(corpus)} 筆, 摘要 {corpus.digest()}")
+    finally:
+        corpus.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""
+以替身新聞網站執行端對端壓力測試
+
+    python -m benchmarks.load_test --pages 20 --items 50 --concurrency 20
+    python -m benchmarks.load_test --browser --shared-browser --latency-ms 80
+
+1. URL收集: --browser 時以 ScraperManager 執行三種列表頁(無限滾動、看更多、分頁)的
+   第一層爬蟲，否則以 HTTP 直接讀取列表 API，只測量後段
+2. 寫入 RedisClient.add_new_urls
+3. 從待處理佇列取出URL，以 NewsHTTPFetcher 下載解析並標記完成
+最後報告 URLs/sec、articles/sec、失敗數與替身網站收到的請求數
+--trace 時記錄每則新聞的追蹤 span 並輸出各階段延遲分位數
+需要可連線的 Redis，測試資料寫入 --redis-host / --redis-port / --redis-db 指定的
+資料庫(預設為壓力測試專用的 DB_LOAD_TEST)，該資料庫已有URL時拒絕執行，結束時刪除測試資料
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+
+from benchmarks.news_server import NewsServerConfig, StandInNewsSite
+from config.crawler.config import HttpxFetcherConfig
+from config.redis import constants as RedisConfig
+from managers.scraper_manager import ScraperManager
+from scrapers.base import NewsSeleniumFetcher
+from scrapers.second_layer.setn_second_crawler import SetnHTTPFetcher
+from strategies.page_load import (
+    PaginationLoadStrategy, ScrollLoadStrategy, ScrollPaginationLoadStrategy,
+    ScrollType)
+from utils.redis_client import RedisClient
+from utils.tracing import NULL_TRACE, summarize, tracer
+
+
+class _StandInScraper(NewsSeleniumFetcher):
+    """替身網站的第一層爬蟲"""
+    path = ''
+    locator: Tuple[str, str] = ('', '')
+
+    def __init__(self, site: StandInNewsSite, page_load_strategy):
+        self.site = site
+        super().__init__(page_load_strategy=page_load_strategy)
+
+    def get_name(self) -> str:
+        return f"替身{self.path}"
+
+    def get_base_url(self) -> str:
+        return f"{self.site.base_url}{self.path}"
+
+    def get_default_load_count(self) -> int:
+        return -1
+
+    def get_url_elements_locator(self) -> tuple:
+        return self.locator
+
+    def extract_url(self, element) -> Optional[str]:
+        return element.get_attribute('href')
+
+
+class StandInScrollScraper(_StandInScraper):
+    path = '/scroll'
+    locator = (By.CSS_SELECTOR, '.newsItems h3.view-li-title a.gt')
+
+    def __init__(self, site: StandInNewsSite):
+        super().__init__(site, ScrollLoadStrategy(
+            scroll_type=ScrollType.DIRECT, scroll_pause_time=0.5))
+
+
+class StandInShowMoreScraper(_StandInScraper):
+    path = '/showmore'
+    locator = (By.CSS_SELECTOR, '#jsMainList a')
+
+    def __init__(self, site: StandInNewsSite):
+        super().__init__(site, ScrollPaginationLoadStrategy(
+            next_button_locator=(
+                By.CSS_SELECTOR, '#SiteContent_uiViewMoreBtn')))
+
+
+class StandInPagedScraper(_StandInScraper):
+    path = '/paged'
+    locator = (By.CSS_SELECTOR, '.list a.title')
+
+    def __init__(self, site: StandInNewsSite):
+        super().__init__(site, PaginationLoadStrategy(
+            next_button_locator=(By.CSS_SELECTOR, 'a.next')))
+
+    def get_url(self, page: Optional[int] = None) -> str:
+        return f"{self.get_base_url()}?page={page or 1}"
+
+
+class StandInHTTPFetcher(SetnHTTPFetcher):
+    """替身網站的新聞頁與三立新聞網格式相同，不做隨機延遲"""
+
+    def __init__(self, use_proxy: bool = False):
+        super().__init__()
+        self.config = HttpxFetcherConfig(
+            retry_times=2, retry_delay=0.1, timeout=10.0,
+            use_proxy=use_proxy, random_delay_range=(0, 0))
+
+    async def random_delay(self):
+        pass
+
+
+async def discover_with_browser(site: StandInNewsSite,
+                                shared_browser: bool) -> List[str]:
+    manager = ScraperManager()
+    for scraper_class in (StandInScrollScraper, StandInShowMoreScraper,
+                          StandInPagedScraper):
+        manager.register_scraper(scraper_class(site))
+    return await manager.scrape_all(shared_browser=shared_browser)
+
+
+async def discover_with_http(site: StandInNewsSite) -> List[str]:
+    """不啟動瀏覽器，直接讀取三種列表的每一次加載"""
+    urls: List[str] = []
+    async with httpx.AsyncClient(base_url=site.base_url) as client:
+        for style in ('scroll', 'showmore', 'paged'):
+            for page in range(site.config.list_pages):
+                response = await client.get(
+                    '/api/list', params={'style': style, 'page': page})
+                if response.status_code != 200:
+                    continue
+                soup = BeautifulSoup(response.text, 'html.parser')
+                urls.extend(a['href'] for a in soup.find_all('a', href=True))
+    return urls
+
+
+async def fetch_pending(redis_client: RedisClient, concurrency: int,
+                        use_proxy: bool) -> Dict[str, int]:
+    """以多個 worker 消化待處理佇列"""
+    counts = {'fetched': 0, 'failed': 0}
+
+    async def _worker():
+        async with StandInHTTPFetcher(use_proxy=use_proxy) as fetcher:
+            while urls := await redis_client.get_pending_urls(10):
+                pages: Dict[str, Optional[str]] = {}
+                traces = {}
+                if tracer.enabled:
+                    contexts = await redis_client.get_trace_contexts(urls)
+                    traces = {url: tracer.resume(url, context)
+                              for url, context in contexts.items()}
+                for url in urls:
+                    trace = traces.get(url, NULL_TRACE)
+                    try:
+                        with trace.span('download'):
+                            html = await fetcher.fetch_html(url)
+                        with trace.span('parse'):
+                            fetcher.parse(url, html)
+                        pages[url] = html
+                        counts['fetched'] += 1
+                    except Exception as e:
+                        await redis_client.mark_url_failed(url, str(e))
+                        # 壓力測試不重試，失敗即結束追蹤
+                        trace.end(f"{type(e).__name__}: {e}")
+                        counts['failed'] += 1
+                if pages:
+                    completed = [traces[url] for url in pages if url in traces]
+                    with tracer.batch_span(completed, 'sink'):
+                        await redis_client.mark_urls_completed(pages)
+                    for trace in completed:
+                        trace.end()
+                tracer.export(traces.values())
+
+    await asyncio.gather(*[_worker() for _ in range(concurrency)])
+    return counts
+
+
+# 判斷測試資料庫是否已有URL的鍵
+FRONTIER_KEYS = ('all', 'pending', 'retry')
+
+
+async def ensure_empty_frontier(redis_client: RedisClient):
+    """測試資料庫已有URL時拒絕執行，避免取出或改寫其他資料"""
+    for shard in redis_client.router.shards:
+        client = redis_client.client_for(shard)
+        for name in FRONTIER_KEYS:
+            key = redis_client.shard_key(shard, name)
+            if await client.exists(key):
+                raise SystemExit(
+                    f"DB {redis_client.db} 的 {key} 不是空的，"
+                    f"請以 --redis-db 指定空的測試資料庫")
+
+
+async def delete_test_keys(redis_client: RedisClient) -> int:
+    """刪除測試資料庫中的所有鍵"""
+    deleted = 0
+    for shard in redis_client.router.shards:
+        client = redis_client.client_for(shard)
+        keys = [key async for key in client.scan_iter(count=1000)]
+        for i in range(0, len(keys), 1000):
+            deleted += await client.delete(*keys[i:i + 1000])
+    return deleted
+
+
+async def run(args) -> Dict[str, float]:
+    config = NewsServerConfig(
+        port=args.port, proxy_port=args.proxy_port,
+        latency_ms=args.latency_ms, latency_jitter_ms=args.latency_ms / 3,
+        error_rate=args.error_rate, items_per_page=args.items,
+        list_pages=args.pages)
+    async with StandInNewsSite(config) as site:
+        discovered_at = time.time()
+        start = time.perf_counter()
+        if args.browser:
+            urls = await discover_with_browser(site, args.shared_browser)
+        else:
+            urls = await discover_with_http(site)
+        discover_seconds = time.perf_counter() - start
+
+        redis_client = RedisClient(host=args.redis_host,
+                                   port=args.redis_port, db=args.redis_db)
+        await ensure_empty_frontier(redis_client)
+        try:
+            async with redis_client:
+                start = time.perf_counter()
+                new_urls = await redis_client.add_new_urls(
+                    urls, discovered_at=discovered_at)
+                ingest_seconds = time.perf_counter() - start
+
+                start = time.perf_counter()
+                counts = await fetch_pending(
+                    redis_client, args.concurrency, args.use_proxy)
+                fetch_seconds = time.perf_counter() - start
+        finally:
+            # close() 會寫出統計，清理放在關閉之後
+            await delete_test_keys(redis_client)
+            await redis_client.close()
+
+        return {
+            'urls': len(urls),
+            'new_urls': len(new_urls),
+            'urls_per_sec': len(urls) / discover_seconds,
+            'ingest_urls_per_sec': len(urls) / ingest_seconds
+            if ingest_seconds else 0.0,
+            'articles': counts['fetched'],
+            'failed': counts['failed'],
+            'articles_per_sec': counts['fetched'] / fetch_seconds
+            if fetch_seconds else 0.0,
+            'server_requests': sum(site.requests.values()),
+            'server_errors': sum(site.errors.values()),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='替身新聞網站端對端壓力測試')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--proxy-port', type=int, default=5010)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--items', type=int, default=20, help='每次加載的新聞數')
+    parser.add_argument('--pages', type=int, default=10, help='每種列表可加載的次數')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--browser', action='store_true',
+                        help='以 Chrome 執行第一層爬蟲')
+    parser.add_argument('--shared-browser', action='store_true',
+                        help='三個列表頁共用一個 Chrome 的分頁')
+    parser.add_argument('--use-proxy', action='store_true',
+                        help='下載前向替身代理池 API 取得代理 (ProxyOperations 固定連到 5010 埠)')
+    parser.add_argument('--redis-host', default='localhost')
+    parser.add_argument('--redis-port', type=int, default=6379)
+    parser.add_argument('--redis-db', type=int,
+                        default=RedisConfig.DB_LOAD_TEST,
+                        help='測試資料使用的資料庫，不可與正式資料共用')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='記錄追蹤 span 到指定的 OTLP/JSON 檔案')
+    args = parser.parse_args()
+
+    if args.trace:
+        tracer.enabled = True
+        tracer.config.export_path = args.trace
+
+    report = asyncio.run(run(args))
+    for key, value in report.items():
+        print(f"{key:<22}{value:>12.1f}" if isinstance(value, float)
+              else f"{key:<22}{value:>12}")
+
+    if args.trace:
+        for row in summarize([args.trace]):
+            if row['site'] == '*' and row['count']:
+                print(f"{row['stage']:<22}p50 {row['p50']:>8.3f}s  "
+                      f"p99 {row['p99']:>8.3f}s  errors {row['errors']}")
+
+
+if __name__ == '__main__':
+    main()
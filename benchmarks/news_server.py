@@ -0,0 +1,329 @@
+"""
+本地的新聞網站替身，用於端對端壓力測試，不需要連到實際的新聞網站
+
+    python -m benchmarks.news_server --port 8765 --latency-ms 50 --error-rate 0.01
+
+列表頁:
+    /scroll         無限滾動，滾到底部時以 /api/list 載入下一批 (三立新聞網格式)
+    /showmore       點擊「看更多」按鈕載入下一批 (中央社格式)
+    /paged?page=N   伺服器端分頁
+新聞頁:
+    /News.aspx?NewsID=N   三立新聞網格式的新聞頁 (見 benchmarks.synthetic)
+代理池 API (另一個埠，預設 5010，與 proxy_pool 相同的路徑):
+    /get/  /pop/  /all/  /count/  /delete/?proxy=
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+from collections import Counter
+from functools import lru_cache
+from html import escape
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from pydantic import BaseModel
+
+from benchmarks.synthetic import article_html
+
+logger = logging.getLogger(__name__)
+
+Response = Tuple[int, str, bytes]
+Handler = Callable[[str, Dict[str, List[str]]], Awaitable[Response]]
+
+REASONS = {200: 'OK', 404: 'Not Found', 503: 'Service Unavailable'}
+
+
+class NewsServerConfig(BaseModel):
+    """替身網站配置"""
+    host: str = '127.0.0.1'
+    port: int = 8765
+    proxy_port: Optional[int] = 5010    # None 時不啟動代理池 API
+    latency_ms: float = 50.0            # 每個請求的平均延遲
+    latency_jitter_ms: float = 20.0     # 延遲的標準差
+    error_rate: float = 0.0             # 列表 API 與新聞頁返回 503 的比例
+    items_per_page: int = 20            # 每次加載的新聞數
+    list_pages: int = 10                # 可加載的次數(滾動批次 / 看更多 / 分頁)
+    article_start_id: int = 1_700_000   # 新聞編號起點
+    seed: int = 0
+
+
+class HTTPServer:
+    """以 asyncio streams 實作的最小 HTTP/1.1 伺服器，只處理 GET 並支援 keep-alive"""
+
+    def __init__(self, host: str, port: int, handler: Handler):
+        self.host = host
+        self.port = port
+        self.handler = handler
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._serve, self.host, self.port)
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = True
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    if name.strip().lower() == 'connection' and \
+                            value.strip().lower() == 'close':
+                        keep_alive = False
+
+                try:
+                    _, target, _ = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    break
+                parts = urlsplit(target)
+                status, content_type, body = await self.handler(
+                    parts.path, parse_qs(parts.query))
+
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    f"\r\n".encode('latin-1') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _html(body: str) -> Response:
+    return 200, 'text/html; charset=utf-8', body.encode('utf-8')
+
+
+def _json(data) -> Response:
+    return 200, 'application/json', json.dumps(data).encode('utf-8')
+
+
+class StandInNewsSite:
+    """
+    替身新聞網站
+    新聞編號由新到舊排列，第 page 次加載(從0開始)的第 i 則為
+    article_start_id + 總數 - 1 - (page * items_per_page + i)
+    """
+
+    def __init__(self, config: Optional[NewsServerConfig] = None):
+        self.config = config or NewsServerConfig()
+        self.rng = random.Random(self.config.seed)
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._servers: List[HTTPServer] = []
+        self._article = lru_cache(maxsize=4096)(article_html)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.config.host}:{self.config.port}"
+
+    @property
+    def total_articles(self) -> int:
+        return self.config.items_per_page * self.config.list_pages
+
+    def article_url(self, news_id: int) -> str:
+        return f"{self.base_url}/News.aspx?NewsID={news_id}"
+
+    def article_ids(self, page: int) -> List[int]:
+        """第 page 次加載的新聞編號，超出範圍時返回空列表"""
+        if not 0 <= page < self.config.list_pages:
+            return []
+        newest = self.config.article_start_id + self.total_articles - 1
+        first = page * self.config.items_per_page
+        return [newest - first - i for i in range(self.config.items_per_page)]
+
+    async def _delay(self):
+        seconds = max(0.0, self.rng.gauss(
+            self.config.latency_ms, self.config.latency_jitter_ms)) / 1000
+        if seconds:
+            await asyncio.sleep(seconds)
+
+    def _fail(self, route: str) -> bool:
+        if self.config.error_rate and self.rng.random() < self.config.error_rate:
+            self.errors[route] += 1
+            return True
+        return False
+
+    # ---- 列表頁 ----
+
+    def _items(self, style: str, page: int) -> str:
+        ids = self.article_ids(page)
+        if style == 'scroll':
+            return ''.join(
+                f'<div class="col-sm-12 newsItems"><h3 class="view-li-title">'
+                f'<a class="gt" href="{self.article_url(i)}">新聞 {i}</a>'
+                f'</h3></div>' for i in ids)
+        if style == 'showmore':
+            return ''.join(
+                f'<li><a href="{self.article_url(i)}"><h2>新聞 {i}</h2></a></li>'
+                for i in ids)
+        return ''.join(
+            f'<li class="item"><a class="title" href="{self.article_url(i)}">'
+            f'新聞 {i}</a></li>' for i in ids)
+
+    def _scroll_page(self) -> str:
+        return f"""<!DOCTYPE html><html><head><meta charset="utf-8">
+<title>即時新聞</title><style>.newsItems{{height:120px}}</style></head><body>
+<div id="list">{self._items('scroll', 0)}</div>
+<script>
+let page = 1, loading = false;
+window.addEventListener('scroll', async () => {{
+  if (loading || page >= {self.config.list_pages}) return;
+  if (window.innerHeight + window.scrollY < document.body.scrollHeight - 200) return;
+  loading = true;
+  const response = await fetch('/api/list?style=scroll&page=' + page);
+  if (response.ok) {{
+    document.getElementById('list').insertAdjacentHTML('beforeend', await response.text());
+    page += 1;
+  }}
+  loading = false;
+}});
+</script></body></html>"""
+
+    def _showmore_page(self) -> str:
+        return f"""<!DOCTYPE html><html><head><meta charset="utf-8">
+<title>即時新聞</title><style>#jsMainList li{{height:120px}}</style></head><body>
+<ul id="jsMainList">{self._items('showmore', 0)}</ul>
+<a id="SiteContent_uiViewMoreBtn" href="javascript:void(0)">看更多內容</a>
+<script>
+let page = 1;
+const button = document.getElementById('SiteContent_uiViewMoreBtn');
+button.addEventListener('click', async () => {{
+  const response = await fetch('/api/list?style=showmore&page=' + page);
+  if (!response.ok) return;
+  document.getElementById('jsMainList').insertAdjacentHTML('beforeend', await response.text());
+  page += 1;
+  if (page >= {self.config.list_pages}) button.style.display = 'none';
+}});
+</script></body></html>"""
+
+    def _paged_page(self, page: int) -> str:
+        # 第一頁可以是 0、1 或省略，與各網站的 URL 構建器一致
+        index = max(page, 1) - 1
+        next_link = (f'<a class="next" href="/paged?page={index + 2}">下一頁</a>'
+                     if index + 1 < self.config.list_pages else '')
+        return f"""<!DOCTYPE html><html><head><meta charset="utf-8">
+<title>即時新聞 第{index + 1}頁</title></head><body>
+<ul class="list">{self._items('paged', index)}</ul>{next_link}</body></html>"""
+
+    async def handle(self, path: str,
+                     query: Dict[str, List[str]]) -> Response:
+        self.requests[path] += 1
+        await self._delay()
+
+        def _int(name: str, default: int = 0) -> int:
+            try:
+                return int(query.get(name, [default])[0])
+            except ValueError:
+                return default
+
+        if path == '/scroll':
+            return _html(self._scroll_page())
+        if path == '/showmore':
+            return _html(self._showmore_page())
+        if path == '/paged':
+            return _html(self._paged_page(_int('page')))
+        if path == '/api/list':
+            if self._fail(path):
+                return 503, 'text/plain', b'busy'
+            style = query.get('style', ['scroll'])[0]
+            return _html(self._items(style, _int('page')))
+        if path == '/News.aspx':
+            news_id = _int('NewsID', -1)
+            if self._fail(path):
+                return 503, 'text/plain', b'busy'
+            if news_id < self.config.article_start_id:
+                return 404, 'text/plain', b'not found'
+            return _html(self._article(news_id, self.config.seed))
+        return 404, 'text/plain', b'not found'
+
+    # ---- 代理池 API ----
+
+    def _proxy(self) -> dict:
+        return {'proxy': f"{self.config.host}:{self.config.port}",
+                'anonymous': '', 'https': False, 'region': 'local',
+                'check_count': 1, 'fail_count': 0, 'last_status': True,
+                'last_time': '', 'source': 'stand-in'}
+
+    async def handle_proxy(self, path: str,
+                           query: Dict[str, List[str]]) -> Response:
+        self.requests[f"proxy:{path}"] += 1
+        if path in ('/get/', '/pop/'):
+            return _json(self._proxy())
+        if path == '/all/':
+            return _json([self._proxy()])
+        if path == '/count/':
+            return _json({'count': 1, 'http_type': {'http': 1, 'https': 0},
+                          'source': {'stand-in': 1}})
+        if path == '/delete/':
+            return _json({'code': 0, 'src': 'success'})
+        return 404, 'text/plain', b'not found'
+
+    async def start(self):
+        self._servers = [HTTPServer(
+            self.config.host, self.config.port, self.handle)]
+        if self.config.proxy_port:
+            self._servers.append(HTTPServer(
+                self.config.host, self.config.proxy_port, self.handle_proxy))
+        for server in self._servers:
+            await server.start()
+        logger.info(f"替身新聞網站: {self.base_url}")
+
+    async def close(self):
+        for server in self._servers:
+            await server.close()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地替身新聞網站')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--proxy-port', type=int, default=5010)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--items', type=int, default=20)
+    parser.add_argument('--pages', type=int, default=10)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def _serve():
+        site = StandInNewsSite(NewsServerConfig(
+            port=args.port, proxy_port=args.proxy_port,
+            latency_ms=args.latency_ms, error_rate=args.error_rate,
+            items_per_page=args.items, list_pages=args.pages))
+        async with site:
+            print(f"{site.base_url}/scroll  /showmore  /paged  "
+                  f"代理池 API :{args.proxy_port}")
+            await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""
+以離線語料測量第二層爬蟲的解析效能
+
+    python -m benchmarks.parser_benchmark --rounds 5
+    python -m benchmarks.parser_benchmark --save-baseline
+    python -m benchmarks.parser_benchmark --compare --tolerance 0.25
+
+每篇網頁依序經過 soup(BeautifulSoup 解析) / parse_json_ld / parse_metadata /
+parse_html / transform_to_news，統計每秒處理篇數、各階段 p50/p99 延遲，
+並另以 tracemalloc 測量單篇解析的記憶體峰值
+--compare 時與基準值比較，速度變慢超過容許比例或解析結果改變時以非 0 結束，供 CI 使用
+"""
+import argparse
+import hashlib
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+
+from benchmarks.corpus import DEFAULT_ROOT, FixtureCorpus
+from scrapers.base import NewsHTTPFetcher
+from scrapers.registry import get_fetcher_class
+
+STAGES = ('soup', 'parse_json_ld', 'parse_metadata', 'parse_html',
+          'transform_to_news')
+DEFAULT_BASELINE = 'benchmarks/baselines/parser.json'
+
+
+def percentile(values: List[float], q: float) -> float:
+    """最近鄰排名法分位數"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def parse_stages(fetcher: NewsHTTPFetcher, url: str,
+                 html: str) -> Tuple[Dict[str, float], str]:
+    """執行一次完整解析，返回各階段耗時(秒)與結果摘要"""
+    timings: Dict[str, float] = {}
+    clock = time.perf_counter
+
+    start = clock()
+    soup = BeautifulSoup(html, 'html.parser')
+    timings['soup'] = clock() - start
+
+    start = clock()
+    json_ld = fetcher.parse_json_ld(soup)
+    timings['parse_json_ld'] = clock() - start
+
+    start = clock()
+    metadata = fetcher.parse_metadata(soup)
+    timings['parse_metadata'] = clock() - start
+
+    start = clock()
+    html_data = fetcher.parse_html(soup)
+    timings['parse_html'] = clock() - start
+
+    start = clock()
+    news = fetcher.transform_to_news(json_ld, metadata, html_data, url)
+    timings['transform_to_news'] = clock() - start
+
+    output = hashlib.sha256(
+        news.model_dump_json().encode('utf-8')).hexdigest()[:16]
+    return timings, output
+
+
+def load_pages(corpus: FixtureCorpus) -> List[Tuple[NewsHTTPFetcher, str, str]]:
+    """載入有第二層爬蟲支援的網頁，同一類別共用一個爬蟲實例"""
+    fetchers: Dict[type, NewsHTTPFetcher] = {}
+    pages = []
+    for page in corpus:
+        fetcher_class = get_fetcher_class(page.url)
+        if fetcher_class is None:
+            continue
+        if fetcher_class not in fetchers:
+            fetchers[fetcher_class] = fetcher_class()
+        pages.append((fetchers[fetcher_class], page.url, page.html))
+    return pages
+
+
+def measure_memory(pages: List[Tuple[NewsHTTPFetcher, str, str]]) -> float:
+    """單篇解析的最大記憶體峰值(KB)，tracemalloc 會拖慢速度，與計時分開執行"""
+    peak = 0
+    tracemalloc.start()
+    try:
+        for fetcher, url, html in pages:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            parse_stages(fetcher, url, html)
+            _, current_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, current_peak - baseline)
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def run(corpus: FixtureCorpus, rounds: int, warmup: int = 1) -> dict:
+    pages = load_pages(corpus)
+    if not pages:
+        raise SystemExit(
+            "語料中沒有可解析的網頁，請先執行 python -m benchmarks.corpus")
+
+    for _ in range(warmup):
+        for fetcher, url, html in pages:
+            parse_stages(fetcher, url, html)
+
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    outputs: Dict[str, str] = {}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for fetcher, url, html in pages:
+            timings, output = parse_stages(fetcher, url, html)
+            for stage, seconds in timings.items():
+                samples[stage].append(seconds)
+            outputs[url] = output
+    elapsed = time.perf_counter() - start
+
+    totals = [sum(values) for values in zip(*samples.values())]
+    stages = {
+        stage: {'p50_ms': percentile(values, 0.5) * 1000,
+                'p99_ms': percentile(values, 0.99) * 1000}
+        for stage, values in {**samples, 'total': totals}.items()}
+    return {
+        'corpus': corpus.digest(),
+        'pages': len(pages),
+        'rounds': rounds,
+        'python': platform.python_version(),
+        'articles_per_sec': len(pages) * rounds / elapsed,
+        'peak_memory_kb': measure_memory(pages),
+        'stages': stages,
+        'outputs': outputs,
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """與基準值比較，返回退步項目"""
+    problems: List[str] = []
+    if baseline.get('corpus') != result['corpus']:
+        problems.append(
+            f"語料不同 (基準 {baseline.get('corpus')}, 目前 {result['corpus']})，"
+            f"請重新產生基準值")
+        return problems
+
+    floor = baseline['articles_per_sec'] * (1 - tolerance)
+    if result['articles_per_sec'] < floor:
+        problems.append(
+            f"articles/sec {result['articles_per_sec']:.1f} "
+            f"< 基準 {baseline['articles_per_sec']:.1f} × {1 - tolerance:.2f}")
+
+    for stage, values in baseline['stages'].items():
+        current = result['stages'].get(stage)
+        if current is None:
+            continue
+        limit = values['p50_ms'] * (1 + tolerance)
+        if current['p50_ms'] > limit:
+            problems.append(
+                f"{stage} p50 {current['p50_ms']:.3f}ms "
+                f"> 基準 {values['p50_ms']:.3f}ms × {1 + tolerance:.2f}")
+
+    changed = [url for url, output in baseline.get('outputs', {}).items()
+               if result['outputs'].get(url, output) != output]
+    if changed:
+        problems.append(f"{len(changed)} 篇解析結果與基準不同，例如 {changed[0]}")
+    return problems
+
+
+def print_report(result: dict, baseline: dict = None):
+    print(f"語料 {result['corpus']}: {result['pages']} 篇 × {result['rounds']} 輪")
+    print(f"articles/sec: {result['articles_per_sec']:.1f}"
+          + (f" (基準 {baseline['articles_per_sec']:.1f})" if baseline else ''))
+    print(f"peak memory: {result['peak_memory_kb']:.0f} KB"
+          + (f" (基準 {baseline['peak_memory_kb']:.0f} KB)" if baseline else ''))
+    print(f"{'stage':<20}{'p50 ms':>10}{'p99 ms':>10}"
+          + (f"{'基準 p50':>12}" if baseline else ''))
+    for stage, values in result['stages'].items():
+        line = f"{stage:<20}{values['p50_ms']:>10.3f}{values['p99_ms']:>10.3f}"
+        if baseline and stage in baseline['stages']:
+            line += f"{baseline['stages'][stage]['p50_ms']:>12.3f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='第二層爬蟲解析效能測試')
+    parser.add_argument('--corpus', default=DEFAULT_ROOT)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='容許變慢的比例')
+    args = parser.parse_args()
+
+    corpus = FixtureCorpus(args.corpus)
+    try:
+        result = run(corpus, args.rounds)
+    finally:
+        corpus.close()
+
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if args.compare and baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+    print_report(result, baseline)
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(
+            json.dumps(result, ensure_ascii=False, indent=2) + '\n',
+            encoding='utf-8')
+        print(f"已保存基準值: {baseline_path}")
+
+    if args.compare:
+        if baseline is None:
+            print(f"找不到基準值: {baseline_path}")
+            sys.exit(2)
+        problems = compare(result, baseline, args.tolerance)
+        for problem in problems:
+            print(f"退步: {problem}")
+        sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+產生結構與三立新聞網新聞頁相同的合成網頁
+包含 SetnHTTPFetcher 解析的 meta、JSON-LD、時間與內文區塊，
+以及導覽列、相關新聞、內嵌腳本等實際頁面中佔大部分體積的內容
+以固定的亂數種子產生，相同參數得到相同的網頁
+"""
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from html import escape
+from typing import List
+
+SETN_ARTICLE_URL = 'https://www.setn.com/News.aspx?NewsID={news_id}'
+
+CATEGORIES = ['政治', '社會', '生活', '國際', '財經', '娛樂', '運動', '健康', '兩岸(大陸)']
+REGIONS = ['台北', '新北', '桃園', '台中', '台南', '高雄', '綜合', '國際中心']
+REPORTERS = ['王小明', '林美華', '陳建宏', '張雅婷', '李志偉', '黃淑芬']
+# 常用字，用來組成標題與內文
+CHARS = ('的一是在不了有和人這中大為上個國我以要他時來用們生到作地於出就分對成會可主發年動'
+         '同工也能下過子說產種面而方後多定行學法所民得經十三之進著等部度家電力裡如水化高自'
+         '二理起小物現實加量都兩體制機當使點從業本去把性好應開它合還因由其些然前外天政四日')
+
+TAIPEI = timezone(timedelta(hours=8))
+
+
+def _sentence(rng: random.Random, low: int = 12, high: int = 40) -> str:
+    return ''.join(rng.choice(CHARS) for _ in range(rng.randint(low, high)))
+
+
+def article_html(news_id: int, seed: int = 0, related: int = 30,
+                 nav_links: int = 150, paragraphs: int = 8) -> str:
+    """產生一篇三立新聞網格式的新聞網頁"""
+    rng = random.Random(seed * 1_000_003 + news_id)
+    title = _sentence(rng, 14, 28)
+    category = rng.choice(CATEGORIES)
+    reporter = rng.choice(REPORTERS)
+    region = rng.choice(REGIONS)
+    published = datetime(2024, 12, 1, tzinfo=TAIPEI) + timedelta(
+        minutes=rng.randint(0, 60 * 24 * 30))
+    keywords = [_sentence(rng, 2, 4) for _ in range(rng.randint(3, 6))]
+    body: List[str] = [_sentence(rng, 60, 160) for _ in range(paragraphs)]
+    description = body[0][:80]
+
+    json_ld = {
+        '@context': 'https://schema.org',
+        '@type': 'NewsArticle',
+        'headline': title,
+        'author': {'@type': 'Person', 'name': reporter},
+        'datePublished': published.isoformat(),
+        'articleSection': category,
+        'description': description,
+        'keywords': keywords,
+        'url': SETN_ARTICLE_URL.format(news_id=news_id),
+    }
+    breadcrumb = {
+        '@context': 'https://schema.org',
+        '@type': 'BreadcrumbList',
+        'itemListElement': [
+            {'@type': 'ListItem', 'position': 1, 'name': '首頁'},
+            {'@type': 'ListItem', 'position': 2, 'name': category},
+        ],
+    }
+
+    nav = '\n'.join(
+        f'<li><a href="/ViewAll.aspx?PageGroupID={i}">{escape(_sentence(rng, 2, 4))}</a></li>'  # noqa
+        for i in range(nav_links))
+    related_items = '\n'.join(
+        f'<div class="newsItems"><h3 class="view-li-title">'
+        f'<a class="gt" href="/News.aspx?NewsID={news_id - i - 1}">'
+        f'{escape(_sentence(rng, 14, 28))}</a></h3></div>'
+        for i in range(related))
+    scripts = '\n'.join(
+        f'<script>window.__ad_slot_{i} = {json.dumps({"id": i, "sizes": [[300, 250], [728, 90]], "targeting": _sentence(rng, 20, 60)}, ensure_ascii=False)};</script>'  # noqa
+        for i in range(12))
+    paragraphs_html = '\n'.join(f'<p>{escape(text)}</p>' for text in body)
+    date_text = published.strftime('%Y/%m/%d %H:%M')
+
+    return f"""<!DOCTYPE html>
+<html lang="zh-Hant-TW">
+<head>
+<meta charset="utf-8">
+<title>{escape(title)} | 三立新聞網</title>
+<meta name="Title" content="{escape(title)}">
+<meta name="Description" content="{escape(description)}">
+<meta name="keywords" content="{escape(','.join(keywords))}">
+<meta name="section" content="{escape(category)}">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<meta property="og:title" content="{escape(title)}">
+<meta property="og:url" content="{SETN_ARTICLE_URL.format(news_id=news_id)}">
+<script type="application/ld+json">{json.dumps(json_ld, ensure_ascii=False)}</script>
+<script type="application/ld+json">{json.dumps(breadcrumb, ensure_ascii=False)}</script>
+{scripts}
+</head>
+<body>
+<header><nav><ul class="nav">
+{nav}
+</ul></nav></header>
+<main>
+<div class="newsPage newsTime printdiv"><time>{date_text}</time></div>
+<h1 class="news-title-3">{escape(title)}</h1>
+<article>
+<div id="ckuse" class="newsCon">
+<time class="pageDate">{date_text}</time>
+<p>記者{reporter}／{region}報導</p>
+{paragraphs_html}
+</div>
+</article>
+<section class="related">
+{related_items}
+</section>
+</main>
+<footer><p>三立新聞網 版權所有</p></footer>
+</body>
+</html>
+"""
@@ -1,66 +1,412 @@
 from celery_scraper.celery import app
+from celery_scraper.worker_loop import run_on_worker_loop, worker_loop
+from config.crawler.config import (
+    FetchBatchConfig, FeedConfig, NearDuplicateConfig, AdaptiveLoadConfig)
 from utils.redis_client import RedisClient
-from managers.scraper_manager import ScraperManager
-from scrapers.first_layer.setn_crawler import SETNScraper
-from scrapers.first_layer.cna_crawler import CNAScraper
-from scrapers.first_layer.mnews_crawler import MNEWSScraper
-from scrapers.first_layer.itn_crawler import ITNScraper
-from scrapers.first_layer.tvbs_crawler import TVBSScraper
-from scrapers.first_layer.ettoday_crawler import ETtodayScraper
+from utils.retry_scheduler import RetryScheduler
+from utils.site_schedule import SiteScheduler
+from utils.backpressure import BackpressureController, BackpressureStatus
+from utils.crawl_checkpoint import CrawlCheckpoint
+from utils.distributed_lock import LeaseLostError
+from utils.crawler_stats import crawler_stats
+from utils.graceful_shutdown import shutdown
+from utils.load_controller import AdaptiveLoadController
+from utils.near_duplicate import create_near_duplicate_detector
+from utils.page_store import create_page_store
+from utils.tracing import NULL_TRACE, tracer
+from scrapers.registry import (
+    create_scraper, get_scraper_names, get_fetcher_class)
+from scrapers.base import NewsHTTPFetcher
+from scrapers.feed_discovery import FeedDiscovery
+from sinks.base import NewsSink
+from sinks.factory import create_worker_news_sink
+from models.article import News
+from typing import Dict, Any, List, Optional, Tuple, Type
+from urllib.parse import urlparse
 import asyncio
+import logging
+import time
 
+logger = logging.getLogger(__name__)
 
-def run_async(coro):
-    return asyncio.get_event_loop().run_until_complete(coro)
+batch_config = FetchBatchConfig()
+near_duplicate_config = NearDuplicateConfig()
+feed_config = FeedConfig()
+adaptive_load_config = AdaptiveLoadConfig()
+
+# worker 行程共用的新聞輸出，緩衝跨任務累積，關閉時寫出剩餘資料
+_news_sink: Optional[NewsSink] = None
+
+
+def is_fetchable(url: str) -> bool:
+    """URL所屬網站是否有第二層爬蟲"""
+    return get_fetcher_class(url) is not None
+
+
+def create_redis_client() -> RedisClient:
+    """
+    任務使用的 Redis 客戶端
+    - 只有第二層能消化的URL進入待處理佇列
+    - 網頁內容壓縮後存入網頁儲存後端，html:pending 只保存引用
+    - 統計累積在行程共用的聚合器，由 worker 事件循環定期寫入
+    """
+    return RedisClient(page_store=create_page_store(),
+                       is_fetchable=is_fetchable,
+                       stats=crawler_stats)
+
+
+def get_news_sink() -> NewsSink:
+    global _news_sink
+    if _news_sink is None:
+        _news_sink = create_worker_news_sink()
+        # 在等待進行中任務之後、關閉 Redis 連接池之前寫出
+        worker_loop.add_shutdown_hook(
+            _news_sink.close, order=500, name='news_sink')
+    return _news_sink
 
 
 @app.task
 def scrape_all():
-    async def _do_scrape():
-        # 在這個函數內部創建和管理所有異步資源
+    """
+    排程入口: 只負責把到期且沒有在執行中的網站分派給 discover_site
+    實際爬取在 browser 佇列的 worker 上執行
+    """
+    async def _do_dispatch():
+        redis_client = create_redis_client()
+        try:
+            scheduler = SiteScheduler(redis_client)
+            dispatched = []
+            for name in get_scraper_names():
+                if await scheduler.is_due(name) and \
+                        not await scheduler.is_running(name):
+                    await scheduler.mark_dispatched(name)
+                    discover_site.delay(name)
+                    dispatched.append(name)
+            return dispatched
+        finally:
+            await redis_client.close()
+
+    return run_on_worker_loop(_do_dispatch())
+
+
+@app.task
+def discover_site(name: str):
+    """
+    收集單一網站的新聞URL，並將新URL分批交給 fetch_article_batch
+    有 RSS / sitemap 的網站平時只讀取 feed，瀏覽器爬取用於補爬
+    """
+    async def _do_discover():
         # 建立Redis客戶端
-        redis_client = RedisClient()
+        redis_client = create_redis_client()
         try:
-            # 初始化管理器
-            manager = ScraperManager()
-            # 註冊爬蟲
-            manager.register_scraper(SETNScraper())
-            manager.register_scraper(CNAScraper())
-            manager.register_scraper(MNEWSScraper())
-            manager.register_scraper(ITNScraper())
-            manager.register_scraper(TVBSScraper())
-            manager.register_scraper(ETtodayScraper())
-
-            # 執行爬蟲: 運行直到一個 Future 實例完成
-            urls = await manager.scrape_all()
-            stats = await redis_client.add_urls(urls)
+            scheduler = SiteScheduler(redis_client)
+
+            # 在網站租約保護下執行，前一次執行仍在進行時直接略過
+            lease = scheduler.lease(name)
+            if not await lease.acquire():
+                logger.info(f"{name} 前一次爬取尚未結束，略過本次執行")
+                await scheduler.record_skip(name)
+                return {'status': 'skipped'}
+
+            try:
+                # 第二層消化不及時暫停收集或只爬第一頁
+                backpressure = BackpressureController(redis_client)
+                status = await backpressure.evaluate()
+                if status == BackpressureStatus.PAUSED:
+                    logger.warning(f"背壓暫停中，略過 {name} 的URL收集")
+                    await scheduler.postpone(name)
+                    return {'status': 'paused'}
+
+                # 上次執行中途停止時從檢查點續爬
+                checkpoint = CrawlCheckpoint(redis_client)
+                saved = await checkpoint.load(name)
+                resume_from = saved['load_depth'] if saved else 0
+
+                new_urls: List[str] = []
+                batches = 0
+                # 本次加載到的深度與最後一次出現新URL的深度
+                last_depth = productive_depth = resume_from
+                # 本次列表加載的開始時間，作為新URL追蹤的起點
+                load_started = time.time()
+
+                async def _ingest(urls: List[str]) -> int:
+                    nonlocal batches
+                    # 租約遺失時其他 worker 可能已接手，停止寫入與分派
+                    lease.check()
+                    added = await redis_client.add_new_urls(
+                        set(urls), discovered_at=load_started)
+                    new_urls.extend(added)
+                    batches += dispatch_fetch_batches(added)
+                    return len(added)
+
+                async def _on_urls(urls: List[str], load_depth: int):
+                    # 每次加載後立即寫入並分派，同時保存進度
+                    nonlocal last_depth, productive_depth, load_started
+                    last_depth = load_depth
+                    if await _ingest(urls):
+                        productive_depth = load_depth
+                    await checkpoint.save(name, load_depth, urls[-1])
+                    load_started = time.time()
+
+                scraper = create_scraper(name)
+                urls: List[str] = []
+                source = 'browser'
+
+                # 有 feed 的網站優先讀取 feed，只在 feed 失敗、
+                # 有未完成的檢查點或到了補爬時間時才啟動瀏覽器
+                feed_urls = scraper.get_feed_urls()
+                if feed_urls and not saved:
+                    feed_result = await FeedDiscovery(
+                        redis_client, feed_config).discover(feed_urls)
+                    await _ingest(feed_result.urls)
+                    urls.extend(feed_result.urls)
+                    if feed_result.ok and not await scheduler.needs_backfill(
+                            name, feed_config.backfill_interval):
+                        source = 'feed'
+
+                load_controller = AdaptiveLoadController(
+                    redis_client, adaptive_load_config)
+                load_count = None
+                if source == 'browser':
+                    # 依最近幾次出現新URL的深度決定加載次數，定期深度爬取
+                    adaptive = await load_controller.load_count(name)
+                    load_count = backpressure.limit_load_count(status, adaptive)
+                    load_started = time.time()
+                    urls.extend(await scraper.fetch_urls(
+                        load_count=load_count,
+                        on_urls=_on_urls,
+                        resume_from=resume_from))
+                # 瀏覽器爬取會吞下回呼的例外，結束後再檢查一次
+                lease.check()
+
+                if shutdown.requested:
+                    # 保留檢查點，讓其他 worker 盡快接手
+                    await scheduler.postpone(name, 1)
+                    return {
+                        'status': 'interrupted',
+                        'urls_count': len(urls),
+                        'new': len(new_urls),
+                        'batches': batches,
+                    }
+
+                if source == 'browser':
+                    await checkpoint.complete(name)
+                    # 背壓限制的加載次數不代表網站的發稿量，不列入紀錄
+                    if load_count == adaptive:
+                        exhausted = load_count == -1 or \
+                            last_depth - resume_from < load_count or \
+                            productive_depth < last_depth
+                        await load_controller.record(
+                            name, productive_depth, exhausted)
+                    if feed_urls:
+                        await scheduler.record_backfill(name)
+                interval = await scheduler.record_run(name, len(new_urls))
+            except LeaseLostError as e:
+                # 檢查點與排程狀態交給目前的租約持有者
+                logger.warning(f"{name} 中止爬取: {e}")
+                return {'status': 'lease_lost', 'new': len(new_urls)}
+            finally:
+                await lease.release()
 
             return {
+                'status': 'done',
+                'source': source,
+                'load_count': load_count,
+                'load_depth': last_depth,
+                'backpressure': status.value,
+                'resumed_from': resume_from,
                 'urls_count': len(urls),
-                'stats': stats
+                'new': len(new_urls),
+                'batches': batches,
+                'next_interval': interval,
             }
         finally:
-            # 確保 Redis 連接被關閉
+            # 釋放客戶端，連接歸還共用連接池
             await redis_client.close()
-        # 使用 asyncio 創建新的事件循環
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    async def _tracked():
+        # 關閉流程會等待進行中的收集保存檢查點、釋放租約
+        async with shutdown.track():
+            return await _do_discover()
+
+    # 在 worker 常駐的事件循環上執行，共用連接池等異步資源
+    return run_on_worker_loop(_tracked())
+
+
+def dispatch_fetch_batches(urls: List[str]) -> int:
+    """將有第二層爬蟲支援的URLs分批送到 http 佇列，返回批次數"""
+    supported = [url for url in urls if get_fetcher_class(url)]
+    size = batch_config.batch_size
+    batches = [supported[i:i + size] for i in range(0, len(supported), size)]
+    for batch in batches:
+        fetch_article_batch.delay(batch)
+    return len(batches)
+
 
+async def _fetch_one(
+        fetcher: NewsHTTPFetcher,
+        url: str,
+        retry_scheduler: RetryScheduler,
+        trace=NULL_TRACE
+) -> Tuple[str, Optional[str], Optional[News]]:
+    """下載並解析單一新聞，返回 (處理結果, 網頁內容, 新聞)"""
+    # 斷路器開啟中的主機不佔用下載資源，冷卻結束後再重新排入
+    opened_until = await retry_scheduler.breaker_open_until(url)
+    if opened_until:
+        await retry_scheduler.defer(url, opened_until)
+        now = time.time()
+        trace.add_span('deferred', now, now)
+        return 'deferred', None, None
+
+    redis_client = retry_scheduler.redis_client
     try:
-        return loop.run_until_complete(_do_scrape())
+        start = time.perf_counter()
+        with trace.span('download'):
+            html = await fetcher.fetch_html(url)
+        downloaded = time.perf_counter()
+        redis_client.record_latency(url, 'download', downloaded - start)
+        with trace.span('parse'):
+            news = fetcher.parse(url, html)
+        redis_client.record_latency(
+            url, 'parse', time.perf_counter() - downloaded)
+    except Exception as e:
+        logger.error(f"爬取 {url} 失敗: {str(e)}")
+        outcome = await retry_scheduler.handle_failure(url, e)
+        if outcome == 'dead':
+            trace.end(f"{type(e).__name__}: {e}")
+        return 'failed', None, None
+
+    return 'fetched', html, news
+
+
+@app.task
+def fetch_article_batch(urls: List[str]):
+    """
+    下載並解析一批新聞網頁
+    - 同一網站的URL共用一個 HTTP 客戶端
+    - 完成狀態以每個分片一次 pipeline 批量寫入 Redis
+    - 新聞交給行程共用的輸出直接寫出，不經過 Celery 結果後端；
+      寫出到儲存後才標記完成，worker 中途被終止時任務重新派發(至少一次)，
+      設定為 parquet 時寫入 JSONL，由 sinks.compact 離線合併
+    - 收到關閉信號後不再開始新的下載，已下載的結果照常寫入，
+      未處理的URL重新送回佇列
+    """
+    async def _do_fetch():
+        redis_client = create_redis_client()
+        retry_scheduler = RetryScheduler(redis_client)
+        semaphore = asyncio.Semaphore(batch_config.concurrency)
+
+        # 依第二層爬蟲類別分組
+        groups: Dict[Type[NewsHTTPFetcher], List[str]] = {}
+        for url in urls:
+            fetcher_class = get_fetcher_class(url)
+            if fetcher_class:
+                groups.setdefault(fetcher_class, []).append(url)
+
+        # 取回URL寫入時建立的追蹤上下文
+        traces = {}
+        if tracer.enabled:
+            contexts = await redis_client.get_trace_contexts(urls)
+            traces = {url: tracer.resume(url, context)
+                      for url, context in contexts.items()}
+
+        async def _limited(fetcher, url):
+            async with semaphore:
+                if shutdown.requested:
+                    return 'interrupted', None, None
+                return await _fetch_one(
+                    fetcher, url, retry_scheduler,
+                    traces.get(url, NULL_TRACE))
+
+        summary: Dict[str, Any] = {
+            'fetched': 0, 'failed': 0, 'deferred': 0, 'interrupted': 0}
+        interrupted: List[str] = []
+        pages: Dict[str, Optional[str]] = {}
+        items: List[News] = []
+        try:
+            for fetcher_class, group in groups.items():
+                async with fetcher_class() as fetcher:
+                    results = await asyncio.gather(
+                        *[_limited(fetcher, url) for url in group])
+                for url, (status, html, news) in zip(group, results):
+                    summary[status] += 1
+                    if status == 'interrupted':
+                        interrupted.append(url)
+                    if news is not None:
+                        pages[url] = html
+                        items.append(news)
+
+            if items and near_duplicate_config.enabled:
+                # 其他媒體轉載的相似新聞歸入同一群組
+                detector = create_near_duplicate_detector(
+                    redis_client, near_duplicate_config)
+                matches = await detector.check_many(items)
+                summary['duplicates'] = sum(
+                    match.is_duplicate for match in matches)
+                if near_duplicate_config.drop_duplicates:
+                    items = detector.filter_duplicates(items, matches)
+
+            completed = [traces[url] for url in pages if url in traces]
+            # sink span 在新聞實際寫出後才結束
+            with tracer.batch_span(completed, 'sink'):
+                if items:
+                    # 輸出不經過緩衝，返回時已寫入儲存，之後才標記完成
+                    await get_news_sink().write_many(items)
+            for trace in completed:
+                trace.end()
+            # 完成與移入死信的輸出完整追蹤，等待重試或延後的只輸出本次嘗試
+            tracer.export(traces.values())
+            if pages:
+                await redis_client.mark_urls_completed(pages)
+                # 每個主機只需重置一次斷路器
+                hosts = {urlparse(url).hostname: url for url in pages}
+                for url in hosts.values():
+                    await retry_scheduler.record_success(url)
+
+            # 未開始下載的URL仍在待處理佇列，交給其他 worker
+            if interrupted:
+                fetch_article_batch.delay(interrupted)
+            return summary
+        finally:
+            await redis_client.close()
+
+    async def _tracked():
+        async with shutdown.track():
+            return await _do_fetch()
+
+    return run_on_worker_loop(_tracked())
+
+
+@app.task
+def promote_retries():
+    """將到期的失敗重試URL移回待處理佇列，並重新分派下載"""
+    async def _do_promote():
+        redis_client = create_redis_client()
+        try:
+            urls = await RetryScheduler(redis_client).promote_due()
+            return dispatch_fetch_batches(urls)
+        finally:
+            await redis_client.close()
+
+    return run_on_worker_loop(_do_promote())
+
 
-    finally:
+@app.task
+def cleanup_urls(days: int = 7):
+    """
+    定期清理: 移除超過保存天數的URL記錄與網頁引用，
+    並移除待處理佇列中沒有第二層爬蟲、永遠不會被消化的URL
+    """
+    async def _do_cleanup():
+        redis_client = create_redis_client()
         try:
-            # 安全機制: 確保程式能正確地關閉
-            # 清理所有懸掛的任務, all_tasks() 返回所有還在運行中的任務
-            pending = asyncio.all_tasks(loop)
-            # gather 等待任務完成, return_exceptions=True 表示任務出錯也不會中斷其他任務
-            loop.run_until_complete(asyncio.gather(
-                *pending, return_exceptions=True))
+            purged = await redis_client.purge_unfetchable_pending()
+            await redis_client.cleanup_old_urls(days)
+            return {'purged': purged}
         finally:
-            # 關閉事件循環
-            loop.close()
+            await redis_client.close()
+
+    return run_on_worker_loop(_do_cleanup())
 
 
 @app.task
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+import signal
+import threading
+from typing import Awaitable, Callable, List, Optional, Tuple, Any
+
+from celery.signals import (  # type: ignore
+    worker_process_init, worker_process_shutdown, worker_shutdown,
+    worker_shutting_down)
+
+from utils.crawler_stats import crawler_stats
+from utils.graceful_shutdown import shutdown
+from utils.metrics import metrics
+from utils.redis_client import RedisClient
+from utils.redis_pool import redis_pool_manager
+
+logger = logging.getLogger(__name__)
+
+ShutdownHook = Callable[[], Awaitable[Any]]
+
+
+class WorkerLoop:
+    """
+    worker 行程內常駐的事件循環
+    事件循環在背景線程中持續運行，任務透過 run() 把協程交給它執行，
+    因此 Redis 連接池、HTTP 客戶端等異步資源可以跨任務重用
+    """
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # stop() 之後不再重新啟動，避免關閉鉤子釋放的資源被任務重新建立
+        self._closed = False
+        # (順序, 名稱, 鉤子)，順序小的先執行
+        self._hooks: List[Tuple[int, str, ShutdownHook]] = []
+
+    @property
+    def is_running(self) -> bool:
+        return self.loop is not None and self.loop.is_running()
+
+    def start(self):
+        """啟動背景事件循環，已啟動時不做任何事"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("worker 事件循環已關閉")
+            if self.is_running:
+                return
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(
+                target=_run, name='worker-event-loop', daemon=True)
+            self._thread.start()
+            ready.wait()
+            self.loop = loop
+            logger.info("worker 事件循環已啟動")
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None
+            ) -> Any:
+        """
+        在 worker 事件循環上執行協程並同步等待結果
+        Raises:
+            RuntimeError: 事件循環已經 stop()
+        """
+        if self._closed:
+            if asyncio.iscoroutine(coro):
+                coro.close()
+            raise RuntimeError("worker 事件循環已關閉")
+        if not self.is_running:
+            # 非 worker 環境(例如直接呼叫任務函數)時延遲啟動
+            self.start()
+        future = asyncio.run_coroutine_threadsafe(
+            coro, self.loop)  # type: ignore
+        return future.result(timeout)
+
+    def add_shutdown_hook(self, hook: ShutdownHook, order: int = 100,
+                          name: Optional[str] = None):
+        """
+        註冊關閉時執行的異步鉤子
+        Args:
+            hook: 無參數的協程函數
+            order: 執行順序，數字小的先執行
+            name: 用於日誌的名稱
+        """
+        with self._lock:
+            self._hooks.append((order, name or hook.__name__, hook))
+            self._hooks.sort(key=lambda item: item[0])
+
+    async def _run_hooks(self):
+        for order, name, hook in list(self._hooks):
+            try:
+                await hook()
+            except Exception as e:
+                logger.error(f"執行關閉鉤子 {name} 時發生錯誤: {str(e)}")
+
+    async def _cancel_pending(self):
+        """取消仍在運行的任務"""
+        current = asyncio.current_task()
+        pending = [task for task in asyncio.all_tasks()
+                   if task is not current]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def stop(self, timeout: float = 30.0):
+        """依序執行關閉鉤子，取消剩餘任務後停止事件循環"""
+        with self._lock:
+            self._closed = True
+            loop, thread = self.loop, self._thread
+            if loop is None or not loop.is_running():
+                return
+            self.loop = None
+            self._thread = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(
+                self._run_hooks(), loop).result(timeout)
+            asyncio.run_coroutine_threadsafe(
+                self._cancel_pending(), loop).result(timeout)
+        except Exception as e:
+            logger.error(f"關閉 worker 事件循環時發生錯誤: {str(e)}")
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            if thread:
+                thread.join(timeout)
+            loop.close()
+            logger.info("worker 事件循環已關閉")
+
+
+# 行程內唯一的 worker 事件循環
+worker_loop = WorkerLoop()
+
+
+def run_on_worker_loop(coro: Awaitable[Any],
+                       timeout: Optional[float] = None) -> Any:
+    """同步任務與 worker 事件循環之間的橋接，行程關閉後呼叫會拋出 RuntimeError"""
+    return worker_loop.run(coro, timeout)
+
+
+# 等待進行中的爬取保存檢查點的時間，需小於 stop() 的逾時
+DRAIN_TIMEOUT = 25.0
+
+
+async def _drain_in_flight():
+    shutdown.request()
+    await shutdown.wait_drained(DRAIN_TIMEOUT)
+
+
+async def _close_redis_pools():
+    await redis_pool_manager.close_loop_pools()
+
+
+# 定期寫入行程共用統計的客戶端，在 worker 事件循環上常駐
+_stats_client: Optional[RedisClient] = None
+
+
+async def _start_stats_flusher():
+    global _stats_client
+    _stats_client = RedisClient(stats=crawler_stats)
+    _stats_client.start_stats_flusher()
+
+
+async def _stop_stats_flusher():
+    # 停止背景任務後寫入剩餘的統計
+    await crawler_stats.stop()
+    if _stats_client is not None and crawler_stats.has_pending():
+        await _stats_client.flush_stats()
+
+
+async def _start_metrics_push():
+    metrics.start_push(RedisClient())
+
+
+async def _stop_metrics_push():
+    # 停止前最後推送一次，不遺漏最後一段時間的樣本
+    if metrics.enabled:
+        await metrics.stop_push(RedisClient())
+
+
+def _start_metrics():
+    if not metrics.enabled:
+        return
+    # 各子行程推送到 Redis，由 python -m utils.metrics 合併後輸出
+    worker_loop.run(_start_metrics_push())
+
+
+# 先等待進行中的工作結束，Redis 連接池最後關閉，讓前面的鉤子仍可寫入 Redis
+worker_loop.add_shutdown_hook(_drain_in_flight, order=0)
+worker_loop.add_shutdown_hook(_stop_metrics_push, order=900)
+worker_loop.add_shutdown_hook(_stop_stats_flusher, order=900)
+worker_loop.add_shutdown_hook(_close_redis_pools, order=1000)
+
+
+def _install_sigterm_handler():
+    """
+    讓 SIGTERM 先標記關閉，使執行中的任務在下一個檢查點停止
+    原本有處理函數(例如 solo 模式的 Celery 主行程)時照常呼叫；
+    原本為預設行為時，第二次收到信號才結束行程
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def _handler(signum, frame):
+        first = not shutdown.requested
+        shutdown.request()
+        if callable(previous):
+            previous(signum, frame)
+        elif not first:
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+
+    signal.signal(signal.SIGTERM, _handler)
+
+
+@worker_process_init.connect
+def _start_worker_loop(**kwargs):
+    # prefork 模式下在子行程中啟動，避免 fork 前就建立線程
+    worker_loop.start()
+    _install_sigterm_handler()
+    worker_loop.run(_start_stats_flusher())
+    _start_metrics()
+
+
+@worker_shutting_down.connect
+def _request_shutdown(**kwargs):
+    # 主行程收到關閉信號(warm shutdown)
+    shutdown.request()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _stop_worker_loop(**kwargs):
+    worker_loop.stop()
@@ -7,9 +7,14 @@ from config.redis import constants as RedisConfig
 broker_url = f'redis://{RedisConfig.HOST}:{
     RedisConfig.PORT}/{RedisConfig.DB_CELERY}'
 
-# backend: 結果存儲 使用redis 使用2庫
+# backend: 結果存儲 使用redis 使用2庫，與 broker 分開
 result_backend = f'redis://{RedisConfig.HOST}:{
-    RedisConfig.PORT}/{RedisConfig.DB_CELERY}'
+    RedisConfig.PORT}/{RedisConfig.DB_CELERY_RESULT}'
+
+# 預設不保存任務結果，新聞由任務直接批量寫入輸出目的地
+# 需要結果的任務在 @app.task 上以 ignore_result=False 個別開啟
+task_ignore_result = True
+result_expires = 3600
 
 accept_content = ['application/json']
 timezone = 'Asia/Taipei'
@@ -18,10 +23,43 @@ enable_utc = True
 # 註冊任務
 imports = ('celery_scraper.scraper_tasks',)
 
+# 任務路由: Selenium 爬取與 HTTP 下載分開在不同佇列，由不同的 worker 群組消費
+# - browser: 低併發、高記憶體，例如 -Q browser -c 2
+# - http: 高併發，例如 -Q http -c 32
+task_default_queue = 'default'
+task_routes = {
+    'celery_scraper.scraper_tasks.discover_site': {'queue': 'browser'},
+    'celery_scraper.scraper_tasks.fetch_article_batch': {'queue': 'http'},
+}
+
+# 每個 worker 一次只預取一個任務，長時間的瀏覽器任務不會卡住其他 worker
+# http worker 可以在啟動時以 --prefetch-multiplier 調高
+worker_prefetch_multiplier = 1
+# 任務完成後才確認，worker 中途結束時任務會重新派發
+task_acks_late = True
+
+# 單一 worker 的速率限制
+task_annotations = {
+    'celery_scraper.scraper_tasks.discover_site': {'rate_limit': '6/m'},
+    'celery_scraper.scraper_tasks.fetch_article_batch': {'rate_limit': '60/m'},
+}
+
 beat_schedule = {
     'first-scraper-every-minute': {
         'task': 'celery_scraper.scraper_tasks.scrape_all',
         # 'schedule': crontab(minute='5', hour='*'),
-        'schedule': timedelta(seconds=10)
+        # 各網站實際的執行間隔由 SiteScheduler 動態調整，此處只負責觸發檢查
+        'schedule': timedelta(seconds=10),
+        # 未及時被執行的觸發直接作廢，避免在佇列中堆積
+        'options': {'expires': 10},
+    },
+    'promote-retries-every-30-seconds': {
+        'task': 'celery_scraper.scraper_tasks.promote_retries',
+        'schedule': timedelta(seconds=30)
+    },
+    'cleanup-urls-every-hour': {
+        'task': 'celery_scraper.scraper_tasks.cleanup_urls',
+        'schedule': timedelta(hours=1),
+        'options': {'expires': 3600},
     },
 }
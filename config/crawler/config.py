@@ -1,5 +1,7 @@
 
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
 
 
 class HttpxFetcherConfig(BaseModel):
@@ -9,3 +11,111 @@ class HttpxFetcherConfig(BaseModel):
     timeout: float = 10.0               # 請求時間超過此秒數，中斷請求
     use_proxy: bool = True              # 是否使用代理池
     random_delay_range: tuple = (1, 3)  # 隨機延遲
+
+
+class RetryConfig(BaseModel):
+    """失敗重試排程配置"""
+    max_attempts: int = 5               # 超過此嘗試次數移入死信
+    base_delay: float = 30.0            # 第一次重試的基礎延遲秒數
+    max_delay: float = 3600.0           # 重試延遲上限
+    breaker_threshold: int = 5          # 同一主機連續失敗達此次數時開啟斷路器
+    breaker_cooldown: float = 600.0     # 斷路器開啟後暫停該主機的秒數
+    promote_batch_size: int = 200       # 每個分片每次移回佇列的最大數量
+
+
+class ScheduleConfig(BaseModel):
+    """第一層爬蟲排程配置"""
+    initial_interval: float = 300.0     # 初次執行後的預設間隔秒數
+    min_interval: float = 60.0          # 最短執行間隔
+    max_interval: float = 1800.0        # 最長執行間隔
+    target_new_urls: int = 20           # 單次執行新增URL數的目標值
+    lease_ttl: float = 120.0            # 網站租約有效秒數
+    dispatch_timeout: float = 1800.0    # 分派後等待開始執行的最長秒數，逾時視為任務遺失
+    heartbeat_interval: float = 30.0    # 租約續期間隔
+
+
+class FetchBatchConfig(BaseModel):
+    """第二層爬蟲批次任務配置"""
+    batch_size: int = 20                # 每個批次任務處理的URL數
+    concurrency: int = 5                # 批次內同時下載的數量
+
+
+class BackpressureConfig(BaseModel):
+    """URL收集與新聞下載之間的背壓配置，超過高水位開始限流，低於低水位才恢復"""
+    pending_high: int = 5000            # 待處理URL數高水位
+    pending_low: int = 2000             # 待處理URL數低水位
+    lag_high: float = 1800.0            # 第二層預估消化時間(秒)高水位
+    lag_low: float = 600.0              # 第二層預估消化時間(秒)低水位
+    pause_factor: float = 2.0           # 超過高水位的倍數時暫停URL收集
+    throttled_load_count: int = 1       # 限流時的加載次數，不做深度滾動
+    rate_window_minutes: int = 5        # 計算第二層下載速率的時間窗口
+
+
+class NearDuplicateConfig(BaseModel):
+    """跨媒體相似新聞(轉載通稿)偵測配置"""
+    enabled: bool = True
+    backend: str = 'redis'              # 索引後端: redis / memory
+    threshold: float = 0.6              # 估計 Jaccard 相似度達此值視為相似
+    num_perm: int = 128                 # MinHash 簽章長度
+    shingle_size: int = 3               # 以連續幾個字作為特徵
+    drop_duplicates: bool = False       # 是否不輸出其他媒體已有的相似新聞
+    ttl: int = 7 * 86400                # 索引保存秒數，轉載多發生在數天內
+
+
+class FeedConfig(BaseModel):
+    """RSS / sitemap URL收集配置"""
+    timeout: float = 10.0               # 請求逾時秒數
+    max_bytes: int = 10 * 1024 * 1024   # 單一 feed 最多讀取的位元組數
+    max_child_sitemaps: int = 3         # sitemap index 最多展開的子 sitemap 數
+    backfill_interval: float = 6 * 3600  # 有 feed 的網站多久以瀏覽器補爬一次
+
+
+class AdaptiveLoadConfig(BaseModel):
+    """依歷史新增量調整第一層加載次數的配置"""
+    window: int = 20                    # 保留最近幾次的紀錄
+    quantile: float = 0.9               # 取歷史出現新URL的加載深度的分位數
+    margin: int = 1                     # 在分位數之外多加載的次數
+    min_samples: int = 5                # 紀錄不足時不限制加載次數
+    min_loads: int = 1                  # 加載次數下限
+    deep_crawl_every: int = 12          # 每幾次執行做一次不限次數的深度爬取
+
+
+class ChromeProfileConfig(BaseModel):
+    """第一層爬蟲 Chrome 的效能設定，爬蟲可透過 chrome_overrides 覆寫個別欄位"""
+    optimized: bool = True              # False 時只使用 --headless 與 user agent (舊設定)
+    headless: str = 'new'               # new / old
+    disable_gpu: bool = True
+    disable_extensions: bool = True
+    block_images: bool = True           # 只需要列表中的連結，不載入圖片
+    # 磁碟快取目錄，預設不使用；Chrome 的快取只能由單一瀏覽器使用，
+    # 可用 {pid} 區分行程，例如 data/chrome-cache/{pid}，同一行程不可同時開多個瀏覽器
+    disk_cache_dir: Optional[str] = None
+    disk_cache_size: int = 256 * 1024 * 1024
+    renderer_process_limit: int = 2     # 每個瀏覽器的 renderer 行程上限
+    page_load_strategy: str = 'eager'   # normal / eager / none
+    window_size: str = '1366,768'
+    user_agent: str = (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+        '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+    extra_arguments: List[str] = Field(default_factory=list)
+    prefs: Dict[str, object] = Field(default_factory=dict)
+
+
+class MetricsConfig(BaseModel):
+    """
+    效能指標配置，預設停用
+    worker 定期推送到 Redis，由 python -m utils.metrics 合併所有行程後以 HTTP 端點輸出
+    """
+    enabled: bool = False
+    http_port: int = 9464               # 合併後 /metrics 端點的埠
+    push_interval: float = 15.0         # 推送到 Redis 的間隔秒數
+    redis_prefix: str = 'metrics:proc'  # 各行程推送的 hash 鍵前綴
+    redis_ttl: int = 120                # 行程停止推送後保留的秒數
+
+
+class TracingConfig(BaseModel):
+    """新聞從列表頁被發現到寫入輸出的追蹤配置，預設停用"""
+    enabled: bool = False
+    sample_rate: float = 1.0            # 建立追蹤的URL比例
+    export_path: str = 'data/traces/spans-{pid}.jsonl'  # 每個行程一個檔案
+    service_name: str = 'news-crawler'
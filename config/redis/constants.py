@@ -1,7 +1,24 @@
 # Redis 數據庫分配
 DB_CRAWLER = 0    # 爬蟲URL緩存使用 DB 0
-DB_CELERY = 1     # Celery 使用 DB 1
+DB_CELERY = 1     # Celery broker 使用 DB 1
+DB_CELERY_RESULT = 2  # Celery 結果後端使用 DB 2
+DB_PAGES = 3      # 原始網頁內容使用 DB 3
+DB_LOAD_TEST = 15  # 壓力測試使用 DB 15，不與正式資料共用
 
 # Redis 連接配置
 HOST = '127.0.0.1'
 PORT = 6379
+
+# 連接池配置
+MAX_CONNECTIONS = 50          # 每個事件循環的連接池最大連接數
+HEALTH_CHECK_INTERVAL = 30    # 閒置超過此秒數的連接在使用前先 PING 檢查
+SOCKET_TIMEOUT = 5.0          # 連接與讀寫逾時秒數
+POOL_TIMEOUT = 10.0           # 連接池已滿時等待可用連接的秒數
+
+# 分片配置: 每個節點為一個分片，URL 依網站網域以一致性雜湊分配到分片
+SHARD_NODES = [
+    {'name': 'node0', 'host': HOST, 'port': PORT},
+]
+CLUSTER_MODE = False          # 使用 Redis Cluster 時設為 True，SHARD_NODES 填任一節點
+CLUSTER_SHARD_COUNT = 16      # Cluster 模式下的邏輯分片數(hash tag 數量)
+SHARD_VIRTUAL_NODES = 160     # 一致性雜湊環上每個分片的虛擬節點數
@@ -0,0 +1,28 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class PageStoreConfig(BaseModel):
+    """原始網頁儲存配置"""
+    backend: str = 'redis'                   # 儲存後端: redis / file(僅限單一行程)
+    codec: str = 'zstd'                      # 壓縮方式: zstd / gzip / none
+    compression_level: int = 3               # 壓縮等級
+    dedup: bool = True                       # 是否以內容雜湊去重
+    root_dir: str = 'data/pages'             # file 後端的資料目錄
+    segment_max_bytes: int = 64 * 1024 * 1024  # 單一分段檔的最大容量
+    ttl_seconds: Optional[int] = 7 * 86400   # 超過此秒數的網頁會被淘汰
+    max_total_bytes: Optional[int] = 2 * 1024 * 1024 * 1024  # 總容量上限
+    redis_key_prefix: str = 'html:blob:'     # redis 後端的鍵前綴
+    mmap_reads: bool = False                 # file 後端以 mmap 讀取分段檔，適合大量重複讀取
+
+
+class NewsSinkConfig(BaseModel):
+    """新聞輸出配置"""
+    output_dir: str = 'data/news'            # 輸出檔案目錄
+    format: str = 'jsonl'                    # 輸出格式: jsonl / parquet / sqlite
+    compress: bool = True                    # jsonl 是否以 gzip 壓縮
+    rotate_max_bytes: int = 64 * 1024 * 1024  # jsonl 單一檔案的最大容量
+    parquet_compression: str = 'snappy'      # parquet 壓縮方式
+    sqlite_path: str = 'data/news/news.db'   # sqlite 資料庫檔案
+    buffer_max_items: int = 500              # 緩衝累積筆數達此值時寫出
+    buffer_max_seconds: float = 30.0         # 緩衝資料最長停留秒數
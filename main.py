@@ -9,6 +9,7 @@ from scrapers.first_layer.ettoday_crawler import ETtodayScraper
 from scrapers.second_layer.setn_second_crawler import SetnHTTPFetcher
 from utils.logging_config import setup_logging
 from utils.redis_client import RedisClient
+from sinks.factory import create_news_sink
 from celery_scraper.scraper_tasks import scrape_all
 import logging
 
@@ -57,9 +58,12 @@ async def second_main():
     manager.register_scraper(SETNScraper())
     # urls = await manager.scrape_all()
     urls = ['https://www.setn.com/News.aspx?NewsID=1581720']
-    for url in urls:
-        async with SetnHTTPFetcher() as fetcher:
-            news = await fetcher.fetch(url)
+    # 解析結果寫入輸出目的地(預設為 data/news 下的壓縮 JSONL)
+    async with create_news_sink() as sink:
+        for url in urls:
+            async with SetnHTTPFetcher() as fetcher:
+                news = await fetcher.fetch(url)
+            await sink.write(news)
             print(f"媒體: {news.media_name}")
             print(f"記者: {news.author}")
             print(f"地區: {news.coverage}")
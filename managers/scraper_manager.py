@@ -1,5 +1,6 @@
 from typing import List, Optional, Dict
 from scrapers.base import NewsSeleniumFetcher
+from scrapers.tab_scheduler import TabScheduler
 import logging
 import asyncio
 
@@ -18,14 +19,23 @@ class ScraperManager:
 
     async def scrape_all(
             self,
-            load_counts: Optional[Dict[str, int]] = None
+            load_counts: Optional[Dict[str, int]] = None,
+            shared_browser: bool = False
     ) -> List[str]:
         """
         執行所有註冊的爬蟲
         Args:
             load_counts: 各爬蟲的加載次數字典 {爬蟲名稱: 加載次數}
+            shared_browser: 是否以單一瀏覽器的多個分頁執行，減少記憶體用量
         """
         load_counts = load_counts or {}
+        if shared_browser:
+            async with TabScheduler(self.scrapers.values()) as scheduler:
+                results_by_name = await scheduler.run(load_counts)
+                report = await asyncio.to_thread(scheduler.memory_report)
+                logger.info(f"分頁記憶體用量: {report}")
+            return [url for urls in results_by_name.values() for url in urls]
+
         tasks = []
         # 創建每個爬蟲任務
         for name, scraper in self.scrapers.items():
@@ -1,7 +1,11 @@
+import sys
 from pydantic import BaseModel
 from typing import List
 from datetime import datetime
 
+# 重複率高的字串欄位，從儲存讀回大量新聞時共用同一個字串物件以節省記憶體
+INTERNED_FIELDS = ('media_name', 'author', 'coverage', 'category')
+
 
 class News(BaseModel):
     """通用新聞數據結構"""
@@ -15,6 +19,28 @@ class News(BaseModel):
     keywords: List[str]
     url: str
 
+    @classmethod
+    def trusted(cls, **data) -> 'News':
+        """
+        以已驗證過的資料建立新聞，略過 pydantic 驗證
+        只用於從自己的儲存或編碼讀回的資料，爬蟲解析結果仍應走一般建構
+        直接設定實例屬性，比 model_construct 少了預設值與額外欄位的處理
+        """
+        for field in INTERNED_FIELDS:
+            data[field] = sys.intern(data[field])
+        data['keywords'] = [sys.intern(keyword)
+                            for keyword in data['keywords']]
+        news = cls.__new__(cls)
+        object.__setattr__(news, '__dict__', data)
+        object.__setattr__(news, '__pydantic_fields_set__', _FIELDS_SET)
+        object.__setattr__(news, '__pydantic_extra__', None)
+        object.__setattr__(news, '__pydantic_private__', None)
+        return news
+
+
+# 所有欄位皆已設定，trusted 建立的實例共用同一個集合
+_FIELDS_SET = set(News.model_fields)
+
 
 # 不使用，只返回urls列表
 # class NewsURLs(BaseModel):
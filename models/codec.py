@@ -0,0 +1,19 @@
+from typing import List
+
+from models.article import News
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # 未安裝 orjson 時退回 pydantic 的 JSON 序列化
+    orjson = None
+
+
+def encode_jsonl(items: List[News]) -> bytes:
+    """將一批新聞編碼為 JSON Lines，欄位與 model_dump_json 相同"""
+    if orjson is not None:
+        # model_dump 不經過 pydantic 的 JSON 序列化，datetime 交給 orjson 處理
+        return b''.join(
+            orjson.dumps(item.model_dump(), option=orjson.OPT_APPEND_NEWLINE)
+            for item in items)
+    return ''.join(
+        item.model_dump_json() + '\n' for item in items).encode('utf-8')
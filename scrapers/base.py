@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Callable, Awaitable, Any
 import logging
 import asyncio
 import httpx
@@ -9,6 +9,7 @@ from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.common.exceptions import TimeoutException
 
@@ -16,27 +17,38 @@ from strategies.page_load import (
     PageLoadStrategy, ScrollLoadStrategy, PaginationLoadStrategy,
     ScrollPaginationLoadStrategy)
 from url_buliders.base import BaseURLBuilder
+from scrapers.chrome_profile import build_chrome_options, resolve_profile
 
 from models.article import News
 from utils.proxy_operations import ProxyOperations
-from config.crawler.config import HttpxFetcherConfig
+from utils.graceful_shutdown import shutdown
+from utils.metrics import metrics
+from utils.redis_sharding import get_site_domain
+from config.crawler.config import HttpxFetcherConfig, ChromeProfileConfig
 from config.region_config import (
     TAIWAN_REGION_MAPPING, INTERNATIONAL_REGIONS_MAPPING)
 logger = logging.getLogger(__name__)
 
+# fetch_urls 分段交出結果的回調: (新URLs, 已完成加載次數)
+UrlsCallback = Callable[[List[str], int], Awaitable[Any]]
+
 
 class NewsSeleniumFetcher(ABC):
     """新聞網站爬蟲(selenium)基類"""
 
+    # 子類覆寫的 Chrome 設定欄位，見 ChromeProfileConfig
+    chrome_overrides: Dict[str, Any] = {}
+
     def __init__(
         self,
         headless: bool = True,
         page_load_strategy: Optional[PageLoadStrategy] = None,
         url_builder: Optional[BaseURLBuilder] = None,
+        chrome_profile: Optional[ChromeProfileConfig] = None,
     ):
-        self.options = webdriver.ChromeOptions()
-        if headless:
-            self.options.add_argument('--headless')
+        self.chrome_profile = resolve_profile(
+            chrome_profile, self.chrome_overrides)
+        self.options = build_chrome_options(self.chrome_profile, headless)
 
         # 調用配置方法
         self._configure_options()
@@ -53,17 +65,21 @@ class NewsSeleniumFetcher(ABC):
         async with self._driver_lock:
             try:
                 if self.driver is None:
-                    # 添加請求頭
-                    self.options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')  # noqa
                     # 使用驅動實例開啟會話
-                    self.driver = await asyncio.to_thread(
-                        lambda: webdriver.Chrome(options=self.options)
-                    )
-                    self.wait = WebDriverWait(
-                        self.driver, timeout=10, poll_frequency=2)  # 設置輪詢時間為2秒
+                    with metrics.timer('driver_startup', self.get_name()):
+                        driver = await asyncio.to_thread(
+                            lambda: webdriver.Chrome(options=self.options)
+                        )
+                    self.attach_driver(driver)
             except Exception as e:
                 raise Exception(f"Driver 初始化失敗: {str(e)}")
 
+    def attach_driver(self, driver: RemoteWebDriver):
+        """使用外部提供的 driver (例如共用瀏覽器的分頁)，start_driver 不再另外啟動"""
+        self.driver = driver
+        self.wait = WebDriverWait(
+            driver, timeout=10, poll_frequency=2)  # 設置輪詢時間為2秒
+
     async def close_driver(self):
         async with self._driver_lock:
             if self.driver:
@@ -100,6 +116,13 @@ class NewsSeleniumFetcher(ABC):
         """提取單筆url"""
         pass
 
+    def get_feed_urls(self) -> List[str]:
+        """
+        返回網站的 RSS / sitemap 網址，子類可重寫
+        有 feed 的網站平時只讀取 feed，瀏覽器爬取只用於定期補爬
+        """
+        return []
+
     def get_url(
             self,
             page: Optional[int] = None
@@ -109,18 +132,48 @@ class NewsSeleniumFetcher(ABC):
             return self.url_builder.build_url(page=page)
         return self.get_base_url()  # 如果沒有URL構建器，返回基礎URL
 
+    def _page_for_load(self, load_index: int) -> int:
+        """分頁策略中第 load_index 次加載對應的頁碼"""
+        return load_index + 1 if load_index else load_index
+
+    async def _fast_forward(self, loads: int) -> int:
+        """
+        從檢查點續爬時跳過已完成的加載
+        分頁策略直接開啟對應頁面，滾動策略則重新滾動相同次數
+        返回實際跳過的加載次數
+        """
+        strategy = self.page_load_strategy
+        if isinstance(strategy, PaginationLoadStrategy):
+            return loads
+
+        skipped = 0
+        if isinstance(strategy, (ScrollLoadStrategy,
+                                 ScrollPaginationLoadStrategy)):
+            while skipped < loads and not shutdown.requested:
+                if not await strategy.load_more_content(
+                        self.driver, self.wait):
+                    break
+                skipped += 1
+        return skipped
+
     async def fetch_urls(
             self,
-            load_count: Optional[int] = None
+            load_count: Optional[int] = None,
+            on_urls: Optional[UrlsCallback] = None,
+            resume_from: int = 0
     ) -> List[str]:
         """
         異步獲取報導url
         Args:
             load_count: 加載次數（可選），如果不指定則使用 get_default_load_count 的值
+            on_urls: 每次加載後以 (新URLs, 已完成加載次數) 呼叫，
+                讓呼叫端分段保存結果與進度，中途停止時不會遺失已收集的URL
+            resume_from: 從檢查點續爬時已完成的加載次數
         """
         default_count = self.get_default_load_count()
         max_loads = load_count if load_count is not None else default_count
         all_urls: List[str] = []
+        seen = set()
         current_load = 0  # 當前加載次數計數器
         should_continue = True
 
@@ -133,24 +186,45 @@ class NewsSeleniumFetcher(ABC):
                 raise Exception("WebDriver 未正確初始化")
 
             # 2. 找到爬取網址
-            initial_url = self.get_url(page=current_load)
+            if resume_from and isinstance(
+                    self.page_load_strategy, PaginationLoadStrategy):
+                current_load = resume_from
+            initial_url = self.get_url(
+                page=self._page_for_load(current_load))
             logger.info(f'當前網址:{initial_url}')
-            await asyncio.to_thread(lambda: self.driver.get(initial_url))
+            with metrics.timer('page_load', self.get_name()):
+                await asyncio.to_thread(lambda: self.driver.get(initial_url))
+
+            if resume_from and current_load == 0:
+                current_load = await self._fast_forward(resume_from)
+            if current_load:
+                logger.info(
+                    f"{self.get_name()} 從檢查點續爬，跳過 {current_load} 次加載")
+            start_load = current_load
+
+            while (max_loads == -1 or current_load - start_load < max_loads):
+                # 收到關閉信號時停止，已收集的URL都已透過 on_urls 交出
+                if shutdown.requested:
+                    logger.warning(
+                        f"{self.get_name()} 收到關閉信號，停止於第 {current_load} 次加載")
+                    break
 
-            while (max_loads == -1 or current_load+1 <= max_loads):
                 logger.info(
                     f"爬取 {self.get_name()} - 載入頁數 {current_load + 1}")
 
                 # 3. 等待指定元素出現
                 try:
-                    url_elements = await asyncio.to_thread(
-                        lambda: self.wait.until(
-                            EC.presence_of_all_elements_located(
-                                self.get_url_elements_locator()
+                    with metrics.timer('element_wait', self.get_name()):
+                        url_elements = await asyncio.to_thread(
+                            lambda: self.wait.until(
+                                EC.presence_of_all_elements_located(
+                                    self.get_url_elements_locator()
+                                )
                             )
                         )
-                    )
                     logger.info(f'總共找到:{len(url_elements)}筆相關元素')
+                    metrics.count(
+                        'elements_found', self.get_name(), len(url_elements))
 
                 except TimeoutException:
                     logger.info(f"等待元素超時，已到達最後一頁，共載入 {current_load + 1} 頁")
@@ -160,60 +234,69 @@ class NewsSeleniumFetcher(ABC):
                     logger.error(f"頁面載入發生意外錯誤: {e}")
                     break
 
-                # 設置標誌，用於追蹤是否找到新報導
-                new_urls_found = False
-                for element in url_elements:
-                    try:
-                        # 提取單個報導元素
-                        url = self.extract_url(element)
-                        if url and url not in all_urls:
-                            all_urls.append(url)
-                            # 設置標誌為True，表示找到了新報導
-                            new_urls_found = True
-                    except Exception as e:
-                        logger.error(f"網站爬取失敗: {e}")
-                        continue
-
-                if not new_urls_found:
+                # 本次加載找到的新報導
+                new_urls: List[str] = []
+                with metrics.timer('extract', self.get_name()):
+                    for element in url_elements:
+                        try:
+                            # 提取單個報導元素
+                            url = self.extract_url(element)
+                            if url and url not in seen:
+                                seen.add(url)
+                                new_urls.append(url)
+                        except Exception as e:
+                            logger.error(f"網站爬取失敗: {e}")
+                            continue
+                metrics.count('urls_found', self.get_name(), len(new_urls))
+
+                if not new_urls:
                     logger.info("沒有找到新報導, 停止爬取該網頁...")
                     break
 
+                all_urls.extend(new_urls)
+                if on_urls:
+                    await on_urls(new_urls, current_load + 1)
+
                 if not should_continue:
                     logger.info("已經到達內容底部，不再加載更多...")
                     break
 
                 # 判斷頁面加載策略類型
-                if self.page_load_strategy:
-                    # 滾動頁面
-                    if isinstance(self.page_load_strategy, ScrollLoadStrategy):  # noqa
-                        logger.info("滾動加載策略...")
-                        if not await self.page_load_strategy.load_more_content(  # noqa
-                                self.driver, self.wait):
-                            logger.info("滾動到底部，沒有更多內容可加載...")
-                            should_continue = False
-
-                    # 分頁頁面
-                    elif isinstance(self.page_load_strategy, PaginationLoadStrategy):  # noqa:E501
-                        current_load += 1
-                        new_url = self.get_url(page=current_load+1)
-                        await asyncio.to_thread(
-                            lambda: self.driver.get(new_url))
-                        await asyncio.sleep(3)
-
-                    # 滾動點擊show more頁面
-                    elif isinstance(self.page_load_strategy, ScrollPaginationLoadStrategy):  # noqa:E501
-                        logger.info("滾動點擊show more加載策略...")
-                        if not await self.page_load_strategy.load_more_content(
-                                self.driver, self.wait):
-                            logger.info("滾動到底部，沒有更多內容可加載...")
-                            should_continue = False
-
+                with metrics.timer('load_more', self.get_name()):
+                    if self.page_load_strategy:
+                        # 滾動頁面
+                        if isinstance(self.page_load_strategy, ScrollLoadStrategy):  # noqa
+                            logger.info("滾動加載策略...")
+                            current_load += 1
+                            if not await self.page_load_strategy.load_more_content(  # noqa
+                                    self.driver, self.wait):
+                                logger.info("滾動到底部，沒有更多內容可加載...")
+                                should_continue = False
+
+                        # 分頁頁面
+                        elif isinstance(self.page_load_strategy, PaginationLoadStrategy):  # noqa:E501
+                            current_load += 1
+                            new_url = self.get_url(
+                                page=self._page_for_load(current_load))
+                            await asyncio.to_thread(
+                                lambda: self.driver.get(new_url))
+                            await asyncio.sleep(3)
+
+                        # 滾動點擊show more頁面
+                        elif isinstance(self.page_load_strategy, ScrollPaginationLoadStrategy):  # noqa:E501
+                            logger.info("滾動點擊show more加載策略...")
+                            current_load += 1
+                            if not await self.page_load_strategy.load_more_content(
+                                    self.driver, self.wait):
+                                logger.info("滾動到底部，沒有更多內容可加載...")
+                                should_continue = False
+
+                        else:
+                            logger.warning("未知的頁面加載策略類型")
+                            break
                     else:
-                        logger.warning("未知的頁面加載策略類型")
+                        logger.info("沒有設置頁面加載策略，僅爬取單頁")
                         break
-                else:
-                    logger.info("沒有設置頁面加載策略，僅爬取單頁")
-                    break
 
         except Exception as e:
             logger.error(f"錯誤| 爬取 {self.get_name()} 中發生錯誤: {str(e)}")
@@ -287,12 +370,14 @@ class NewsHTTPFetcher(ABC):
     async def fetch_with_retry(self, url: str) -> httpx.Response:
         """帶重試機制的請求"""
         await self._init_client()
+        site = get_site_domain(url)
 
         for attempt in range(self.config.retry_times):
             try:
                 # 使用代理池獲取代理
                 if self.config.use_proxy:
-                    proxy_info = await self.proxy_ops.get_proxy()
+                    with metrics.timer('proxy_lookup', site):
+                        proxy_info = await self.proxy_ops.get_proxy()
                     if proxy_info.get('proxy'):
                         self.client.proxies = {
                             'http://': f'http://{proxy_info["proxy"]}',
@@ -302,11 +387,14 @@ class NewsHTTPFetcher(ABC):
                 self.client.headers = self.get_random_headers()
 
                 # 執行請求
-                response = await self.client.get(url)
-                response.raise_for_status()
+                with metrics.timer('download', site):
+                    response = await self.client.get(url)
+                    response.raise_for_status()
+                metrics.count('bytes_downloaded', site, len(response.content))
                 return response
 
             except Exception as e:
+                metrics.count('download_retries', site)
                 if self.config.use_proxy and proxy_info.get('proxy'):
                     await self.proxy_ops.delete_proxy(proxy_info['proxy'])
 
@@ -320,17 +408,27 @@ class NewsHTTPFetcher(ABC):
         raise Exception(
             f"All {self.config.retry_times} retry attempts failed for URL: {url}")  # noqa
 
-    async def fetch(self, url: str) -> News:
-        """獲取並解析新聞"""
+    async def fetch_html(self, url: str) -> str:
+        """下載新聞網頁"""
         await self.random_delay()
         response = await self.fetch_with_retry(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return response.text
+
+    def parse(self, url: str, html: str) -> News:
+        """解析已下載的網頁"""
+        with metrics.timer('parse', get_site_domain(url)):
+            soup = BeautifulSoup(html, 'html.parser')
 
-        json_ld = self.parse_json_ld(soup)
-        metadata = self.parse_metadata(soup)
-        html_data = self.parse_html(soup)
+            json_ld = self.parse_json_ld(soup)
+            metadata = self.parse_metadata(soup)
+            html_data = self.parse_html(soup)
 
-        return self.transform_to_news(json_ld, metadata, html_data, url)
+            return self.transform_to_news(json_ld, metadata, html_data, url)
+
+    async def fetch(self, url: str) -> News:
+        """獲取並解析新聞"""
+        html = await self.fetch_html(url)
+        return self.parse(url, html)
 
     def _get_tw_coverage(self, description: str) -> str:
         """從描述中提取台灣地區"""
@@ -0,0 +1,190 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+import httpx
+
+from config.crawler.config import FeedConfig
+from utils.redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+
+def _local_name(tag: str) -> str:
+    """去除命名空間，例如 {http://www.w3.org/2005/Atom}entry -> entry"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _child_text(element: Element, name: str) -> Optional[str]:
+    for child in element:
+        if _local_name(child.tag) == name and child.text:
+            return child.text.strip()
+    return None
+
+
+class FeedParser:
+    """
+    串流解析 RSS / Atom / sitemap
+    邊下載邊解析，每個項目處理完即釋放，不需把整份文件載入記憶體
+    """
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=('end',))
+        self.urls: List[str] = []
+        self.sitemaps: List[str] = []  # sitemap index 中的子 sitemap
+
+    def feed(self, chunk: bytes):
+        self._parser.feed(chunk)
+        self._drain()
+
+    def close(self):
+        self._parser.close()
+        self._drain()
+
+    def _drain(self):
+        for _, element in self._parser.read_events():
+            name = _local_name(element.tag)
+            if name == 'item':              # RSS
+                url = _child_text(element, 'link') or \
+                    _child_text(element, 'guid')
+            elif name == 'entry':           # Atom
+                url = self._atom_link(element)
+            elif name == 'url':             # sitemap
+                url = _child_text(element, 'loc')
+            elif name == 'sitemap':         # sitemap index
+                loc = _child_text(element, 'loc')
+                if loc:
+                    self.sitemaps.append(loc)
+                element.clear()
+                continue
+            else:
+                continue
+
+            if url:
+                self.urls.append(url)
+            element.clear()
+
+    @staticmethod
+    def _atom_link(element: Element) -> Optional[str]:
+        for child in element:
+            if _local_name(child.tag) == 'link' and \
+                    child.get('rel', 'alternate') == 'alternate':
+                return child.get('href')
+        return None
+
+
+@dataclass
+class FeedResult:
+    """一次 feed 收集的結果"""
+    urls: List[str] = field(default_factory=list)
+    fetched: int = 0            # 有新內容的 feed 數
+    not_modified: int = 0       # 回應 304 的 feed 數
+    failed: int = 0             # 失敗的 feed 數
+
+    @property
+    def ok(self) -> bool:
+        return self.failed == 0
+
+
+class FeedDiscovery:
+    """
+    以 RSS / sitemap 收集新聞URL
+    - 以 ETag / Last-Modified 發送條件請求，feed 沒有更新時只需一次 304 往返
+    - 驗證資訊存放在 meta 分片的 feed:state hash
+    """
+
+    def __init__(
+            self,
+            redis_client: RedisClient,
+            config: Optional[FeedConfig] = None):
+        self.redis_client = redis_client
+        self.config = config or FeedConfig()
+
+    @property
+    def _state_key(self) -> str:
+        return self.redis_client.router.meta.key('feed:state')
+
+    async def _load_state(self, url: str) -> Dict[str, str]:
+        value = await self.redis_client.redis.hget(
+            self._state_key, url)  # type: ignore
+        return json.loads(value) if value else {}
+
+    async def _save_state(self, url: str, response: httpx.Response):
+        state = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        state = {key: value for key, value in state.items() if value}
+        if state:
+            await self.redis_client.redis.hset(  # type: ignore
+                self._state_key, url, json.dumps(state))
+
+    async def _fetch(self, client: httpx.AsyncClient, url: str,
+                     conditional: bool = True) -> Optional[FeedParser]:
+        """下載並解析 feed，內容未更新時返回None"""
+        headers = {}
+        if conditional:
+            state = await self._load_state(url)
+            if state.get('etag'):
+                headers['If-None-Match'] = state['etag']
+            if state.get('last_modified'):
+                headers['If-Modified-Since'] = state['last_modified']
+
+        parser = FeedParser()
+        async with client.stream('GET', url, headers=headers) as response:
+            if response.status_code == 304:
+                return None
+            response.raise_for_status()
+
+            received = 0
+            truncated = False
+            async for chunk in response.aiter_bytes():
+                parser.feed(chunk)
+                received += len(chunk)
+                if received > self.config.max_bytes:
+                    logger.warning(f"{url} 超過 {self.config.max_bytes} 位元組，停止讀取")
+                    truncated = True
+                    break
+            else:
+                parser.close()
+
+        # 只讀取部分內容時不保存驗證資訊，否則之後的 304 會讓未讀到的URL永遠遺漏
+        if conditional and not truncated:
+            await self._save_state(url, response)
+        return parser
+
+    async def discover(self, feed_urls: List[str]) -> FeedResult:
+        """收集所有 feed 中的新聞URL"""
+        result = FeedResult()
+        async with httpx.AsyncClient(
+                timeout=self.config.timeout,
+                follow_redirects=True,
+                headers={'User-Agent': 'Mozilla/5.0 (compatible; NewsScraper)',
+                         'Accept': 'application/rss+xml, application/xml, text/xml'}  # noqa
+        ) as client:
+            for feed_url in feed_urls:
+                try:
+                    parser = await self._fetch(client, feed_url)
+                    if parser is None:
+                        result.not_modified += 1
+                        continue
+
+                    result.fetched += 1
+                    result.urls.extend(parser.urls)
+                    # sitemap index 只展開前幾個(通常是最新的)子 sitemap
+                    for sitemap in \
+                            parser.sitemaps[:self.config.max_child_sitemaps]:
+                        child = await self._fetch(
+                            client, sitemap, conditional=False)
+                        if child:
+                            result.urls.extend(child.urls)
+                except (httpx.HTTPError, ParseError) as e:
+                    logger.warning(f"讀取 feed {feed_url} 失敗: {str(e)}")
+                    result.failed += 1
+
+        logger.info(
+            f"feed 收集完成: {len(result.urls)} 筆, 更新 {result.fetched}, "
+            f"未變更 {result.not_modified}, 失敗 {result.failed}")
+        return result
@@ -1,5 +1,5 @@
 import logging
-from typing import Optional
+from typing import Optional, List
 from selenium.webdriver.common.by import By
 
 from scrapers.base import NewsSeleniumFetcher
@@ -29,6 +29,9 @@ class ETtodayScraper(NewsSeleniumFetcher):
     def get_default_load_count(self) -> int:
         return -1
 
+    def get_feed_urls(self) -> List[str]:
+        return ["https://feeds.feedburner.com/ettoday/realtime"]
+
     def get_url_elements_locator(self) -> tuple:
         return (By.CSS_SELECTOR, ".part_list_2 a")
 
@@ -1,5 +1,5 @@
 import logging
-from typing import Optional
+from typing import Optional, List
 from selenium.webdriver.common.by import By
 
 from scrapers.base import NewsSeleniumFetcher
@@ -30,6 +30,9 @@ class ITNScraper(NewsSeleniumFetcher):
     def get_default_load_count(self) -> int:
         return -1
 
+    def get_feed_urls(self) -> List[str]:
+        return ["https://news.ltn.com.tw/rss/all.xml"]
+
     def get_url_elements_locator(self) -> tuple:
         return (By.CSS_SELECTOR, ".tit")
 
@@ -0,0 +1,51 @@
+from functools import lru_cache
+from typing import Dict, List, Optional, Type
+
+from scrapers.base import NewsSeleniumFetcher, NewsHTTPFetcher
+from scrapers.first_layer.setn_crawler import SETNScraper
+from scrapers.first_layer.cna_crawler import CNAScraper
+from scrapers.first_layer.mnews_crawler import MNEWSScraper
+from scrapers.first_layer.itn_crawler import ITNScraper
+from scrapers.first_layer.tvbs_crawler import TVBSScraper
+from scrapers.first_layer.ettoday_crawler import ETtodayScraper
+from scrapers.second_layer.setn_second_crawler import SetnHTTPFetcher
+from utils.redis_sharding import get_site_domain
+
+# 第一層爬蟲(URL收集)
+FIRST_LAYER_SCRAPERS: List[Type[NewsSeleniumFetcher]] = [
+    SETNScraper,
+    CNAScraper,
+    MNEWSScraper,
+    ITNScraper,
+    TVBSScraper,
+    ETtodayScraper,
+]
+
+# 第二層爬蟲(內容解析)，以網站主網域對應
+SECOND_LAYER_FETCHERS: Dict[str, Type[NewsHTTPFetcher]] = {
+    'setn.com': SetnHTTPFetcher,
+}
+
+
+@lru_cache(maxsize=1)
+def _scrapers_by_name() -> Dict[str, Type[NewsSeleniumFetcher]]:
+    # get_name 為實例方法，需要實例化一次才能得到名稱
+    return {cls().get_name(): cls for cls in FIRST_LAYER_SCRAPERS}
+
+
+def get_scraper_names() -> List[str]:
+    """返回所有第一層爬蟲的網站名稱"""
+    return list(_scrapers_by_name())
+
+
+def create_scraper(name: str) -> NewsSeleniumFetcher:
+    """依網站名稱創建第一層爬蟲"""
+    try:
+        return _scrapers_by_name()[name]()
+    except KeyError:
+        raise ValueError(f"找不到爬蟲: {name}")
+
+
+def get_fetcher_class(url: str) -> Optional[Type[NewsHTTPFetcher]]:
+    """返回可處理此URL的第二層爬蟲類別，尚未支援的網站返回None"""
+    return SECOND_LAYER_FETCHERS.get(get_site_domain(url))
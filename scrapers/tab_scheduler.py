@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from selenium import webdriver
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+from config.crawler.config import ChromeProfileConfig
+from scrapers.base import NewsSeleniumFetcher, UrlsCallback
+from scrapers.chrome_profile import build_chrome_options
+from utils.process_memory import tree_memory_mb
+
+logger = logging.getLogger(__name__)
+
+# Performance.getMetrics 中用於記憶體報告的指標
+MEMORY_METRICS = ('JSHeapUsedSize', 'JSHeapTotalSize', 'Nodes', 'Documents')
+
+# 同時只有一個分頁在前景，避免背景分頁的計時器與渲染被降速
+BACKGROUND_ARGUMENTS = [
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+]
+
+
+class TabDriver(RemoteWebDriver):
+    """
+    共用瀏覽器中單一分頁的 WebDriver
+    與瀏覽器共用連線與會話，每個指令在排程器的鎖保護下先切換到此分頁再執行；
+    找到的元素以此物件為 parent，元素上的操作同樣會切換分頁，
+    因此爬蟲與加載策略可以像使用獨立的 driver 一樣使用
+    """
+
+    def __init__(self, scheduler: 'TabScheduler', handle: str, site_name: str):
+        # 不建立新的會話，沿用瀏覽器的連線狀態
+        self.__dict__.update(scheduler.browser.__dict__)
+        self._scheduler = scheduler
+        self.handle = handle
+        self.site_name = site_name
+
+    def execute(self, driver_command, params=None):
+        with self._scheduler.activate(self.handle):
+            return super().execute(driver_command, params)
+
+    def memory_usage(self) -> Dict[str, float]:
+        """分頁的 JS heap 與 DOM 用量"""
+        result = self.execute('executeCdpCommand', {
+            'cmd': 'Performance.getMetrics', 'params': {}})['value']
+        metrics = {metric['name']: metric['value']
+                   for metric in result.get('metrics', [])}
+        return {name: metrics[name] for name in MEMORY_METRICS
+                if name in metrics}
+
+    def quit(self):
+        """爬蟲結束時只關閉自己的分頁，瀏覽器由排程器關閉"""
+        self._scheduler.close_tab(self)
+
+
+class TabScheduler:
+    """
+    在單一 Chrome 中以分頁同時執行多個第一層爬蟲
+    每個爬蟲有自己的分頁與 TabDriver，fetch_urls 照常執行：
+    滾動等待、元素等待期間不佔用瀏覽器，其他分頁的指令可以插入執行，
+    各爬蟲的 page_load_strategy 不需修改
+    ChromeOptions 為整個瀏覽器共用，爬蟲的 chrome_overrides 不會套用
+    目前由 ScraperManager(shared_browser=True) 與壓力測試使用；Celery 的
+    discover_site 每個任務只爬一個網站並持有該網站的租約，browser worker 不使用分頁排程
+    """
+
+    def __init__(
+            self,
+            scrapers: Iterable[NewsSeleniumFetcher],
+            profile: Optional[ChromeProfileConfig] = None,
+            headless: bool = True):
+        self.scrapers = list(scrapers)
+        profile = profile or ChromeProfileConfig()
+        self.profile = profile.model_copy(update={'extra_arguments': [
+            *profile.extra_arguments, *BACKGROUND_ARGUMENTS]})
+        self.headless = headless
+        self.browser: Optional[webdriver.Chrome] = None
+        # 分頁切換與指令執行必須是同一個原子操作
+        self._lock = threading.RLock()
+        self._current: Optional[str] = None
+        self._home: Optional[str] = None
+        self.tabs: Dict[str, TabDriver] = {}
+        self.tab_memory: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def activate(self, handle: str):
+        """取得瀏覽器並切換到指定分頁"""
+        with self._lock:
+            if self._current != handle:
+                self.browser.switch_to.window(handle)
+                self._current = handle
+            yield
+
+    def _open(self):
+        self.browser = webdriver.Chrome(
+            options=build_chrome_options(self.profile, self.headless))
+        # 保留一個空白分頁，爬蟲分頁關閉時瀏覽器不會跟著結束
+        self._home = self._current = self.browser.current_window_handle
+        for scraper in self.scrapers:
+            self.browser.switch_to.new_window('tab')
+            handle = self.browser.current_window_handle
+            self._current = handle
+            tab = TabDriver(self, handle, scraper.get_name())
+            self.tabs[tab.site_name] = tab
+            scraper.attach_driver(tab)
+
+    def close_tab(self, tab: TabDriver):
+        with self._lock:
+            if self.tabs.pop(tab.site_name, None) is None:
+                return
+            try:
+                # 關閉前記錄分頁用量，作為每個網站的記憶體報告
+                self.tab_memory[tab.site_name] = tab.memory_usage()
+                with self.activate(tab.handle):
+                    self.browser.close()
+            except Exception as e:
+                logger.warning(f"關閉 {tab.site_name} 分頁失敗: {e}")
+            self._current = None
+
+    def browser_memory_mb(self) -> float:
+        """整個瀏覽器(chromedriver + Chrome 行程)的記憶體用量"""
+        return tree_memory_mb(self.browser.service.process.pid)
+
+    def memory_report(self) -> Dict[str, Any]:
+        """
+        各分頁的 JS heap / DOM 用量與瀏覽器總用量
+        已結束的爬蟲使用關閉分頁前的數值
+        """
+        with self._lock:
+            tabs = dict(self.tab_memory)
+            for name, tab in list(self.tabs.items()):
+                tabs[name] = tab.memory_usage()
+            total = self.browser_memory_mb() if self.browser else 0.0
+        sites = len(self.scrapers) or 1
+        return {'tabs': tabs, 'browser_mb': total,
+                'browser_mb_per_site': total / sites}
+
+    def _close(self):
+        for tab in list(self.tabs.values()):
+            self.close_tab(tab)
+        if self.browser:
+            self.browser.quit()
+            self.browser = None
+
+    async def __aenter__(self):
+        try:
+            await asyncio.to_thread(self._open)
+        except BaseException:
+            # 開啟分頁中途失敗時關閉已啟動的瀏覽器
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.to_thread(self._close)
+        for scraper in self.scrapers:
+            scraper.driver = None
+            scraper.wait = None
+
+    async def run(
+            self,
+            load_counts: Optional[Dict[str, Optional[int]]] = None,
+            on_urls: Optional[Dict[str, UrlsCallback]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        同時執行所有爬蟲，返回 {網站名稱: URLs}
+        失敗的爬蟲記錄錯誤並返回空列表，不影響其他分頁
+        """
+        load_counts = load_counts or {}
+        on_urls = on_urls or {}
+        names = [scraper.get_name() for scraper in self.scrapers]
+        results = await asyncio.gather(
+            *[scraper.fetch_urls(load_count=load_counts.get(name),
+                                 on_urls=on_urls.get(name))
+              for name, scraper in zip(names, self.scrapers)],
+            return_exceptions=True)
+
+        urls: Dict[str, List[str]] = {}
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                logger.error(f"爬取 {name} 時發生錯誤: {result}")
+                result = []
+            urls[name] = result
+        return urls
@@ -0,0 +1,31 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+from models.article import News
+
+
+class NewsSink(ABC):
+    """新聞輸出目的地的抽象基類，以批次為單位寫入"""
+
+    @abstractmethod
+    async def write_many(self, items: List[News]) -> int:
+        """批量寫入新聞，返回寫入的筆數"""
+        pass
+
+    async def write(self, item: News) -> int:
+        """寫入單筆新聞"""
+        return await self.write_many([item])
+
+    async def flush(self):
+        """將緩衝資料寫出"""
+        pass
+
+    async def close(self):
+        """清理資源"""
+        await self.flush()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
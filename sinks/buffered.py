@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from models.article import News
+from sinks.base import NewsSink
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedNewsSink(NewsSink):
+    """
+    緩衝寫入的包裝器
+    新聞先暫存在記憶體，累積到 max_items 筆或距離上次寫出超過 max_seconds 秒時，
+    才以一個批次交給內層的輸出目的地
+    """
+
+    def __init__(self, inner: NewsSink, max_items: int = 500,
+                 max_seconds: float = 30.0):
+        self.inner = inner
+        self.max_items = max_items
+        self.max_seconds = max_seconds
+        self._buffer: List[News] = []
+        self._last_flush = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._timer: Optional[asyncio.Task] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # 延遲創建，確保鎖綁定實際使用的事件循環
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _ensure_timer(self):
+        """啟動定時寫出的背景任務，避免流量低時資料長時間停留在緩衝區"""
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.max_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"定時寫出新聞失敗: {str(e)}")
+
+    async def write_many(self, items: List[News]) -> int:
+        if not items:
+            return 0
+        self._ensure_timer()
+        async with self._get_lock():
+            self._buffer.extend(items)
+            due = (len(self._buffer) >= self.max_items or
+                   time.monotonic() - self._last_flush >= self.max_seconds)
+        if due:
+            await self.flush()
+        return len(items)
+
+    async def flush(self):
+        async with self._get_lock():
+            items, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            if not items:
+                return
+            try:
+                await self.inner.write_many(items)
+            except Exception:
+                # 寫出失敗時放回緩衝區，等待下次重試
+                self._buffer[:0] = items
+                raise
+        await self.inner.flush()
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            await asyncio.gather(self._timer, return_exceptions=True)
+            self._timer = None
+        await self.flush()
+        await self.inner.close()
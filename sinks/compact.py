@@ -0,0 +1,90 @@
+"""
+將 Celery 任務寫出的 JSONL 合併為 Parquet
+
+    python -m sinks.compact --min-age 300
+
+worker 每個任務寫出一小批新聞，直接寫 Parquet 會產生大量小檔，
+因此任務先寫入 JSONL，再由本工具定期以大批次轉換為依日期與媒體分區的 Parquet
+"""
+import argparse
+import asyncio
+import gzip
+import logging
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from config.storage.config import NewsSinkConfig
+from models.article import News
+from sinks.parquet_sink import ParquetNewsSink
+
+logger = logging.getLogger(__name__)
+
+# 轉換中的檔案後綴，中途失敗時下次執行會重新處理
+COMPACTING_SUFFIX = '.compacting'
+
+
+def _read_news(path: Path) -> Iterator[News]:
+    opener = gzip.open if '.jsonl.gz' in path.name else open
+    with opener(path, 'rt', encoding='utf-8') as f:  # type: ignore
+        for line in f:
+            if line.strip():
+                yield News.model_validate_json(line)
+
+
+def _claim(input_dir: Path, prefix: str, min_age: float) -> List[Path]:
+    """
+    取得可轉換的檔案並改名，避免 worker 繼續附加
+    worker 每次寫入都重新以檔名開檔，改名後的寫入會建立新檔，留待下次轉換
+    """
+    claimed = sorted(input_dir.glob(f"{prefix}-*{COMPACTING_SUFFIX}"))
+    cutoff = time.time() - min_age
+    for path in sorted(input_dir.glob(f"{prefix}-*.jsonl*")):
+        if path.name.endswith(COMPACTING_SUFFIX) or \
+                path.stat().st_mtime > cutoff:
+            continue
+        target = path.with_name(path.name + COMPACTING_SUFFIX)
+        path.rename(target)
+        claimed.append(target)
+    return claimed
+
+
+async def compact(config: Optional[NewsSinkConfig] = None,
+                  min_age: float = 300.0, batch_size: int = 50000,
+                  prefix: str = 'news') -> int:
+    """
+    將超過 min_age 秒未寫入的 JSONL 檔轉為 Parquet 並刪除，返回轉換的新聞數
+    同一檔案中途失敗時重新轉換，Parquet 中可能出現重複新聞(至少一次)
+    """
+    config = config or NewsSinkConfig()
+    sink = ParquetNewsSink(
+        str(Path(config.output_dir) / 'parquet'),
+        compression=config.parquet_compression)
+    total = 0
+    for path in _claim(Path(config.output_dir), prefix, min_age):
+        batch: List[News] = []
+        for news in _read_news(path):
+            batch.append(news)
+            if len(batch) >= batch_size:
+                total += await sink.write_many(batch)
+                batch = []
+        total += await sink.write_many(batch)
+        path.unlink()
+        logger.info(f"已轉換 {path.name}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='將 JSONL 新聞合併為 Parquet')
+    parser.add_argument('--min-age', type=float, default=300.0,
+                        help='只轉換超過此秒數未寫入的檔案')
+    parser.add_argument('--batch-size', type=int, default=50000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    count = asyncio.run(compact(min_age=args.min_age,
+                                batch_size=args.batch_size))
+    print(f"已轉換 {count} 則新聞")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+from pathlib import Path
+from typing import Optional
+
+from config.storage.config import NewsSinkConfig
+from sinks.base import NewsSink
+from sinks.buffered import BufferedNewsSink
+from sinks.jsonl_sink import RotatingJsonlNewsSink
+
+
+def create_news_sink(config: Optional[NewsSinkConfig] = None,
+                     buffered: bool = True) -> NewsSink:
+    """
+    根據配置創建新聞輸出目的地
+    buffered 時外層包上依筆數或時間寫出的緩衝，呼叫端需在寫出後才能視為已保存
+    """
+    config = config or NewsSinkConfig()
+    if config.format == 'jsonl':
+        sink: NewsSink = RotatingJsonlNewsSink(
+            config.output_dir,
+            compress=config.compress,
+            max_bytes=config.rotate_max_bytes)
+    elif config.format == 'parquet':
+        # pandas 較重，只在使用 parquet 時載入
+        from sinks.parquet_sink import ParquetNewsSink
+        sink = ParquetNewsSink(
+            str(Path(config.output_dir) / 'parquet'),
+            compression=config.parquet_compression)
+    elif config.format == 'sqlite':
+        from sinks.sqlite_store import SqliteNewsStore
+        sink = SqliteNewsStore(config.sqlite_path)
+    else:
+        raise ValueError(f"不支援的新聞輸出格式: {config.format}")
+
+    if not buffered:
+        return sink
+    return BufferedNewsSink(
+        sink,
+        max_items=config.buffer_max_items,
+        max_seconds=config.buffer_max_seconds)
+
+
+def create_worker_news_sink(config: Optional[NewsSinkConfig] = None
+                            ) -> NewsSink:
+    """
+    Celery 任務使用的輸出目的地
+    任務在新聞寫出後才標記URL完成，因此不經過緩衝，每批直接寫出；
+    parquet 每批會產生新的小檔，改為寫入 JSONL，再以 sinks.compact 離線轉換
+    """
+    config = config or NewsSinkConfig()
+    if config.format == 'parquet':
+        config = config.model_copy(update={'format': 'jsonl'})
+    return create_news_sink(config, buffered=False)
@@ -0,0 +1,95 @@
+import asyncio
+import gzip
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from models.article import News
+from models.codec import encode_jsonl
+from sinks.base import NewsSink
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlNewsSink(NewsSink):
+    """將新聞以 JSON Lines 格式追加寫入檔案，每個批次只開檔寫入一次"""
+
+    def __init__(self, path: str = 'data/news/news.jsonl'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _write_sync(self, data: bytes):
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                f.write(data)
+
+    async def write_many(self, items: List[News]) -> int:
+        if not items:
+            return 0
+        await asyncio.to_thread(self._write_sync, encode_jsonl(items))
+        return len(items)
+
+
+class RotatingJsonlNewsSink(NewsSink):
+    """
+    可輪替、可壓縮的 JSON Lines 輸出
+    檔名為 {prefix}-{日期}-{行程}-{序號}.jsonl[.gz]，
+    檔案超過 max_bytes 或日期改變時換新檔，每個行程寫自己的檔案以免交錯
+    gzip 模式下每個批次寫成一個 gzip member，gzip.open 可直接連續讀取
+    """
+
+    def __init__(self, output_dir: str = 'data/news', prefix: str = 'news',
+                 compress: bool = True, max_bytes: int = 64 * 1024 * 1024,
+                 compression_level: int = 6):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._path: Optional[Path] = None
+        self._day: Optional[str] = None
+        self._seq = 0
+
+    @property
+    def current_path(self) -> Optional[Path]:
+        return self._path
+
+    def _next_path(self) -> Path:
+        day = time.strftime('%Y%m%d')
+        if day != self._day:
+            self._day, self._seq = day, 0
+        suffix = '.jsonl.gz' if self.compress else '.jsonl'
+        while True:
+            self._seq += 1
+            path = self.output_dir / (
+                f"{self.prefix}-{day}-{os.getpid()}-{self._seq:04d}{suffix}")
+            if not path.exists():
+                return path
+
+    def _should_rotate(self) -> bool:
+        if self._path is None or self._day != time.strftime('%Y%m%d'):
+            return True
+        return self._path.exists() and \
+            self._path.stat().st_size >= self.max_bytes
+
+    def _write_sync(self, data: bytes):
+        with self._lock:
+            if self._should_rotate():
+                self._path = self._next_path()
+                logger.info(f"新聞輸出檔案: {self._path}")
+            if self.compress:
+                data = gzip.compress(data, self.compression_level)
+            with open(self._path, 'ab') as f:  # type: ignore
+                f.write(data)
+
+    async def write_many(self, items: List[News]) -> int:
+        if not items:
+            return 0
+        await asyncio.to_thread(self._write_sync, encode_jsonl(items))
+        return len(items)
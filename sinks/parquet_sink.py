@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+from models.article import News
+from sinks.base import NewsSink
+
+logger = logging.getLogger(__name__)
+
+# 新聞網站的發布時間多為不帶時區的台灣時間
+LOCAL_TZ = 'Asia/Taipei'
+
+
+class ParquetNewsSink(NewsSink):
+    """
+    以 Parquet 欄式格式輸出新聞
+    依發布日期(台灣時間)與媒體分區: {output_dir}/date=YYYY-MM-DD/media={媒體}/part-*.parquet，
+    分析端可直接以 pandas.read_parquet 或其他 Hive 分區相容工具讀取
+    每個批次在各分區寫成一個新檔案，建議搭配 BufferedNewsSink 以避免產生大量小檔；
+    Celery 任務的小批次先寫入 JSONL，再以 sinks.compact 離線轉換
+    """
+
+    def __init__(self, output_dir: str = 'data/news/parquet',
+                 compression: str = 'snappy'):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _partition_value(value: str) -> str:
+        """分區目錄名稱不可包含路徑分隔符"""
+        return value.replace('/', '_').replace(os.sep, '_') or 'unknown'
+
+    @staticmethod
+    def _localize(value) -> pd.Timestamp:
+        """不帶時區的時間視為台灣時間，帶時區的轉為台灣時間"""
+        value = pd.Timestamp(value)
+        if value.tzinfo is None:
+            return value.tz_localize(LOCAL_TZ)
+        return value.tz_convert(LOCAL_TZ)
+
+    def _to_frame(self, items: List[News]) -> pd.DataFrame:
+        df = pd.DataFrame([item.model_dump() for item in items])
+        df['publish_date'] = pd.to_datetime(
+            [self._localize(value) for value in df['publish_date']])
+        df['date'] = df['publish_date'].dt.strftime('%Y-%m-%d')
+        return df
+
+    def _write_sync(self, items: List[News]):
+        df = self._to_frame(items)
+        stamp = time.strftime('%Y%m%d%H%M%S')
+        with self._lock:
+            for (date, media), part in df.groupby(
+                    ['date', 'media_name'], sort=False):
+                directory = self.output_dir / f"date={date}" / \
+                    f"media={self._partition_value(media)}"
+                directory.mkdir(parents=True, exist_ok=True)
+                path = directory / f"part-{stamp}-{uuid.uuid4().hex[:8]}.parquet"
+                # date 只用於分區，已表現在路徑中，不重複存放
+                part.drop(columns=['date']).to_parquet(
+                    path, compression=self.compression, index=False)
+
+    async def write_many(self, items: List[News]) -> int:
+        if not items:
+            return 0
+        await asyncio.to_thread(self._write_sync, items)
+        return len(items)
@@ -0,0 +1,280 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.article import News
+from sinks.base import NewsSink
+from utils.url_canonicalizer import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# 新聞時間統一以台灣時間(不含時區)儲存，字串排序即時間順序
+LOCAL_TZ = timezone(timedelta(hours=8))
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# trigram 分詞少於3個字無法使用索引，改以 LIKE 掃描
+MIN_FTS_TERM_LENGTH = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    source_url TEXT NOT NULL,
+    media_name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    coverage TEXT NOT NULL,
+    publish_date TEXT NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL,
+    keywords TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_news_publish_date ON news(publish_date);
+CREATE INDEX IF NOT EXISTS idx_news_media_date ON news(media_name, publish_date);
+CREATE INDEX IF NOT EXISTS idx_news_category_date ON news(category, publish_date);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+    title, description, keywords,
+    content='news', content_rowid='id', tokenize='{tokenizer}'
+);
+
+CREATE TRIGGER IF NOT EXISTS news_ai AFTER INSERT ON news BEGIN
+    INSERT INTO news_fts(rowid, title, description, keywords)
+    VALUES (new.id, new.title, new.description, new.keywords);
+END;
+CREATE TRIGGER IF NOT EXISTS news_ad AFTER DELETE ON news BEGIN
+    INSERT INTO news_fts(news_fts, rowid, title, description, keywords)
+    VALUES ('delete', old.id, old.title, old.description, old.keywords);
+END;
+CREATE TRIGGER IF NOT EXISTS news_au AFTER UPDATE ON news BEGIN
+    INSERT INTO news_fts(news_fts, rowid, title, description, keywords)
+    VALUES ('delete', old.id, old.title, old.description, old.keywords);
+    INSERT INTO news_fts(rowid, title, description, keywords)
+    VALUES (new.id, new.title, new.description, new.keywords);
+END;
+"""
+
+UPSERT = """
+INSERT INTO news (url, source_url, media_name, title, author, coverage,
+                  publish_date, category, description, keywords, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(url) DO UPDATE SET
+    source_url = excluded.source_url,
+    media_name = excluded.media_name,
+    title = excluded.title,
+    author = excluded.author,
+    coverage = excluded.coverage,
+    publish_date = excluded.publish_date,
+    category = excluded.category,
+    description = excluded.description,
+    keywords = excluded.keywords,
+    updated_at = excluded.updated_at
+"""
+
+COLUMNS = ('source_url, media_name, title, author, coverage, publish_date, '
+           'category, description, keywords')
+
+
+def format_date(value: datetime) -> str:
+    """帶時區的時間轉為台灣時間，不帶時區的視為台灣時間"""
+    if value.tzinfo is not None:
+        value = value.astimezone(LOCAL_TZ).replace(tzinfo=None)
+    return value.strftime(DATE_FORMAT)
+
+
+class SqliteNewsStore(NewsSink):
+    """
+    以 SQLite 儲存新聞，可依媒體、分類、地區、日期與關鍵字查詢
+    - WAL 模式，寫入時其他行程仍可讀取
+    - 以正規化後的URL為唯一鍵批量 upsert，重複爬取只會更新內容
+    - publish_date / media_name / category 建立索引，
+      title / description / keywords 建立 FTS5 全文索引
+    """
+
+    def __init__(self, path: str = 'data/news/news.db'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self.tokenizer = self._select_tokenizer()
+        self._initialize()
+
+    def _select_tokenizer(self) -> str:
+        """中文沒有空白分詞，優先使用 trigram (SQLite 3.34+)"""
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE temp.tokenizer_probe "
+                "USING fts5(x, tokenize='trigram')")
+            self._conn.execute("DROP TABLE temp.tokenizer_probe")
+            return 'trigram'
+        except sqlite3.OperationalError:
+            logger.warning("SQLite 不支援 trigram 分詞，全文檢索改用 unicode61")
+            return 'unicode61'
+
+    def _initialize(self):
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn.executescript(
+                SCHEMA.replace('{tokenizer}', self.tokenizer))
+
+    # ---- 寫入 ----
+
+    def _row(self, item: News, now: float) -> Tuple[Any, ...]:
+        return (
+            canonicalize_url(item.url), item.url, item.media_name, item.title,
+            item.author, item.coverage, format_date(item.publish_date),
+            item.category, item.description,
+            json.dumps(item.keywords, ensure_ascii=False), now)
+
+    def upsert_many_sync(self, items: List[News]) -> int:
+        """在單一交易中批量 upsert"""
+        now = time.time()
+        rows = [self._row(item, now) for item in items]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(UPSERT, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    async def write_many(self, items: List[News]) -> int:
+        if not items:
+            return 0
+        return await asyncio.to_thread(self.upsert_many_sync, items)
+
+    # ---- 查詢 ----
+
+    def _text_condition(self, text: str) -> Tuple[str, List[Any]]:
+        """全文檢索條件，多個詞以空白分隔，須全部符合"""
+        terms = [term for term in text.split() if term]
+        if self.tokenizer == 'trigram' and \
+                all(len(term) >= MIN_FTS_TERM_LENGTH for term in terms):
+            match = ' '.join(
+                '"' + term.replace('"', '""') + '"' for term in terms)
+            return ("id IN (SELECT rowid FROM news_fts "
+                    "WHERE news_fts MATCH ?)", [match])
+
+        clauses, params = [], []
+        for term in terms:
+            pattern = f"%{term}%"
+            clauses.append(
+                "(title LIKE ? OR description LIKE ? OR keywords LIKE ?)")
+            params.extend([pattern] * 3)
+        return ' AND '.join(clauses), params
+
+    def _where(self, media_name: Optional[str] = None,
+               category: Optional[str] = None,
+               coverage: Optional[str] = None,
+               since: Optional[datetime] = None,
+               until: Optional[datetime] = None,
+               text: Optional[str] = None) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, value in (('media_name', media_name),
+                              ('category', category),
+                              ('coverage', coverage)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("publish_date >= ?")
+            params.append(format_date(since))
+        if until is not None:
+            clauses.append("publish_date < ?")
+            params.append(format_date(until))
+        if text and text.strip():
+            clause, text_params = self._text_condition(text)
+            clauses.append(clause)
+            params.extend(text_params)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return where, params
+
+    @staticmethod
+    def _to_news(row: sqlite3.Row) -> News:
+        # 寫入前已驗證過，讀回時略過驗證
+        return News.trusted(
+            media_name=row['media_name'],
+            title=row['title'],
+            author=row['author'],
+            coverage=row['coverage'],
+            publish_date=datetime.strptime(row['publish_date'], DATE_FORMAT),
+            category=row['category'],
+            description=row['description'],
+            keywords=json.loads(row['keywords']),
+            url=row['source_url'],
+        )
+
+    def query_sync(self, limit: int = 100, offset: int = 0,
+                   **filters: Any) -> List[News]:
+        where, params = self._where(**filters)
+        sql = (f"SELECT {COLUMNS} FROM news {where} "
+               f"ORDER BY publish_date DESC LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self._conn.execute(sql, [*params, limit, offset]).fetchall()
+        return [self._to_news(row) for row in rows]
+
+    async def query(self, limit: int = 100, offset: int = 0,
+                    **filters: Any) -> List[News]:
+        """
+        查詢新聞，依發布時間新到舊排序
+        Args:
+            media_name / category / coverage: 完全符合的欄位值
+            since / until: 發布時間範圍 [since, until)
+            text: 標題、摘要、關鍵字的全文檢索
+        """
+        return await asyncio.to_thread(
+            self.query_sync, limit, offset, **filters)
+
+    def count_sync(self, **filters: Any) -> int:
+        where, params = self._where(**filters)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT COUNT(*) FROM news {where}", params).fetchone()
+        return row[0]
+
+    async def count(self, **filters: Any) -> int:
+        """符合條件的新聞筆數，條件同 query"""
+        return await asyncio.to_thread(self.count_sync, **filters)
+
+    async def get(self, url: str) -> Optional[News]:
+        """以URL獲取單筆新聞"""
+        def _get():
+            with self._lock:
+                row = self._conn.execute(
+                    f"SELECT {COLUMNS} FROM news WHERE url = ?",
+                    (canonicalize_url(url),)).fetchone()
+            return self._to_news(row) if row else None
+        return await asyncio.to_thread(_get)
+
+    async def media_counts(self) -> Dict[str, int]:
+        """各媒體的新聞筆數"""
+        def _counts():
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT media_name, COUNT(*) FROM news "
+                    "GROUP BY media_name").fetchall()
+            return {row[0]: row[1] for row in rows}
+        return await asyncio.to_thread(_counts)
+
+    async def close(self):
+        def _close():
+            with self._lock:
+                # 關閉前更新查詢規劃統計
+                self._conn.execute("PRAGMA optimize")
+                self._conn.close()
+        await asyncio.to_thread(_close)
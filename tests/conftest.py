@@ -0,0 +1,42 @@
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from config.redis import constants as RedisConfig
+from utils.redis_client import RedisClient
+
+
+class FakePoolManager:
+    """以 fakeredis 取代 RedisPoolManager，同一個測試內的客戶端共用資料"""
+
+    def __init__(self):
+        self.server = fakeredis.FakeServer()
+
+    def get_client(self, host: str = RedisConfig.HOST,
+                   port: int = RedisConfig.PORT,
+                   db: int = RedisConfig.DB_CRAWLER,
+                   decode_responses: bool = True):
+        return fakeredis.aioredis.FakeRedis(
+            server=self.server, db=db, decode_responses=decode_responses)
+
+    def get_cluster_client(self, host: str, port: int):
+        raise NotImplementedError("測試不支援 Cluster 模式")
+
+    async def close_loop_pools(self, loop=None):
+        pass
+
+    def metrics(self):
+        return []
+
+
+@pytest.fixture
+def pool_manager() -> FakePoolManager:
+    return FakePoolManager()
+
+
+@pytest.fixture
+def make_redis_client(pool_manager):
+    """建立連到 fakeredis 的 RedisClient，需在同一個事件循環內使用"""
+    def _make(**kwargs) -> RedisClient:
+        return RedisClient(pool_manager=pool_manager, **kwargs)
+    return _make
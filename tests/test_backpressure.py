@@ -0,0 +1,77 @@
+import asyncio
+
+from config.crawler.config import BackpressureConfig
+from utils.backpressure import BackpressureController, BackpressureStatus
+
+SETN = 'https://www.setn.com/News.aspx?NewsID=1581720'
+CNA = 'https://www.cna.com.tw/news/aipl/202411280001.aspx'
+
+CONFIG = BackpressureConfig(pending_high=100, pending_low=40,
+                            lag_high=1800, lag_low=600, pause_factor=2.0)
+
+
+def _observed(pending=0, html=0, lag=0.0):
+    return {'pending': pending, 'html': html, 'retry': 0,
+            'fetch_rate': 1.0, 'lag': lag}
+
+
+def _decide(observed, current=BackpressureStatus.NORMAL):
+    return BackpressureController(None, CONFIG).decide(observed, current)
+
+
+def test_pending_above_high_watermark_throttles():
+    assert _decide(_observed(pending=100)) == BackpressureStatus.THROTTLED
+
+
+def test_pending_above_pause_factor_pauses():
+    assert _decide(_observed(pending=200)) == BackpressureStatus.PAUSED
+
+
+def test_between_watermarks_keeps_state():
+    throttled = BackpressureStatus.THROTTLED
+    assert _decide(_observed(pending=60), throttled) == throttled
+    assert _decide(_observed(pending=60)) == BackpressureStatus.NORMAL
+    # 從暫停恢復時先經過限流
+    assert _decide(_observed(pending=60), BackpressureStatus.PAUSED) == \
+        throttled
+
+
+def test_below_low_watermark_recovers():
+    assert _decide(_observed(pending=40), BackpressureStatus.PAUSED) == \
+        BackpressureStatus.NORMAL
+
+
+def test_lag_alone_throttles():
+    assert _decide(_observed(lag=2000)) == BackpressureStatus.THROTTLED
+
+
+def test_html_pending_does_not_affect_status():
+    assert _decide(_observed(html=10_000_000)) == BackpressureStatus.NORMAL
+
+
+def test_only_fetchable_urls_count_towards_pending(make_redis_client):
+    async def scenario():
+        client = make_redis_client(
+            is_fetchable=lambda url: 'setn.com' in url)
+        added = await client.add_new_urls([SETN, CNA])
+        depths = await client.get_queue_depths()
+        return added, depths
+
+    added, depths = asyncio.run(scenario())
+    # 沒有第二層爬蟲的URL仍記錄為已見過，但不進入待處理佇列
+    assert len(added) == 2
+    assert depths['pending'] == 1
+
+
+def test_purge_removes_stale_unfetchable_pending(make_redis_client):
+    async def scenario():
+        legacy = make_redis_client()
+        await legacy.add_new_urls([SETN, CNA])
+        client = make_redis_client(
+            is_fetchable=lambda url: 'setn.com' in url)
+        removed = await client.purge_unfetchable_pending()
+        return removed, await client.get_pending_urls(10)
+
+    removed, pending = asyncio.run(scenario())
+    assert removed == 1
+    assert pending == [SETN]
@@ -0,0 +1,22 @@
+import os
+
+from config.crawler.config import ChromeProfileConfig
+from scrapers.chrome_profile import build_chrome_options, chrome_arguments
+
+
+def _cache_arguments(profile: ChromeProfileConfig):
+    return [argument for argument in chrome_arguments(profile)
+            if argument.startswith('--disk-cache')]
+
+
+def test_disk_cache_is_opt_in():
+    assert _cache_arguments(ChromeProfileConfig()) == []
+
+
+def test_disk_cache_dir_is_per_process(tmp_path):
+    profile = ChromeProfileConfig(
+        disk_cache_dir=str(tmp_path / 'chrome-cache' / '{pid}'))
+    expected = tmp_path / 'chrome-cache' / str(os.getpid())
+    assert _cache_arguments(profile)[0] == f'--disk-cache-dir={expected}'
+    build_chrome_options(profile)
+    assert expected.is_dir()
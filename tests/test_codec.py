@@ -0,0 +1,28 @@
+import json
+from datetime import datetime
+
+from models.article import News
+from models.codec import encode_jsonl
+
+
+def test_encode_jsonl_matches_model_dump_json():
+    news = News(
+        media_name='三立', title='標題', author='記者', coverage='台北',
+        publish_date=datetime(2024, 5, 2, 1, 30), category='政治',
+        description='內容', keywords=['選舉'],
+        url='https://www.setn.com/News.aspx?NewsID=1')
+    lines = encode_jsonl([news, news]).decode('utf-8').splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0]) == json.loads(news.model_dump_json())
+
+
+def test_trusted_interns_repeated_fields():
+    data = dict(
+        title='標題', author='記者', coverage='台北',
+        publish_date=datetime(2024, 5, 2), category='政治',
+        description='內容', keywords=['選舉'],
+        url='https://www.setn.com/News.aspx?NewsID=1')
+    first = News.trusted(media_name=''.join(['三', '立']), **dict(data))
+    second = News.trusted(media_name=''.join(['三', '立']), **dict(data))
+    assert first.media_name is second.media_name
+    assert first == News(media_name='三立', **data)
@@ -0,0 +1,43 @@
+import asyncio
+from datetime import datetime
+
+import pandas as pd
+
+from config.storage.config import NewsSinkConfig
+from models.article import News
+from sinks.buffered import BufferedNewsSink
+from sinks.compact import compact
+from sinks.factory import create_news_sink, create_worker_news_sink
+from sinks.jsonl_sink import RotatingJsonlNewsSink
+
+
+def _news(index: int) -> News:
+    return News(
+        media_name='三立', title=f'標題{index}', author='', coverage='',
+        publish_date=datetime(2024, 5, 2, 9, 0), category='政治',
+        description='內容', keywords=[],
+        url=f'https://www.setn.com/News.aspx?NewsID={index}')
+
+
+def test_worker_sink_is_unbuffered_jsonl_for_parquet(tmp_path):
+    config = NewsSinkConfig(output_dir=str(tmp_path), format='parquet')
+    assert isinstance(create_news_sink(config), BufferedNewsSink)
+    sink = create_worker_news_sink(config)
+    assert isinstance(sink, RotatingJsonlNewsSink)
+
+
+def test_worker_batches_compact_into_one_parquet_file(tmp_path):
+    config = NewsSinkConfig(output_dir=str(tmp_path), format='parquet')
+
+    async def scenario():
+        sink = create_worker_news_sink(config)
+        # 每個任務一小批，寫入後即已在檔案中
+        for start in range(0, 60, 20):
+            await sink.write_many([_news(i) for i in range(start, start + 20)])
+        return await compact(config, min_age=0)
+
+    assert asyncio.run(scenario()) == 60
+    assert not list(tmp_path.glob('news-*'))
+    parts = list((tmp_path / 'parquet').rglob('*.parquet'))
+    assert len(parts) == 1
+    assert len(pd.read_parquet(parts[0])) == 60
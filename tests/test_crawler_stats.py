@@ -0,0 +1,42 @@
+import asyncio
+
+from utils.crawler_stats import StatsAggregator
+
+URL = 'https://www.setn.com/News.aspx?NewsID=1581720'
+
+
+def test_latency_and_counts_are_queryable(make_redis_client):
+    async def scenario():
+        client = make_redis_client()
+        await client.add_new_urls([URL])
+        client.record_latency(URL, 'download', 0.3)
+        client.record_latency(URL, 'download', 0.7)
+        await client.mark_urls_completed({URL: None})
+        return await client.get_throughput(site='setn.com', minutes=1)
+
+    series = asyncio.run(scenario())['setn.com'][-1]
+    assert series['discovered'] == 1
+    assert series['fetched'] == 1
+    assert series['latency']['download']['count'] == 2
+    assert series['latency']['download']['avg'] == 0.5
+
+
+def test_shared_stats_flusher_survives_client_close(make_redis_client):
+    async def scenario():
+        shared = StatsAggregator(flush_interval=0.01)
+        flusher = make_redis_client(stats=shared)
+        flusher.start_stats_flusher()
+
+        task_client = make_redis_client(stats=shared)
+        await task_client.add_new_urls([URL])
+        await task_client.close()
+        running = shared.running
+
+        await asyncio.sleep(0.05)
+        pending = shared.has_pending()
+        await shared.stop()
+        return running, pending
+
+    running, pending = asyncio.run(scenario())
+    assert running
+    assert not pending
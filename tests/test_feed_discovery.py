@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+
+from config.crawler.config import FeedConfig
+from scrapers.feed_discovery import FeedDiscovery
+
+FEED_URL = 'https://www.setn.com/rss.aspx'
+ITEM = '<item><link>https://www.setn.com/News.aspx?NewsID={}</link></item>'
+
+
+def _feed(count: int) -> bytes:
+    items = ''.join(ITEM.format(index) for index in range(count))
+    return f'<rss><channel>{items}</channel></rss>'.encode()
+
+
+def _run(make_redis_client, body: bytes, max_bytes: int):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get('If-None-Match') == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=body, headers={'ETag': '"v1"'})
+
+    async def scenario():
+        discovery = FeedDiscovery(
+            make_redis_client(), FeedConfig(max_bytes=max_bytes))
+        async with httpx.AsyncClient(
+                transport=httpx.MockTransport(handler)) as client:
+            first = await discovery._fetch(client, FEED_URL)
+            second = await discovery._fetch(client, FEED_URL)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    return first, second, requests
+
+
+def test_complete_feed_saves_validators(make_redis_client):
+    first, second, requests = _run(make_redis_client, _feed(3), 1 << 20)
+    assert len(first.urls) == 3
+    assert second is None
+    assert requests[1].headers['If-None-Match'] == '"v1"'
+
+
+def test_truncated_feed_does_not_save_validators(make_redis_client):
+    body = _feed(200)
+    first, second, requests = _run(make_redis_client, body, len(body) // 4)
+    assert first is not None and second is not None
+    assert 'If-None-Match' not in requests[1].headers
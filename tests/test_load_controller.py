@@ -0,0 +1,69 @@
+import asyncio
+
+from config.crawler.config import AdaptiveLoadConfig
+from utils.load_controller import AdaptiveLoadController
+
+CONFIG = AdaptiveLoadConfig(window=5, quantile=0.8, margin=1, min_samples=3,
+                            min_loads=2, deep_crawl_every=100)
+
+
+def _run(make_redis_client, scenario, config=CONFIG):
+    async def _main():
+        controller = AdaptiveLoadController(make_redis_client(), config)
+        return await scenario(controller)
+    return asyncio.run(_main())
+
+
+def test_quantile_uses_nearest_rank():
+    controller = AdaptiveLoadController(None, CONFIG)
+    assert controller.quantile([1, 2, 3, 4, 5]) == 4
+    assert controller.quantile([7]) == 7
+    assert controller.quantile([5, 1, 9, 3]) == 9
+
+
+def test_too_few_samples_crawl_without_limit(make_redis_client):
+    async def scenario(controller):
+        await controller.record('setn', 3)
+        return await controller.load_count('setn')
+
+    assert _run(make_redis_client, scenario) == -1
+
+
+def test_zero_yield_is_clamped_to_min_loads(make_redis_client):
+    async def scenario(controller):
+        for _ in range(4):
+            await controller.record('setn', 0)
+        return await controller.load_count('setn')
+
+    # 分位數 0 + margin 1 小於下限 2
+    assert _run(make_redis_client, scenario) == CONFIG.min_loads
+
+
+def test_full_yield_grows_past_the_previous_limit(make_redis_client):
+    async def scenario(controller):
+        for depth in (3, 3, 4):
+            await controller.record('setn', depth)
+        limit = await controller.load_count('setn')
+        # 加載到上限時最後一次仍有新URL，紀錄為上限+1
+        for _ in range(3):
+            await controller.record('setn', limit, exhausted=False)
+        grown = await controller.load_count('setn')
+        return limit, grown, await controller.get_history('setn')
+
+    limit, grown, history = _run(make_redis_client, scenario)
+    assert limit == 5
+    assert grown == limit + 2
+    # 只保留最近 window 次紀錄
+    assert history == [6, 6, 6, 4, 3]
+
+
+def test_every_nth_run_forces_a_deep_crawl(make_redis_client):
+    config = CONFIG.model_copy(update={'deep_crawl_every': 3})
+
+    async def scenario(controller):
+        for _ in range(3):
+            await controller.record('setn', 2)
+        return [await controller.load_count('setn') for _ in range(7)]
+
+    assert _run(make_redis_client, scenario, config) == [
+        3, 3, -1, 3, 3, -1, 3]
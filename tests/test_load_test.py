@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from benchmarks.load_test import delete_test_keys, ensure_empty_frontier
+from config.redis import constants as RedisConfig
+
+PRODUCTION_URL = 'https://www.setn.com/News.aspx?NewsID=1581720'
+TEST_URL = 'http://127.0.0.1:8765/News.aspx?NewsID=1'
+
+
+def test_load_test_db_is_isolated_and_cleaned(make_redis_client):
+    async def scenario():
+        production = make_redis_client()
+        await production.add_new_urls([PRODUCTION_URL])
+
+        test_client = make_redis_client(db=RedisConfig.DB_LOAD_TEST)
+        await ensure_empty_frontier(test_client)
+        await test_client.add_new_urls([TEST_URL])
+        popped = await test_client.get_pending_urls(10)
+        with pytest.raises(SystemExit):
+            await ensure_empty_frontier(test_client)
+
+        await delete_test_keys(test_client)
+        await ensure_empty_frontier(test_client)
+        remaining = await production.get_pending_urls(10)
+        return popped, remaining
+
+    popped, remaining = asyncio.run(scenario())
+    assert popped == [TEST_URL]
+    assert remaining == [PRODUCTION_URL]
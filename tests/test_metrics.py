@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from config.crawler.config import MetricsConfig
+from utils.metrics import _NULL_TIMER, MetricsRegistry
+
+
+@pytest.fixture
+def registry() -> MetricsRegistry:
+    return MetricsRegistry(MetricsConfig(enabled=True))
+
+
+def _lines(text: str, prefix: str):
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+
+def test_histogram_renders_cumulative_buckets(registry):
+    histogram = registry.histogram(
+        'test_seconds', '測試', ('stage',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        histogram.observe(value, stage='download')
+
+    text = registry.render()
+    assert _lines(text, 'test_seconds_bucket') == [
+        'test_seconds_bucket{stage="download",le="0.1"} 1',
+        'test_seconds_bucket{stage="download",le="1"} 3',
+        'test_seconds_bucket{stage="download",le="+Inf"} 4',
+    ]
+    assert _lines(text, 'test_seconds_count') == [
+        'test_seconds_count{stage="download"} 4']
+    assert _lines(text, 'test_seconds_sum') == [
+        'test_seconds_sum{stage="download"} 6.25']
+    assert '# TYPE test_seconds histogram' in text
+
+
+def test_timed_records_sync_and_async_functions(registry):
+    @registry.timed('parse', site=lambda url: url)
+    def parse(url):
+        return 'parsed'
+
+    @registry.timed('download', site=lambda url: url)
+    async def download(url):
+        return 'downloaded'
+
+    @registry.timed('download', site=lambda url: url)
+    async def broken(url):
+        raise ValueError('boom')
+
+    assert parse('setn.com') == 'parsed'
+    assert asyncio.run(download('setn.com')) == 'downloaded'
+    with pytest.raises(ValueError):
+        asyncio.run(broken('ltn.com.tw'))
+
+    text = registry.render()
+    assert 'crawler_stage_seconds_count{stage="parse",site="setn.com"} 1' \
+        in text
+    assert 'crawler_stage_seconds_count{stage="download",site="setn.com"} 1' \
+        in text
+    assert 'crawler_stage_errors_total{stage="download",site="ltn.com.tw"} 1' \
+        in text
+
+
+def test_disabled_registry_returns_null_timer_and_records_nothing():
+    registry = MetricsRegistry(MetricsConfig(enabled=False))
+
+    @registry.timed('parse')
+    def parse():
+        return 'parsed'
+
+    assert registry.timer('download') is _NULL_TIMER
+    with registry.timer('download'):
+        pass
+    assert parse() == 'parsed'
+    registry.count('elements_found', 'setn.com')
+    assert registry.snapshot() == {}
+
+
+def test_push_and_collect_merge_processes(make_redis_client, monkeypatch):
+    first = MetricsRegistry(MetricsConfig(enabled=True))
+    second = MetricsRegistry(MetricsConfig(enabled=True))
+    monkeypatch.setattr(first, 'process_id', lambda: 'worker-a:1')
+    monkeypatch.setattr(second, 'process_id', lambda: 'worker-b:2')
+    first.count('elements_found', 'setn.com', 3)
+    second.count('elements_found', 'setn.com', 4)
+    second.count('elements_found', 'ltn.com.tw', 1)
+    first.stage_seconds.observe(0.02, stage='download', site='setn.com')
+    second.stage_seconds.observe(0.03, stage='download', site='setn.com')
+
+    async def scenario():
+        client = make_redis_client()
+        await first.push(client)
+        await second.push(client)
+        return await first.collect(client)
+
+    text = asyncio.run(scenario())
+    assert 'crawler_events_total{event="elements_found",site="setn.com"} 7' \
+        in text
+    assert 'crawler_events_total{event="elements_found",site="ltn.com.tw"} 1' \
+        in text
+    assert 'crawler_stage_seconds_count{stage="download",site="setn.com"} 2' \
+        in text
+    assert text.count('# TYPE crawler_events_total counter') == 1
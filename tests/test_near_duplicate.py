@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime
+
+from models.article import News
+from utils.near_duplicate import (
+    InMemoryNearDuplicateIndex, NearDuplicateDetector,
+    RedisNearDuplicateIndex, optimal_bands)
+
+TEXT = ('行政院今日宣布明年起調高基本工資，月薪調整為新台幣兩萬九千五百元，'
+        '時薪調整為一百九十六元，預計約兩百五十萬名勞工受惠。')
+
+
+def _news(url: str, media: str, text: str = TEXT) -> News:
+    return News(url=url, title=text[:20], description=text,
+                media_name=media, author='', coverage='',
+                publish_date=datetime(2024, 11, 28, 10, 0), category='政治',
+                keywords=[])
+
+
+def test_optimal_bands_is_cached():
+    assert optimal_bands(0.6, 128) is optimal_bands(0.6, 128)
+
+
+def test_memory_index_groups_reposts():
+    async def scenario():
+        detector = NearDuplicateDetector(InMemoryNearDuplicateIndex())
+        first = await detector.check(_news('https://a.example/1', '中央社'))
+        second = await detector.check(
+            _news('https://b.example/1', '三立', TEXT + '（三立新聞）'))
+        other = await detector.check(_news(
+            'https://c.example/1', '三立', '颱風今晚接近東部海面，氣象署發布海上警報。'))
+        return first, second, other
+
+    first, second, other = asyncio.run(scenario())
+    assert not first.is_duplicate
+    assert second.duplicate_of == 'https://a.example/1'
+    assert second.cluster_id == first.cluster_id
+    assert not other.is_duplicate
+
+
+def test_redis_index_uses_per_document_ttl(make_redis_client):
+    async def scenario():
+        client = make_redis_client()
+        index = RedisNearDuplicateIndex(client, ttl=60)
+        detector = NearDuplicateDetector(index)
+        await detector.check(_news('https://a.example/1', '中央社'))
+        match = await detector.check(
+            _news('https://b.example/1', '三立', TEXT + '（三立新聞）'))
+
+        redis = client.redis
+        ttl = await redis.ttl(index._key('doc:https://a.example/1'))
+        # 模擬第一篇過期，只留下第二篇
+        await redis.delete(index._key('doc:https://a.example/1'))
+        cluster = await index.get_cluster('https://b.example/1')
+        return match, ttl, cluster
+
+    match, ttl, cluster = asyncio.run(scenario())
+    assert match.is_duplicate
+    assert 0 < ttl <= 60
+    assert cluster == ['https://b.example/1']
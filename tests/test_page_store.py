@@ -0,0 +1,86 @@
+import asyncio
+
+from config.storage.config import PageStoreConfig
+from utils.page_store import (
+    PageCodec, PageStore, RedisPageStore, SegmentedFilePageStore)
+
+URL = 'https://www.setn.com/News.aspx?NewsID=1581720'
+HTML = '<html><body><p>三立新聞網 測試內容</p></body></html>' * 20
+
+
+def _file_config(tmp_path, **kwargs) -> PageStoreConfig:
+    return PageStoreConfig(backend='file', root_dir=str(tmp_path),
+                           **kwargs)
+
+
+def test_codec_round_trip():
+    for name in ('gzip', 'none'):
+        codec = PageCodec(name)
+        assert codec.decompress(codec.compress(HTML.encode())) == \
+            HTML.encode()
+
+
+def test_file_store_round_trip_survives_reopen(tmp_path):
+    store = SegmentedFilePageStore(_file_config(tmp_path))
+    ref = store.put_sync(URL, HTML)
+    assert PageStore.is_ref(ref)
+    assert store.get_sync(ref) == HTML
+    store.close_sync()
+
+    # 重新開啟時由 index.log 還原索引
+    reopened = SegmentedFilePageStore(_file_config(tmp_path))
+    assert reopened.get_sync(ref) == HTML
+
+
+def test_file_store_dedup_rewrites_into_active_segment(tmp_path):
+    store = SegmentedFilePageStore(_file_config(
+        tmp_path, codec='none', segment_max_bytes=len(HTML.encode()) + 10,
+        max_total_bytes=None))
+    ref = store.put_sync(URL, HTML)
+    store.put_sync(URL, HTML + 'other')          # 換到下一個分段
+    assert store.put_sync(URL, HTML) == ref
+    # 重複內容寫入使用中的分段，淘汰舊分段後仍可讀取
+    store.config.max_total_bytes = 1
+    store._evict_sync()
+    assert store.get_sync(ref) == HTML
+
+
+def test_file_store_evicts_oldest_segment_over_capacity(tmp_path):
+    store = SegmentedFilePageStore(_file_config(
+        tmp_path, codec='none', segment_max_bytes=len(HTML.encode()) + 10,
+        max_total_bytes=2 * len(HTML.encode()) + 20))
+    refs = [store.put_sync(URL, HTML + str(i)) for i in range(4)]
+    assert store.get_sync(refs[0]) is None
+    assert store.get_sync(refs[-1]) == HTML + '3'
+
+
+def test_redis_store_round_trip_and_ttl_refresh(pool_manager):
+    async def scenario():
+        store = RedisPageStore(
+            PageStoreConfig(ttl_seconds=100), pool_manager=pool_manager)
+        ref = await store.put(URL, HTML)
+        key = f"{store.config.redis_key_prefix}{store.parse_ref(ref)}"
+        await store.redis.expire(key, 5)
+        # 相同內容再次寫入時延長保存時間
+        assert await store.put(URL, HTML) == ref
+        return await store.get(ref), await store.redis.ttl(key)
+
+    html, ttl = asyncio.run(scenario())
+    assert html == HTML
+    assert ttl > 5
+
+
+def test_redis_client_keeps_only_refs(make_redis_client, pool_manager):
+    async def scenario():
+        store = RedisPageStore(pool_manager=pool_manager)
+        client = make_redis_client(page_store=store)
+        await client.add_new_urls([URL])
+        assert await client.mark_urls_completed({URL: HTML})
+        shard = client.router.shard_for_url(URL)
+        raw = await client.client_for(shard).hget(
+            client.shard_key(shard, 'html'), URL)
+        return raw, await client.get_html(URL)
+
+    raw, html = asyncio.run(scenario())
+    assert PageStore.is_ref(raw)
+    assert html == HTML
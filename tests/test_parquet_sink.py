@@ -0,0 +1,36 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from models.article import News
+from sinks.parquet_sink import ParquetNewsSink
+
+
+def _news(url: str, publish_date: datetime) -> News:
+    return News(
+        media_name='三立', title='標題', author='', coverage='',
+        publish_date=publish_date, category='政治', description='內容',
+        keywords=[], url=url)
+
+
+def test_naive_dates_are_partitioned_by_taiwan_date(tmp_path):
+    sink = ParquetNewsSink(output_dir=str(tmp_path))
+    items = [
+        # 台灣時間凌晨，視為 UTC 會被分到前一天
+        _news('https://www.setn.com/News.aspx?NewsID=1',
+              datetime(2024, 5, 2, 1, 30)),
+        _news('https://www.setn.com/News.aspx?NewsID=2',
+              datetime(2024, 5, 1, 17, 30, tzinfo=timezone.utc)),
+        _news('https://www.setn.com/News.aspx?NewsID=3',
+              datetime(2024, 5, 2, 23, 0,
+                       tzinfo=timezone(timedelta(hours=8)))),
+    ]
+    asyncio.run(sink.write_many(items))
+
+    partitions = sorted(path.name for path in tmp_path.iterdir())
+    assert partitions == ['date=2024-05-02']
+
+    df = pd.read_parquet(tmp_path / 'date=2024-05-02')
+    local = df.sort_values('url')['publish_date'].dt.tz_convert('Asia/Taipei')
+    assert [value.hour for value in local] == [1, 1, 23]
@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils.retry_scheduler import RetryScheduler
+
+# NewsID 中含有 500、503 等數字，不能影響判斷
+URL = 'https://www.setn.com/News.aspx?NewsID=1503500'
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request('GET', URL)
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError(
+        f"Client error '{status}' for url '{URL}'",
+        request=request, response=response)
+
+
+@pytest.mark.parametrize('status', [429, 500, 502, 503, 504])
+def test_retryable_status_is_transient(status):
+    assert RetryScheduler.is_transient(_status_error(status))
+
+
+@pytest.mark.parametrize('status', [400, 403, 404, 410])
+def test_client_error_is_not_transient_even_if_url_has_digits(status):
+    assert not RetryScheduler.is_transient(_status_error(status))
+
+
+@pytest.mark.parametrize('error', [
+    httpx.ConnectTimeout('timed out'),
+    httpx.ReadTimeout('timed out'),
+    httpx.ConnectError('connection refused'),
+    httpx.ProxyError('proxy failed'),
+    httpx.RemoteProtocolError('peer closed connection'),
+    asyncio.TimeoutError(),
+    ConnectionResetError(),
+])
+def test_transport_errors_are_transient(error):
+    assert RetryScheduler.is_transient(error)
+
+
+def test_parse_error_mentioning_status_digits_is_not_transient():
+    error = ValueError(f"無法解析 {URL}: 缺少 connect 區塊")
+    assert not RetryScheduler.is_transient(error)
+
+
+def test_permanent_failure_goes_to_dead_without_tripping_breaker(
+        make_redis_client):
+    async def scenario():
+        client = make_redis_client()
+        scheduler = RetryScheduler(client)
+        await client.add_new_urls([URL])
+        results = [await scheduler.handle_failure(URL, _status_error(404))
+                   for _ in range(scheduler.config.breaker_threshold)]
+        return results, await scheduler.breaker_open_until(URL)
+
+    results, opened_until = asyncio.run(scenario())
+    assert results[0] == 'dead'
+    assert opened_until is None
+
+
+def test_transient_failures_retry_then_open_breaker(make_redis_client):
+    async def scenario():
+        client = make_redis_client()
+        scheduler = RetryScheduler(client)
+        await client.add_new_urls([URL])
+        results = [await scheduler.handle_failure(URL, httpx.ReadTimeout('x'))
+                   for _ in range(scheduler.config.breaker_threshold)]
+        return results, await scheduler.breaker_open_until(URL)
+
+    results, opened_until = asyncio.run(scenario())
+    assert results[:-1] == ['retry'] * (len(results) - 1)
+    assert results[-1] == 'dead'          # 達到最大嘗試次數
+    assert opened_until is not None
@@ -0,0 +1,127 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from config.crawler.config import ScheduleConfig
+from utils.crawl_checkpoint import CrawlCheckpoint
+from utils.distributed_lock import LeaseLostError
+from utils.site_schedule import SiteScheduler
+
+
+def test_dispatch_guard_outlasts_lease(make_redis_client):
+    config = ScheduleConfig(lease_ttl=120, dispatch_timeout=1800)
+
+    async def scenario():
+        scheduler = SiteScheduler(make_redis_client(), config)
+        due_before = await scheduler.is_due('setn')
+        await scheduler.mark_dispatched('setn')
+        state = await scheduler.get_state('setn')
+        return due_before, await scheduler.is_due('setn'), state
+
+    due_before, due_after, state = asyncio.run(scenario())
+    assert due_before and not due_after
+    # 租約過期後仍在保護時間內，browser 佇列積壓時不會重複分派
+    assert float(state['next_run_at']) > time.time() + config.lease_ttl
+
+
+def test_heartbeat_detects_lost_lease(make_redis_client):
+    config = ScheduleConfig(heartbeat_interval=0.01)
+
+    async def scenario():
+        client = make_redis_client()
+        scheduler = SiteScheduler(client, config)
+        lease = scheduler.lease('setn')
+        assert await lease.acquire()
+        lease.check()
+        # 租約過期後被其他 worker 取得
+        await client.redis.set(scheduler._key('lease', 'setn'), 'other')
+        await asyncio.sleep(0.05)
+        lost = lease.lost
+        await lease.release()
+        owner = await client.redis.get(scheduler._key('lease', 'setn'))
+        return lost, owner
+
+    lost, owner = asyncio.run(scenario())
+    assert lost
+    # 釋放時不會刪除其他持有者的租約
+    assert owner == 'other'
+
+
+class _LeaseStealingScraper:
+    """第一次加載後租約被其他 worker 取得，之後的加載照常回呼"""
+
+    def __init__(self, steal):
+        self.steal = steal
+        self.callback_errors = []
+
+    def get_feed_urls(self):
+        return []
+
+    async def fetch_urls(self, load_count=None, on_urls=None, resume_from=0):
+        urls = []
+        for depth, url in enumerate((FIRST_URL, SECOND_URL, THIRD_URL), 1):
+            try:
+                await on_urls([url], depth)
+            except Exception as e:
+                # 與 NewsSeleniumFetcher.fetch_urls 相同，回呼的例外只記錄
+                self.callback_errors.append(e)
+                break
+            urls.append(url)
+            if depth == 1:
+                await self.steal()
+                await asyncio.sleep(0.05)
+        return urls
+
+
+FIRST_URL = 'https://www.setn.com/News.aspx?NewsID=1'
+SECOND_URL = 'https://www.setn.com/News.aspx?NewsID=2'
+THIRD_URL = 'https://www.setn.com/News.aspx?NewsID=3'
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12),
+                    reason='config/celery/config.py 使用 Python 3.12 的 f-string 語法')
+def test_discover_site_stops_writing_after_lease_is_lost(
+        make_redis_client, monkeypatch):
+    from celery_scraper import scraper_tasks
+
+    dispatched = []
+    clients = []
+
+    def _client():
+        client = make_redis_client()
+        clients.append(client)
+        return client
+
+    async def _steal():
+        scheduler = SiteScheduler(clients[0])
+        await clients[0].redis.set(scheduler._key('lease', 'setn'), 'other')
+
+    scraper = _LeaseStealingScraper(_steal)
+    monkeypatch.setattr(scraper_tasks, 'create_redis_client', _client)
+    monkeypatch.setattr(scraper_tasks, 'create_scraper', lambda name: scraper)
+    monkeypatch.setattr(scraper_tasks, 'dispatch_fetch_batches',
+                        lambda urls: dispatched.append(list(urls)) or 1)
+    monkeypatch.setattr(scraper_tasks, 'run_on_worker_loop', asyncio.run)
+    monkeypatch.setattr(
+        'utils.site_schedule.ScheduleConfig',
+        lambda: ScheduleConfig(heartbeat_interval=0.01))
+
+    result = scraper_tasks.discover_site('setn')
+
+    async def _state():
+        client = make_redis_client()
+        checkpoint = await CrawlCheckpoint(client).load('setn')
+        schedule = await SiteScheduler(client).get_state('setn')
+        added = await client.get_pending_urls(10)
+        return checkpoint, schedule, added
+
+    checkpoint, schedule, added = asyncio.run(_state())
+    assert result['status'] == 'lease_lost'
+    assert [type(e) for e in scraper.callback_errors] == [LeaseLostError]
+    assert dispatched == [[FIRST_URL]]
+    assert added == [FIRST_URL]
+    # 檢查點停在第一次加載，排程狀態未被改寫
+    assert checkpoint['load_depth'] == 1
+    assert 'last_run_at' not in schedule
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from models.article import News
+from sinks.sqlite_store import SqliteNewsStore, format_date
+
+URL = 'https://www.setn.com/News.aspx?NewsID=1581720'
+
+
+def _news(url: str = URL, title: str = '立法院三讀通過預算案',
+          publish_date: datetime = datetime(2024, 5, 2, 9, 0),
+          category: str = '政治', media_name: str = '三立') -> News:
+    return News(
+        media_name=media_name, title=title, author='記者', coverage='台北',
+        publish_date=publish_date, category=category,
+        description='行政院今日表示', keywords=['預算'], url=url)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteNewsStore(str(tmp_path / 'news.db'))
+    yield store
+    asyncio.run(store.close())
+
+
+def _fts_rows(store: SqliteNewsStore, term: str) -> int:
+    return store._conn.execute(
+        "SELECT COUNT(*) FROM news_fts WHERE news_fts MATCH ?",
+        (f'"{term}"',)).fetchone()[0]
+
+
+def test_tracking_variants_upsert_into_one_row(store):
+    store.upsert_many_sync([_news(URL + '&utm_source=fb')])
+    store.upsert_many_sync([_news(
+        'https://m.setn.com/News.aspx?newsid=1581720&fbclid=x',
+        title='立法院三讀通過修正預算')])
+
+    assert store.count_sync() == 1
+    news = asyncio.run(store.get(URL))
+    assert news.title == '立法院三讀通過修正預算'
+    # news_au 觸發器刪除舊的全文索引列並寫入新的
+    if store.tokenizer == 'trigram':
+        assert _fts_rows(store, '修正預算') == 1
+        assert _fts_rows(store, '通過預算案') == 0
+
+
+def test_trigram_match_and_like_fallback_for_short_terms(store):
+    store.upsert_many_sync([
+        _news(),
+        _news(URL.replace('1581720', '1581721'), title='颱風來襲停班停課'),
+    ])
+    # 3 個字以上走 FTS5 MATCH
+    where, params = store._where(text='三讀通過')
+    assert ('MATCH' in where) == (store.tokenizer == 'trigram')
+    assert [news.title for news in store.query_sync(text='三讀通過')] == [
+        '立法院三讀通過預算案']
+    # 少於 3 個字改用 LIKE，仍能找到
+    where, params = store._where(text='颱風')
+    assert 'MATCH' not in where and 'LIKE' in where
+    assert [news.title for news in store.query_sync(text='颱風')] == [
+        '颱風來襲停班停課']
+
+
+def test_since_until_with_tz_aware_datetimes(store):
+    store.upsert_many_sync([
+        _news(URL.replace('1581720', str(index)),
+              publish_date=datetime(2024, 5, 2, hour, 0))
+        for index, hour in enumerate((0, 8, 16))])
+    utc = timezone.utc
+    # 2024-05-02 00:00 UTC = 台灣時間 08:00
+    since = datetime(2024, 5, 2, 0, 0, tzinfo=utc)
+    until = datetime(2024, 5, 2, 8, 0, tzinfo=utc)
+    assert format_date(since) == '2024-05-02 08:00:00'
+    found = store.query_sync(since=since, until=until)
+    assert [news.publish_date.hour for news in found] == [8]
+    assert store.count_sync(
+        since=datetime(2024, 5, 2, 8, 0,
+                       tzinfo=timezone(timedelta(hours=8)))) == 2
+
+
+def test_count_with_combined_filters(store):
+    store.upsert_many_sync([
+        _news(URL.replace('1581720', '1'), category='政治'),
+        _news(URL.replace('1581720', '2'), category='社會'),
+        _news('https://news.ltn.com.tw/news/politics/breakingnews/3',
+              category='政治', media_name='自由'),
+        _news(URL.replace('1581720', '4'), category='政治',
+              publish_date=datetime(2024, 4, 1)),
+    ])
+    assert store.count_sync(media_name='三立', category='政治') == 2
+    assert store.count_sync(media_name='三立', category='政治',
+                            since=datetime(2024, 5, 1)) == 1
+    assert store.count_sync(category='政治', text='預算案') == 3
+    assert asyncio.run(store.media_counts()) == {'三立': 3, '自由': 1}
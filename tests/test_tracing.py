@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import utils.redis_client
+from config.crawler.config import TracingConfig
+from utils.tracing import ROOT_SPAN, Tracer, summarize
+
+FETCHABLE = 'https://www.setn.com/News.aspx?NewsID=1581720'
+UNFETCHABLE = 'https://www.example.com/news/1'
+
+
+def _span_names(path):
+    with open(path, encoding='utf-8') as f:
+        return [span['name'] for line in f
+                for resource in json.loads(line)['resourceSpans']
+                for scope in resource['scopeSpans']
+                for span in scope['spans']]
+
+
+def test_contexts_only_for_queued_urls_and_removed_on_completion(
+        make_redis_client, monkeypatch, tmp_path):
+    tracer = Tracer(TracingConfig(
+        enabled=True, export_path=str(tmp_path / 'spans.jsonl')))
+    monkeypatch.setattr(utils.redis_client, 'tracer', tracer)
+
+    async def scenario():
+        client = make_redis_client(is_fetchable=lambda url: 'setn' in url)
+        await client.add_new_urls([FETCHABLE, UNFETCHABLE])
+        before = await client.get_trace_contexts([FETCHABLE, UNFETCHABLE])
+        await client.mark_urls_completed({FETCHABLE: None})
+        after = await client.get_trace_contexts([FETCHABLE])
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    assert list(before) == [FETCHABLE]
+    assert after == {}
+
+
+def test_cleanup_removes_trace_and_dead_entries(make_redis_client,
+                                                monkeypatch, tmp_path):
+    tracer = Tracer(TracingConfig(
+        enabled=True, export_path=str(tmp_path / 'spans.jsonl')))
+    monkeypatch.setattr(utils.redis_client, 'tracer', tracer)
+
+    async def scenario():
+        client = make_redis_client()
+        await client.add_new_urls([FETCHABLE])
+        shard = client.router.shard_for_url(FETCHABLE)
+        redis = client.client_for(shard)
+        await redis.hset(client.shard_key(shard, 'dead'), FETCHABLE, '{}')
+        await client._cleanup_shard(shard, cutoff_time=2 ** 40)
+        return (await redis.hlen(client.shard_key(shard, 'trace')),
+                await redis.hlen(client.shard_key(shard, 'dead')))
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+
+def test_unfinished_trace_exports_attempt_only(tmp_path):
+    path = tmp_path / 'spans.jsonl'
+    tracer = Tracer(TracingConfig(enabled=True, export_path=str(path)))
+    context = tracer.new_contexts([FETCHABLE], 1.0, 2.0)[FETCHABLE]
+
+    retrying = tracer.resume(FETCHABLE, context)
+    retrying.add_span('download', 3.0, 4.0, 'ConnectError: refused')
+    tracer.export([retrying])
+    assert _span_names(path) == ['download']
+
+    dead = tracer.resume(FETCHABLE, context)
+    dead.add_span('download', 5.0, 6.0, 'ConnectError: refused')
+    dead.end('ConnectError: refused')
+    tracer.export([dead])
+    assert _span_names(path)[1:] == [
+        ROOT_SPAN, 'download', 'discovery', 'queue_wait']
+
+    rows = {row['stage']: row for row in summarize([str(path)])
+            if row['site'] == '*'}
+    assert rows['download']['count'] == 0
+    assert rows['download']['errors'] == 2
+    assert rows['download']['p50'] is None
+    assert rows['discovery']['p50'] == 1.0
@@ -0,0 +1,30 @@
+import pytest
+
+from url_buliders import thinl_tnak_url
+from url_buliders.base import BaseURLBuilder
+
+BUILDERS = [cls for cls in vars(thinl_tnak_url).values()
+            if isinstance(cls, type) and issubclass(cls, BaseURLBuilder)
+            and cls is not BaseURLBuilder]
+PAGES = range(4)
+TYPES = [None, 'report', 'Policy Brief']
+
+
+def test_all_builders_are_collected():
+    assert len(BUILDERS) == 6
+
+
+# 第 0 頁會被省略或改寫(RAND 的 start 偏移、Heritage 顯示第一頁)，
+# 第 1 頁起由頁碼格式化，全部需與逐一構建一致
+@pytest.mark.parametrize('builder_class', BUILDERS,
+                         ids=lambda cls: cls.__name__)
+def test_build_urls_matches_uncompiled_builder(builder_class):
+    builder = builder_class()
+    expected = [builder._build_url_uncompiled(article_type, page)
+                for article_type in TYPES for page in PAGES]
+    assert list(builder.build_urls(pages=PAGES, types=TYPES)) == expected
+
+    # 確認比較的是模板輸出，而非退回逐一構建的結果
+    template = builder.compile()
+    assert [template.render(article_type, page)
+            for article_type in TYPES for page in PAGES] == expected
@@ -0,0 +1,57 @@
+from utils.url_canonicalizer import URLCanonicalizer
+
+SETN = 'https://www.setn.com/News.aspx?NewsID=1581720'
+LTN = 'https://news.ltn.com.tw/news/politics/breakingnews/4567890'
+
+
+def test_tracking_params_fragment_and_scheme_are_normalized():
+    canonicalizer = URLCanonicalizer()
+    assert canonicalizer.canonicalize(
+        'http://setn.com/News.aspx?utm_source=fb&NewsID=1581720&From=Search#top'
+    ) == SETN
+    assert canonicalizer.canonicalize(LTN + '/?fbclid=abc') == LTN
+
+
+def test_mobile_hosts_collapse_to_desktop():
+    canonicalizer = URLCanonicalizer()
+    assert canonicalizer.canonicalize(
+        'https://m.setn.com/News.aspx?NewsID=1581720') == SETN
+    assert canonicalizer.canonicalize(
+        'https://m.ltn.com.tw/news/politics/breakingnews/4567890') == LTN
+    assert canonicalizer.canonicalize(
+        'https://m.ettoday.net/news/20240101/1234567') == \
+        'https://www.ettoday.net/news/20240101/1234567'
+
+
+def test_allowed_params_match_case_insensitively():
+    canonicalizer = URLCanonicalizer()
+    assert canonicalizer.canonicalize(
+        'https://www.setn.com/News.aspx?newsid=1581720') == SETN
+    assert canonicalizer.canonicalize(
+        'https://www.setn.com/News.aspx?newsid=1') != \
+        canonicalizer.canonicalize('https://www.setn.com/News.aspx?newsid=2')
+
+
+def test_invalid_port_is_returned_unchanged():
+    url = 'https://www.setn.com:abc/News.aspx?NewsID=1'
+    assert URLCanonicalizer().canonicalize(url) == url
+
+
+def test_canonical_urls_take_fast_path_and_are_stable():
+    canonicalizer = URLCanonicalizer()
+    assert canonicalizer._is_canonical(LTN)
+    assert canonicalizer.canonicalize(LTN) == LTN
+    assert canonicalizer.canonicalize(canonicalizer.canonicalize(SETN)) == SETN
+
+
+def test_canonicalize_many_counts_collapsed_variants():
+    result = URLCanonicalizer().canonicalize_many([
+        SETN,
+        'https://m.setn.com/News.aspx?NewsID=1581720',
+        'https://www.setn.com/News.aspx?newsid=1581720&utm_medium=social',
+        SETN,
+    ])
+    assert result.urls == [SETN]
+    assert result.total == 4
+    assert result.collapsed == 2
+    assert result.collapsed_by_site == {'setn.com': 2}
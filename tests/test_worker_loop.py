@@ -0,0 +1,120 @@
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from celery_scraper import worker_loop as worker_loop_module
+from celery_scraper.worker_loop import WorkerLoop
+
+
+def _recorder(calls, name, error=None):
+    async def _hook():
+        calls.append(name)
+        if error:
+            raise error
+    return _hook
+
+
+def _copy_module_hooks(calls) -> WorkerLoop:
+    """以記錄呼叫的鉤子複製模組註冊的關閉順序，不執行真正的關閉動作"""
+    loop = WorkerLoop()
+    for order, name, _ in worker_loop_module.worker_loop._hooks:
+        loop.add_shutdown_hook(_recorder(calls, name), order=order, name=name)
+    return loop
+
+
+async def _make_event():
+    return asyncio.Event()
+
+
+async def _set(event):
+    event.set()
+
+
+def test_loop_persists_across_runs():
+    loop = WorkerLoop()
+
+    async def _current():
+        return asyncio.get_running_loop(), threading.current_thread()
+
+    try:
+        first_loop, thread = loop.run(_current())
+        # 上一次建立的異步資源在下一次任務仍可使用
+        event = loop.run(_make_event())
+        loop.run(_set(event))
+        second_loop, _ = loop.run(_current())
+        assert first_loop is second_loop is loop.loop
+        assert thread is not threading.main_thread()
+        assert event.is_set()
+    finally:
+        loop.stop()
+
+
+def test_hooks_run_in_order_regardless_of_registration():
+    calls = []
+    loop = WorkerLoop()
+    loop.add_shutdown_hook(_recorder(calls, 'pools'), order=1000)
+    loop.add_shutdown_hook(
+        _recorder(calls, 'sink', RuntimeError('寫入失敗')), order=500)
+    loop.add_shutdown_hook(_recorder(calls, 'drain'), order=0)
+    loop.add_shutdown_hook(_recorder(calls, 'stats'), order=900)
+    loop.start()
+    loop.stop()
+    # 鉤子出錯不影響後續鉤子
+    assert calls == ['drain', 'sink', 'stats', 'pools']
+
+
+def test_redis_pools_close_after_sink():
+    calls = []
+    loop = _copy_module_hooks(calls)
+    # 新聞輸出在第一次取得時才註冊，晚於模組層級的鉤子
+    loop.add_shutdown_hook(_recorder(calls, 'news_sink'),
+                           order=500, name='news_sink')
+    loop.start()
+    loop.stop()
+    assert calls == ['_drain_in_flight', 'news_sink', '_stop_metrics_push',
+                     '_stop_stats_flusher', '_close_redis_pools']
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12),
+                    reason='config/celery/config.py 使用 Python 3.12 的 f-string 語法')
+def test_get_news_sink_registers_before_redis_pools(monkeypatch):
+    from celery_scraper import scraper_tasks
+
+    calls = []
+
+    class _Sink:
+        async def close(self):
+            calls.append('news_sink')
+
+    loop = _copy_module_hooks(calls)
+    monkeypatch.setattr(scraper_tasks, 'worker_loop', loop)
+    monkeypatch.setattr(scraper_tasks, '_news_sink', None)
+    monkeypatch.setattr(scraper_tasks, 'create_worker_news_sink', _Sink)
+    scraper_tasks.get_news_sink()
+    loop.start()
+    loop.stop()
+    assert calls.index('news_sink') < calls.index('_close_redis_pools')
+    assert calls.index('_drain_in_flight') < calls.index('news_sink')
+
+
+def test_run_raises_after_stop():
+    loop = WorkerLoop()
+    loop.run(_make_event())
+    loop.stop()
+    assert loop.loop is None
+    with pytest.raises(RuntimeError):
+        loop.run(_make_event())
+    with pytest.raises(RuntimeError):
+        loop.start()
+
+
+def test_run_on_worker_loop_raises_after_shutdown(monkeypatch):
+    loop = WorkerLoop()
+    monkeypatch.setattr(worker_loop_module, 'worker_loop', loop)
+    assert isinstance(
+        worker_loop_module.run_on_worker_loop(_make_event()), asyncio.Event)
+    loop.stop()
+    with pytest.raises(RuntimeError):
+        worker_loop_module.run_on_worker_loop(_make_event())
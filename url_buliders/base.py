@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Dict, Optional, Union, Callable
-from urllib.parse import urlencode, urlparse, urlunparse, parse_qs
+from typing import (
+    Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union, Callable)
+from urllib.parse import (
+    urlencode, urlparse, urlunparse, parse_qs, quote_plus)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,12 +34,114 @@ class URLBuilder(ABC):
         pass
 
 
+# 編譯模板時代表文章類型與分頁參數位置的標記
+_TYPE_SLOT = object()
+_PAGE_SLOT = object()
+# 用於切出查詢字串前後固定部分的佔位字元
+_QUERY_MARK = '\x00'
+
+
+def _encode_pair(key: str, value: Any) -> str:
+    """與 urlencode(doseq=True) 相同的單一參數編碼"""
+    if isinstance(value, str):
+        return f"{quote_plus(key)}={quote_plus(value)}"
+    return urlencode([(key, value)], doseq=True)
+
+
+class CompiledURLTemplate:
+    """
+    預先編譯的URL模板
+    基礎URL、搜尋、過濾與額外參數只解析與編碼一次，
+    產生URL時只需格式化文章類型與頁碼並串接字串，結果與 build_url 完全相同
+    """
+
+    def __init__(self, builder: 'BaseURLBuilder'):
+        self.builder = builder
+        config = builder.config
+        parsed_url = urlparse(config.base_url)
+        existing_params = parse_qs(parsed_url.query)
+
+        # 依是否帶有類型/分頁參數，各自決定參數順序與固定片段
+        self._layouts: Dict[Tuple[bool, bool], List[Any]] = {}
+        for has_type in (False, True):
+            for has_page in (False, True):
+                merged = builder._merge_params(
+                    existing_params,
+                    config.search_params,
+                    config.filter_params,
+                    {config.type_param_key: _TYPE_SLOT} if has_type else {},
+                    {config.page_param_key: _PAGE_SLOT} if has_page else {},
+                    config.extra_params)
+                self._layouts[(has_type, has_page)] = [
+                    value if value is _TYPE_SLOT or value is _PAGE_SLOT
+                    else _encode_pair(key, value)
+                    for key, value in merged.items()]
+
+        # 查詢字串以外的部分
+        self._empty_url = urlunparse(parsed_url._replace(query=''))
+        self._head, self._tail = urlunparse(
+            parsed_url._replace(query=_QUERY_MARK)).split(_QUERY_MARK)
+        self._type_prefix = quote_plus(config.type_param_key or '')
+        self._page_prefix = quote_plus(config.page_param_key or '')
+
+    @staticmethod
+    def _format(prefix: str, key: Optional[str], value: Any) -> str:
+        if isinstance(value, str):
+            return f"{prefix}={quote_plus(value)}"
+        return _encode_pair(key, value)  # type: ignore
+
+    def render(self, article_type: Optional[str] = None,
+               page: Optional[int] = None) -> Optional[str]:
+        """產生URL，參數格式化結果無法套用模板時返回None"""
+        config = self.builder.config
+        type_params = self.builder._format_type_param(article_type)
+        page_params = self.builder._format_page_param(page)
+        # 格式化結果為 None 時參數會被合併過濾掉，交由逐一構建處理
+        if None in type_params.values() or None in page_params.values():
+            return None
+
+        type_part = self._format(
+            self._type_prefix, config.type_param_key,
+            type_params[config.type_param_key]) if type_params else None  # type: ignore # noqa
+        page_part = self._format(
+            self._page_prefix, config.page_param_key,
+            page_params[config.page_param_key]) if page_params else None  # type: ignore # noqa
+
+        parts = []
+        for item in self._layouts[(type_part is not None,
+                                   page_part is not None)]:
+            if item is _TYPE_SLOT:
+                parts.append(type_part)
+            elif item is _PAGE_SLOT:
+                parts.append(page_part)
+            else:
+                parts.append(item)
+
+        if not parts:
+            return self._empty_url
+        return self._head + '&'.join(parts) + self._tail  # type: ignore
+
+
 class BaseURLBuilder(URLBuilder):
     """通用的URL構建器"""
 
     def __init__(self, url_config: URLParameters):
         self.config = url_config
         self.logger = logging.getLogger(self.__class__.__name__)
+        self._template: Optional[CompiledURLTemplate] = None
+
+    def compile(self) -> CompiledURLTemplate:
+        """
+        返回預先編譯的URL模板
+        模板在第一次使用時建立，之後修改 config 需先呼叫 refresh()
+        """
+        if self._template is None:
+            self._template = CompiledURLTemplate(self)
+        return self._template
+
+    def refresh(self):
+        """config 變更後丟棄已編譯的模板"""
+        self._template = None
 
     def _merge_params(self, *param_dicts) -> Dict[str, str]:
         """合併多個參數字典，過濾掉None值"""
@@ -131,6 +235,33 @@ class BaseURLBuilder(URLBuilder):
         構建完整的URL
         即使參數格式化失敗也會返回基礎URL
         """
+        try:
+            url = self.compile().render(article_type, page)
+        except Exception as e:
+            self.logger.warning(f"URL模板無法使用，改為逐一構建: {str(e)}")
+            url = None
+        return url if url is not None else \
+            self._build_url_uncompiled(article_type, page)
+
+    def build_urls(self,
+                   pages: Optional[Iterable[Optional[int]]] = None,
+                   types: Optional[Iterable[Optional[str]]] = None
+                   ) -> Iterator[str]:
+        """
+        批量產生URL，依序為每個文章類型產生所有頁碼
+        Args:
+            pages: 頁碼，例如 range(1, 200)，未指定時不帶分頁參數
+            types: 文章類型，未指定時不帶類型參數
+        """
+        page_list = list(pages) if pages is not None else [None]
+        for article_type in (types if types is not None else [None]):
+            for page in page_list:
+                yield self.build_url(article_type, page)
+
+    def _build_url_uncompiled(self,
+                              article_type: Optional[str] = None,
+                              page: Optional[int] = None) -> str:
+        """逐次解析與合併參數的構建方式，模板無法使用時的後備"""
         try:
             # 解析基礎URL
             parsed_url = urlparse(self.config.base_url)
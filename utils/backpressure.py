@@ -0,0 +1,119 @@
+import logging
+import time
+from enum import Enum
+from typing import Dict, Optional, Any
+
+from config.crawler.config import BackpressureConfig
+from utils.redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+
+class BackpressureStatus(Enum):
+    NORMAL = "normal"        # 正常收集
+    THROTTLED = "throttled"  # 限流: 只爬第一頁，不做深度滾動
+    PAUSED = "paused"        # 暫停: 略過本次URL收集
+
+
+class BackpressureController:
+    """
+    URL收集與新聞下載之間的背壓控制
+    觀測待處理佇列深度與第二層預估消化時間，
+    以高低水位(遲滯)決定狀態，避免在門檻附近來回切換
+    待處理佇列只包含第二層能消化的URL(見 RedisClient.is_fetchable)；
+    html:pending 是已完成網頁的引用，不代表積壓，只記錄不參與判斷
+    狀態寫入 backpressure:state，供 get_stats 查詢
+    """
+
+    def __init__(
+            self,
+            redis_client: RedisClient,
+            config: Optional[BackpressureConfig] = None):
+        self.redis_client = redis_client
+        self.config = config or BackpressureConfig()
+
+    @property
+    def _state_key(self) -> str:
+        return self.redis_client.shard_key(
+            self.redis_client.router.meta, 'backpressure')
+
+    async def _fetch_rate(self) -> float:
+        """最近時間窗口內第二層每秒完成的新聞數"""
+        minutes = self.config.rate_window_minutes
+        throughput = await self.redis_client.get_throughput(minutes=minutes)
+        fetched = sum(entry['fetched']
+                      for series in throughput.values() for entry in series)
+        return fetched / (minutes * 60)
+
+    async def observe(self) -> Dict[str, float]:
+        """收集背壓判斷所需的觀測值"""
+        depths = await self.redis_client.get_queue_depths()
+        rate = await self._fetch_rate()
+        backlog = depths['pending'] + depths['retry']
+        # 尚無下載速率(例如剛啟動)時無法估計延遲，只依佇列深度判斷
+        lag = backlog / rate if rate > 0 else 0.0
+        return {
+            'pending': depths['pending'],
+            'html': depths['html'],
+            'retry': depths['retry'],
+            'fetch_rate': rate,
+            'lag': lag,
+        }
+
+    def decide(self, metrics: Dict[str, float],
+               current: BackpressureStatus) -> BackpressureStatus:
+        """依觀測值與目前狀態決定新的背壓狀態"""
+        config = self.config
+        # 各指標相對於高水位的比例，取最大者
+        pressure = max(
+            metrics['pending'] / config.pending_high,
+            metrics['lag'] / config.lag_high,
+        )
+        if pressure >= config.pause_factor:
+            return BackpressureStatus.PAUSED
+        if pressure >= 1:
+            return BackpressureStatus.THROTTLED
+
+        # 高水位以下、低水位以上維持原狀態，全部低於低水位才恢復正常
+        below_low = (metrics['pending'] <= config.pending_low
+                     and metrics['lag'] <= config.lag_low)
+        if below_low:
+            return BackpressureStatus.NORMAL
+        if current == BackpressureStatus.PAUSED:
+            return BackpressureStatus.THROTTLED
+        return current
+
+    async def get_status(self) -> BackpressureStatus:
+        """讀取最近一次評估的背壓狀態"""
+        value = await self.redis_client.redis.hget(
+            self._state_key, 'status')  # type: ignore
+        return BackpressureStatus(value) if value else \
+            BackpressureStatus.NORMAL
+
+    async def evaluate(self) -> BackpressureStatus:
+        """重新評估背壓狀態並寫回 Redis"""
+        current = await self.get_status()
+        metrics = await self.observe()
+        status = self.decide(metrics, current)
+
+        state: Dict[str, Any] = dict(metrics)
+        state.update({'status': status.value, 'updated_at': time.time()})
+        await self.redis_client.redis.hset(
+            self._state_key, mapping=state)  # type: ignore
+
+        if status != current:
+            logger.warning(
+                f"背壓狀態 {current.value} -> {status.value}: "
+                f"pending={metrics['pending']}, html={metrics['html']}, "
+                f"lag={metrics['lag']:.0f}s")
+        return status
+
+    def limit_load_count(self, status: BackpressureStatus,
+                         load_count: Optional[int]) -> Optional[int]:
+        """限流時將加載次數限制在不做深度滾動的範圍"""
+        if status != BackpressureStatus.THROTTLED:
+            return load_count
+        limit = self.config.throttled_load_count
+        if load_count is None or load_count == -1:
+            return limit
+        return min(load_count, limit)
@@ -0,0 +1,51 @@
+import time
+from typing import Dict, Optional, Any
+
+from utils.redis_client import RedisClient
+
+
+class CrawlCheckpoint:
+    """
+    第一層爬蟲的進度檢查點
+    記錄每個網站目前的加載深度與最後看到的URL，
+    worker 中途結束時，下一次執行可以從檢查點繼續
+    """
+
+    def __init__(self, redis_client: RedisClient, ttl: int = 3600):
+        self.redis_client = redis_client
+        self.ttl = ttl  # 過久的檢查點代表頁面內容已改變，不再續爬
+
+    def _key(self, name: str) -> str:
+        return self.redis_client.router.meta.key(f"checkpoint:site:{name}")
+
+    async def load(self, name: str) -> Optional[Dict[str, Any]]:
+        """讀取未完成的檢查點，沒有或已完成時返回None"""
+        data = await self.redis_client.redis.hgetall(
+            self._key(name))  # type: ignore
+        if not data or data.get('completed') == '1':
+            return None
+        return {
+            'load_depth': int(data.get('load_depth', 0)),
+            'last_url': data.get('last_url'),
+            'updated_at': float(data.get('updated_at', 0)),
+        }
+
+    async def save(self, name: str, load_depth: int,
+                   last_url: Optional[str]):
+        """保存目前進度"""
+        key = self._key(name)
+        async with self.redis_client.pipeline(
+                self.redis_client.router.meta) as pipe:
+            pipe.hset(key, mapping={
+                'load_depth': load_depth,
+                'last_url': last_url or '',
+                'completed': 0,
+                'updated_at': time.time(),
+            })
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def complete(self, name: str):
+        """標記本次爬取已完整結束"""
+        await self.redis_client.redis.hset(
+            self._key(name), 'completed', 1)  # type: ignore
@@ -0,0 +1,240 @@
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+# 延遲直方圖的桶上界(秒)，最後一桶收集超過上界的樣本
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 各分鐘統計桶保留的秒數
+SERIES_TTL = 2 * 86400
+
+
+def _bucket_label(index: int) -> str:
+    if index < len(LATENCY_BUCKETS):
+        return f"le_{LATENCY_BUCKETS[index]:g}"
+    return 'le_inf'
+
+
+class StatsAggregator:
+    """
+    爬蟲統計本地聚合器
+    計數先累積在記憶體中，定期以一次 pipeline 批量寫入 Redis:
+    - stats:ts:{網站}:{分鐘} hash: discovered / fetched / failed / bytes 及延遲直方圖，
+      seen / collapsed 為收集到的原始URL數與因正規化而合併的URL數
+    - stats:crawler hash: 累計總數，last_update 每次 flush 只寫一次
+    """
+    METRICS = ('discovered', 'fetched', 'failed', 'bytes', 'seen', 'collapsed')
+    # 累計統計欄位對應
+    TOTALS = {
+        'discovered': 'total_urls',
+        'fetched': 'success_count',
+        'failed': 'failure_count',
+    }
+
+    def __init__(
+            self,
+            flush_interval: float = 10.0,
+            series_prefix: str = 'stats:ts',
+            sites_key: str = 'stats:sites'):
+        self.flush_interval = flush_interval
+        self.series_prefix = series_prefix
+        self.sites_key = sites_key
+
+        self._lock = threading.Lock()
+        # (網站, 分鐘, 指標) -> 數量
+        self._counters: Dict[Tuple[str, int, str], int] = defaultdict(int)
+        # (網站, 分鐘, 階段, 桶) -> 樣本數；桶為 'sum_ms' 時為延遲總和
+        self._latency: Dict[Tuple[str, int, str, str], int] = defaultdict(int)
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _minute(timestamp: Optional[float] = None) -> int:
+        return int((timestamp or time.time()) // 60)
+
+    def incr(self, site: str, metric: str, amount: int = 1):
+        """累加指定網站當前分鐘的計數"""
+        if metric not in self.METRICS:
+            raise ValueError(f"未知的統計指標: {metric}")
+        with self._lock:
+            self._counters[(site, self._minute(), metric)] += amount
+
+    def observe_latency(self, site: str, stage: str, seconds: float):
+        """記錄一筆延遲樣本到直方圖"""
+        index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        minute = self._minute()
+        with self._lock:
+            self._latency[(site, minute, stage, _bucket_label(index))] += 1
+            self._latency[(site, minute, stage, 'sum_ms')] += int(
+                seconds * 1000)
+
+    def has_pending(self) -> bool:
+        with self._lock:
+            return bool(self._counters or self._latency)
+
+    def series_key(self, site: str, minute: int) -> str:
+        return f"{self.series_prefix}:{site}:{minute}"
+
+    async def flush(self, client: redis.Redis,
+                    key_fn: Callable[[str], str], stats_key: str) -> int:
+        """
+        將累積的統計批量寫入 Redis
+        Args:
+            client: meta 分片的客戶端
+            key_fn: 將基礎鍵名轉為分片上的實際鍵名
+            stats_key: 累計統計的鍵名
+        Returns:
+            int: 寫入的欄位數量
+        """
+        with self._lock:
+            counters, self._counters = self._counters, defaultdict(int)
+            latency, self._latency = self._latency, defaultdict(int)
+
+        if not counters and not latency:
+            return 0
+
+        series: Dict[Tuple[str, int], Dict[str, int]] = defaultdict(dict)
+        totals: Dict[str, int] = defaultdict(int)
+        for (site, minute, metric), value in counters.items():
+            series[(site, minute)][metric] = value
+            if metric in self.TOTALS:
+                totals[self.TOTALS[metric]] += value
+        for (site, minute, stage, bucket), value in latency.items():
+            series[(site, minute)][f"lat:{stage}:{bucket}"] = value
+
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for (site, minute), fields in series.items():
+                    key = key_fn(self.series_key(site, minute))
+                    for field, value in fields.items():
+                        pipe.hincrby(key, field, value)
+                    pipe.expire(key, SERIES_TTL)
+                pipe.sadd(key_fn(self.sites_key),
+                          *{site for site, _ in series})
+                for field, value in totals.items():
+                    pipe.hincrby(stats_key, field, value)
+                pipe.hset(stats_key, 'last_update', datetime.now().isoformat())
+                await pipe.execute()
+        except Exception as e:
+            # 寫入失敗時放回本地，下次 flush 再試
+            logger.error(f"寫入統計資料失敗: {str(e)}")
+            with self._lock:
+                for key, value in counters.items():
+                    self._counters[key] += value
+                for key, value in latency.items():
+                    self._latency[key] += value
+            return 0
+
+        return sum(len(fields) for fields in series.values())
+
+    def start(self, flush: Callable[[], Any]):
+        """啟動定期 flush 的背景任務"""
+        if self._flush_task and not self._flush_task.done():
+            return
+
+        async def _loop():
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await flush()
+
+        self._flush_task = asyncio.create_task(_loop())
+
+    @property
+    def running(self) -> bool:
+        """定期 flush 的背景任務是否運行中"""
+        return self._flush_task is not None and not self._flush_task.done()
+
+    async def stop(self):
+        """停止背景任務"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+    @staticmethod
+    def _percentile(histogram: Dict[str, int], ratio: float
+                    ) -> Optional[float]:
+        """以直方圖估計百分位數，返回所在桶的上界"""
+        total = sum(histogram.values())
+        if not total:
+            return None
+        threshold = total * ratio
+        running = 0
+        for index in range(len(LATENCY_BUCKETS) + 1):
+            running += histogram.get(_bucket_label(index), 0)
+            if running >= threshold:
+                return (LATENCY_BUCKETS[index]
+                        if index < len(LATENCY_BUCKETS) else float('inf'))
+        return float('inf')
+
+    async def query(self, client: redis.Redis,
+                    key_fn: Callable[[str], str],
+                    site: Optional[str] = None,
+                    minutes: int = 15) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        查詢最近 N 分鐘的每分鐘吞吐量
+        Returns:
+            {網站: [{minute, discovered, fetched, failed, bytes, latency}, ...]}
+        """
+        if site:
+            sites = [site]
+        else:
+            sites = sorted(await client.smembers(
+                key_fn(self.sites_key)))  # type: ignore
+
+        current = self._minute()
+        minute_range = list(range(current - minutes + 1, current + 1))
+
+        async with client.pipeline(transaction=False) as pipe:
+            for name in sites:
+                for minute in minute_range:
+                    pipe.hgetall(key_fn(self.series_key(name, minute)))
+            rows = await pipe.execute()
+
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        rows_iter = iter(rows)
+        for name in sites:
+            series = []
+            for minute in minute_range:
+                raw = next(rows_iter) or {}
+                entry: Dict[str, Any] = {
+                    'minute': datetime.fromtimestamp(minute * 60).isoformat(),
+                }
+                for metric in self.METRICS:
+                    entry[metric] = int(raw.get(metric, 0))
+
+                # 整理各階段的延遲直方圖
+                stages: Dict[str, Dict[str, int]] = defaultdict(dict)
+                for field, value in raw.items():
+                    if field.startswith('lat:'):
+                        _, stage, bucket = field.split(':', 2)
+                        stages[stage][bucket] = int(value)
+                entry['latency'] = {}
+                for stage, histogram in stages.items():
+                    sum_ms = histogram.pop('sum_ms', 0)
+                    count = sum(histogram.values())
+                    entry['latency'][stage] = {
+                        'count': count,
+                        'avg': sum_ms / 1000 / count if count else None,
+                        'p50': self._percentile(histogram, 0.5),
+                        'p95': self._percentile(histogram, 0.95),
+                    }
+                series.append(entry)
+            result[name] = series
+        return result
+
+
+# worker 行程內共用的統計，由 worker 事件循環上的背景任務定期寫入
+crawler_stats = StatsAggregator()
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import uuid
+from typing import Optional
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLostError(Exception):
+    """租約已遺失，其他持有者可能已開始執行"""
+    pass
+
+
+class RedisLease:
+    """
+    以 Redis 實現的分散式租約
+    取得後由背景心跳定期續期，持有者異常退出時租約會在 TTL 後自動過期
+    """
+    # 只有持有者(token 相符)才能續期或釋放
+    RENEW_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('pexpire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+    RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(
+            self,
+            client: redis.Redis,
+            key: str,
+            ttl: float = 120.0,
+            heartbeat_interval: float = 30.0):
+        self.client = client
+        self.key = key
+        self.ttl_ms = int(ttl * 1000)
+        self.heartbeat_interval = heartbeat_interval
+        self.token = uuid.uuid4().hex
+        self.acquired = False
+        self.lost = False  # 心跳續期失敗，租約可能已被他人取得
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    def check(self):
+        """租約已遺失時拋出 LeaseLostError，在寫入共享狀態前呼叫"""
+        if self.lost:
+            raise LeaseLostError(f"租約 {self.key} 已遺失")
+
+    async def acquire(self) -> bool:
+        """嘗試取得租約，已被他人持有時返回False"""
+        self.acquired = bool(await self.client.set(
+            self.key, self.token, nx=True, px=self.ttl_ms))
+        if self.acquired:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        return self.acquired
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                renewed = await self.client.eval(
+                    self.RENEW_SCRIPT, 1, self.key, self.token,
+                    self.ttl_ms)  # type: ignore
+            except Exception as e:
+                logger.warning(f"租約 {self.key} 續期失敗: {str(e)}")
+                continue
+            if not renewed:
+                logger.warning(f"租約 {self.key} 已遺失")
+                self.lost = True
+                return
+
+    async def release(self):
+        """停止心跳並釋放租約"""
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+        if self.acquired:
+            await self.client.eval(
+                self.RELEASE_SCRIPT, 1, self.key, self.token)  # type: ignore
+            self.acquired = False
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.release()
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class ShutdownCoordinator:
+    """
+    優雅關閉協調器
+    收到關閉信號後 requested 變為True，長時間執行的爬取會在下一個檢查點停止，
+    並以 track() 記錄進行中的工作，讓關閉流程等待它們完成
+    """
+
+    def __init__(self):
+        # 信號處理函數在主線程觸發，爬取在事件循環線程檢查，因此使用 threading.Event
+        self._event = threading.Event()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._drained = threading.Event()
+        self._drained.set()
+
+    @property
+    def requested(self) -> bool:
+        return self._event.is_set()
+
+    def request(self):
+        """要求關閉，可在任何線程呼叫"""
+        if not self._event.is_set():
+            logger.warning("收到關閉信號，停止接收新工作並保存進度")
+        self._event.set()
+
+    def reset(self):
+        self._event.clear()
+
+    @asynccontextmanager
+    async def track(self):
+        """標記一段進行中的工作，關閉時會等待其結束"""
+        with self._lock:
+            self._in_flight += 1
+            self._drained.clear()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                if self._in_flight == 0:
+                    self._drained.set()
+
+    async def wait_drained(self, timeout: float) -> bool:
+        """等待所有進行中的工作結束，逾時返回False"""
+        drained = await asyncio.to_thread(self._drained.wait, timeout)
+        if not drained:
+            logger.warning(f"等待 {timeout:.0f} 秒後仍有 {self._in_flight} 項工作未完成")
+        return drained
+
+
+# 行程內唯一的關閉協調器
+shutdown = ShutdownCoordinator()
@@ -0,0 +1,77 @@
+import logging
+import math
+from typing import List, Optional
+
+from config.crawler.config import AdaptiveLoadConfig
+from utils.redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveLoadController:
+    """
+    第一層爬蟲加載次數的自適應控制
+    記錄每次執行最後一次出現新URL的加載深度，
+    以最近幾次的分位數作為下次的 load_count，讓瀏覽器時間跟隨網站實際的發稿量；
+    每隔數次執行做一次不限次數的深度爬取，補回被截斷的部分
+    紀錄存放在 meta 分片的 loads:site:{網站} list
+    """
+
+    def __init__(
+            self,
+            redis_client: RedisClient,
+            config: Optional[AdaptiveLoadConfig] = None):
+        self.redis_client = redis_client
+        self.config = config or AdaptiveLoadConfig()
+
+    def _key(self, kind: str, name: str) -> str:
+        return self.redis_client.router.meta.key(f"{kind}:site:{name}")
+
+    @property
+    def _client(self):
+        return self.redis_client.client_for(self.redis_client.router.meta)
+
+    async def get_history(self, name: str) -> List[int]:
+        """最近的加載深度紀錄，新的在前"""
+        values = await self._client.lrange(
+            self._key('loads', name), 0, -1)  # type: ignore
+        return [int(value) for value in values]
+
+    def quantile(self, history: List[int]) -> int:
+        """以最近鄰排名法計算分位數"""
+        ordered = sorted(history)
+        rank = max(1, math.ceil(self.config.quantile * len(ordered)))
+        return ordered[rank - 1]
+
+    async def load_count(self, name: str) -> int:
+        """下次執行的加載次數，-1 表示不限制(深度爬取)"""
+        runs = await self._client.hincrby(
+            self._key('schedule', name), 'runs_since_deep', 1)  # type: ignore
+        if runs >= self.config.deep_crawl_every:
+            await self._client.hset(  # type: ignore
+                self._key('schedule', name), 'runs_since_deep', 0)
+            logger.info(f"{name} 執行深度爬取")
+            return -1
+
+        history = await self.get_history(name)
+        if len(history) < self.config.min_samples:
+            return -1
+        return max(self.config.min_loads,
+                   self.quantile(history) + self.config.margin)
+
+    async def record(self, name: str, productive_depth: int,
+                     exhausted: bool = True):
+        """
+        記錄一次執行的結果
+        Args:
+            productive_depth: 最後一次出現新URL的加載深度
+            exhausted: 是否滾動到沒有新URL為止；到達加載上限時最後一次
+                仍有新URL，真正的深度未知，記為上限+1 讓分位數可以成長
+        """
+        depth = productive_depth if exhausted else productive_depth + 1
+        key = self._key('loads', name)
+        async with self.redis_client.pipeline(
+                self.redis_client.router.meta) as pipe:
+            pipe.lpush(key, depth)
+            pipe.ltrim(key, 0, self.config.window - 1)
+            await pipe.execute()
@@ -0,0 +1,428 @@
+import asyncio
+import bisect
+import functools
+import inspect
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.crawler.config import MetricsConfig
+
+logger = logging.getLogger(__name__)
+
+# 各階段耗時直方圖的桶上界(秒)，涵蓋 Redis 指令到瀏覽器滾動等待
+STAGE_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues,
+                   extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+_LE = re.compile(r',?le="([^"]+)"')
+
+
+def _series_order(item: Tuple[str, float]):
+    """同一組標籤的樣本排在一起，直方圖的桶依上界遞增"""
+    series = item[0]
+    match = _LE.search(series)
+    if not match:
+        return series, float('inf')
+    bound = match.group(1)
+    return _LE.sub('', series), float('inf') if bound == '+Inf' else float(bound)
+
+
+class _Metric(ABC):
+    kind = ''
+
+    def __init__(self, registry: 'MetricsRegistry', name: str,
+                 documentation: str, labels: Iterable[str]):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(後綴, 標籤字串, 數值)"""
+        pass
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {value:g}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels: str):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] += amount
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            values = dict(self._values)
+        return [('', _format_labels(self.label_names, key), value)
+                for key, value in values.items()]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = STAGE_BUCKETS,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        # 標籤 -> [各桶數量..., 超過上界的數量]，累積計數在輸出時計算
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = defaultdict(float)
+
+    def observe(self, value: float, **labels: str):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self._sums[key] += value
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            counts = {key: list(value) for key, value in self._counts.items()}
+            sums = dict(self._sums)
+        result = []
+        for key, bucket_counts in counts.items():
+            running = 0
+            for bound, count in zip(self.buckets, bucket_counts):
+                running += count
+                result.append(('_bucket', _format_labels(
+                    self.label_names, key, f'le="{bound:g}"'), running))
+            running += bucket_counts[-1]
+            result.append(('_bucket', _format_labels(
+                self.label_names, key, 'le="+Inf"'), running))
+            result.append(('_sum', _format_labels(self.label_names, key),
+                           sums[key]))
+            result.append(('_count', _format_labels(self.label_names, key),
+                           running))
+        return result
+
+
+class _NullTimer:
+    """停用時的計時器，不讀取時鐘"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    """計時器，同時支援 with 與 async with，發生例外時額外計數"""
+    __slots__ = ('histogram', 'labels', '_start')
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.histogram.observe(time.perf_counter() - self._start, **self.labels)
+        if exc_type is not None:
+            self.histogram.registry.errors.inc(**self.labels)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self.__exit__(exc_type, exc_val, exc_tb)
+
+
+class MetricsRegistry:
+    """
+    行程內的效能指標
+    - stage_seconds: 各處理階段耗時直方圖，以 stage / site 為標籤
+    - events: 各網站的事件計數(找到的元素、下載位元組數等)
+    停用時 timer() 返回共用的空計時器、inc/observe 直接返回，幾乎沒有額外成本
+    指標可由 HTTP 端點以 Prometheus 文字格式輸出，或定期推送到 Redis，
+    由 `python -m utils.metrics` 合併所有 worker 行程後輸出
+    """
+
+    def __init__(self, config: Optional[MetricsConfig] = None):
+        self.config = config or MetricsConfig()
+        self.enabled = self.config.enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self.stage_seconds = self.histogram(
+            'crawler_stage_seconds', '各處理階段耗時(秒)', ('stage', 'site'))
+        self.errors = self.counter(
+            'crawler_stage_errors_total', '各處理階段發生例外的次數',
+            ('stage', 'site'))
+        self.events = self.counter(
+            'crawler_events_total', '各網站的事件計數', ('event', 'site'))
+        self._http_server: Optional[ThreadingHTTPServer] = None
+        self._push_task: Optional[asyncio.Task] = None
+
+    def counter(self, name: str, documentation: str,
+                labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str,
+                  labels: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = STAGE_BUCKETS) -> Histogram:
+        return self._register(
+            Histogram(self, name, documentation, labels, buckets=buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"指標已存在: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    # ---- 計時 ----
+
+    def timer(self, stage: str, site: str = ''):
+        """以 with / async with 記錄一段程式的耗時"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.stage_seconds, {'stage': stage, 'site': site})
+
+    def timed(self, stage: str,
+              site: Optional[Callable[..., str]] = None):
+        """
+        記錄函數耗時的裝飾器，支援同步與異步函數
+        Args:
+            stage: 階段名稱
+            site: 以函數參數取得網站標籤的函數，例如 lambda self, url: url
+        """
+        def decorator(func):
+            def _labels(args, kwargs) -> str:
+                if site is None:
+                    return ''
+                try:
+                    return str(site(*args, **kwargs))
+                except Exception:
+                    return ''
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    with self.timer(stage, _labels(args, kwargs)):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.timer(stage, _labels(args, kwargs)):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, event: str, site: str = '', amount: float = 1):
+        self.events.inc(amount, event=event, site=site)
+
+    # ---- 輸出 ----
+
+    def render(self) -> str:
+        """Prometheus 文字格式"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, float]:
+        """{指標名稱\t後綴{標籤}: 數值}，用於推送到 Redis 後跨行程合併"""
+        return {f"{metric.name}\t{suffix}{labels}": value
+                for metric in self._metrics.values()
+                for suffix, labels, value in metric.samples()}
+
+    def start_http_server(self, port: Optional[int] = None,
+                          render: Optional[Callable[[], str]] = None):
+        """在背景線程啟動 /metrics 端點"""
+        if self._http_server is not None:
+            return
+        render = render or self.render
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = render().encode('utf-8')
+                self.send_response(200)
+                self.send_header(
+                    'Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._http_server = ThreadingHTTPServer(
+            ('0.0.0.0', port or self.config.http_port), _Handler)
+        threading.Thread(target=self._http_server.serve_forever,
+                         name='metrics-http', daemon=True).start()
+        logger.info(f"指標端點: http://0.0.0.0:{port or self.config.http_port}/metrics")
+
+    def stop_http_server(self):
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server = None
+
+    # ---- 推送到 Redis ----
+
+    @staticmethod
+    def process_id() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    async def push(self, redis_client) -> int:
+        """將目前的累計值寫入 meta 分片的 metrics:proc:{主機}:{pid}，返回樣本數"""
+        snapshot = self.snapshot()
+        if not snapshot:
+            return 0
+        meta = redis_client.router.meta
+        key = meta.key(f"{self.config.redis_prefix}:{self.process_id()}")
+        async with redis_client.pipeline(meta) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=snapshot)
+            # 行程結束後資料自然過期，不再計入合併結果
+            pipe.expire(key, self.config.redis_ttl)
+            await pipe.execute()
+        return len(snapshot)
+
+    def start_push(self, redis_client):
+        """在當前事件循環定期推送"""
+        if not self.enabled or (self._push_task and not self._push_task.done()):
+            return
+
+        async def _loop():
+            while True:
+                await asyncio.sleep(self.config.push_interval)
+                try:
+                    await self.push(redis_client)
+                except Exception as e:
+                    logger.warning(f"推送指標失敗: {e}")
+
+        self._push_task = asyncio.create_task(_loop())
+
+    async def stop_push(self, redis_client=None):
+        """停止定期推送，提供 redis_client 時最後再推送一次"""
+        if self._push_task:
+            self._push_task.cancel()
+            try:
+                await self._push_task
+            except asyncio.CancelledError:
+                pass
+            self._push_task = None
+        if redis_client is not None and self.enabled:
+            await self.push(redis_client)
+
+    async def collect(self, redis_client) -> str:
+        """合併所有行程推送到 Redis 的樣本(相同樣本加總)，以 Prometheus 文字格式輸出"""
+        meta = redis_client.router.meta
+        client = redis_client.client_for(meta)
+        pattern = meta.key(f"{self.config.redis_prefix}:*")
+        totals: Dict[str, float] = defaultdict(float)
+        async for key in client.scan_iter(match=pattern, count=100):
+            for sample, value in (await client.hgetall(key)).items():
+                totals[sample] += float(value)
+
+        grouped: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for sample, value in totals.items():
+            name, _, series = sample.partition('\t')
+            grouped[name][series] = value
+
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            samples = grouped.get(metric.name)
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{metric.name}{series} {value:g}" for series, value
+                         in sorted(samples.items(), key=_series_order))
+        return '\n'.join(lines) + '\n'
+
+
+# 行程內共用的指標
+metrics = MetricsRegistry()
+
+
+def main():
+    """合併 Redis 中各 worker 的指標並以 HTTP 端點輸出"""
+    import argparse
+    from utils.redis_client import RedisClient
+
+    parser = argparse.ArgumentParser(description='合併各 worker 的指標並輸出')
+    parser.add_argument('--port', type=int, default=metrics.config.http_port)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    redis_client = RedisClient()
+
+    def _render() -> str:
+        return asyncio.run_coroutine_threadsafe(
+            metrics.collect(redis_client), loop).result(10)
+
+    metrics.start_http_server(args.port, render=_render)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
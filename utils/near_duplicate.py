@@ -0,0 +1,345 @@
+import base64
+import hashlib
+import logging
+import re
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config.crawler.config import NearDuplicateConfig
+from models.article import News
+from utils.redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# 標點、空白與常見符號不列入特徵，避免排版差異影響簽章
+_NOISE = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """中文沒有空白分詞，以連續 size 個字作為特徵"""
+    text = _NOISE.sub('', text.lower())
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(),
+        'little')
+
+
+class MinHasher:
+    """
+    MinHash 簽章
+    兩段文字簽章中相同位置相等的比例，即為特徵集合 Jaccard 相似度的估計
+    排列參數以固定種子產生，所有 worker 的簽章可以互相比較
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3,
+                 seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(
+            1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(
+            0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        features = shingles(text, self.shingle_size)
+        if not features:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter((_shingle_hash(s) for s in features),
+                             dtype=np.uint64, count=len(features))
+        # (a * h + b) mod p，每個排列取最小值
+        permuted = (hashes[:, None] * self._a + self._b) \
+            % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """以兩個 MinHash 簽章估計 Jaccard 相似度"""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def _collision_probability(s: float, bands: int, rows: int) -> float:
+    """相似度 s 的兩份文件至少一段相同(成為候選)的機率"""
+    return 1 - (1 - s ** rows) ** bands
+
+
+@lru_cache(maxsize=None)
+def optimal_bands(threshold: float, num_perm: int,
+                  false_negative_weight: float = 0.7) -> Tuple[int, int]:
+    """
+    選擇 LSH 的段數與每段列數
+    以數值積分估計門檻以下成為候選(多餘比對)與門檻以上未成為候選(漏判)的機率，
+    取加權總和最小的組合；漏判無法補救，因此權重較高
+    計算需要數十毫秒，結果依參數快取，每個行程只計算一次
+    """
+    steps = 100
+    below = [threshold * i / steps for i in range(steps)]
+    above = [threshold + (1 - threshold) * i / steps for i in range(steps)]
+
+    best = (num_perm, 1)
+    best_error = float('inf')
+    # 段數乘列數不必剛好等於簽章長度，多出的位置不參與分段
+    for bands, rows in ((b, r) for b in range(1, num_perm + 1)
+                        for r in range(1, num_perm // b + 1)):
+        false_positive = sum(_collision_probability(s, bands, rows)
+                             for s in below) * threshold / steps
+        false_negative = sum(1 - _collision_probability(s, bands, rows)
+                             for s in above) * (1 - threshold) / steps
+        error = ((1 - false_negative_weight) * false_positive +
+                 false_negative_weight * false_negative)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+def encode_signature(signature: np.ndarray) -> str:
+    return base64.b64encode(signature.astype('<u4').tobytes()).decode('ascii')
+
+
+def decode_signature(value: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(value), dtype='<u4')
+
+
+@dataclass
+class DuplicateMatch:
+    """相似新聞比對結果"""
+    doc_id: str
+    cluster_id: str                       # 群組代表(最早出現的新聞)
+    duplicate_of: Optional[str] = None    # 最相似的既有新聞，None 表示新群組
+    similarity: Optional[float] = None
+    source: Optional[str] = None          # 最相似新聞的來源(媒體)
+
+    @property
+    def is_duplicate(self) -> bool:
+        return self.duplicate_of is not None
+
+
+# 索引候選: (文件ID, 簽章, 群組ID, 來源)
+Candidate = Tuple[str, np.ndarray, str, str]
+
+
+class NearDuplicateIndex(ABC):
+    """
+    MinHash LSH 分段索引的抽象基類
+    簽章切成多段，每段雜湊後作為桶，只比對至少一段落在同一桶的文件，
+    查詢成本與候選數相關而不是索引總量
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 128):
+        self.threshold = threshold
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+
+    def band_keys(self, signature: np.ndarray) -> List[str]:
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(
+                chunk.tobytes(), digest_size=8).hexdigest()
+            keys.append(f"{band}:{digest}")
+        return keys
+
+    @abstractmethod
+    async def candidates(self, signature: np.ndarray) -> List[Candidate]:
+        """返回至少一段落在同一桶的候選"""
+        pass
+
+    @abstractmethod
+    async def add(self, doc_id: str, signature: np.ndarray,
+                  cluster_id: str, source: str = ''):
+        """加入索引並記錄所屬群組與來源"""
+        pass
+
+    @abstractmethod
+    async def get_cluster(self, doc_id: str) -> List[str]:
+        """返回與文件同群組的所有文件ID"""
+        pass
+
+    async def match(self, doc_id: str, signature: np.ndarray,
+                    source: str = '') -> DuplicateMatch:
+        """查找最相似的既有文件並把新文件加入索引"""
+        best: Optional[Tuple[float, Candidate]] = None
+        for candidate in await self.candidates(signature):
+            if candidate[0] == doc_id:
+                continue
+            score = similarity(signature, candidate[1])
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, candidate)
+
+        if best is None:
+            result = DuplicateMatch(doc_id, cluster_id=doc_id)
+        else:
+            score, (other_id, _, cluster_id, other_source) = best
+            result = DuplicateMatch(
+                doc_id, cluster_id, other_id, score, other_source)
+        await self.add(doc_id, signature, result.cluster_id, source)
+        return result
+
+
+class InMemoryNearDuplicateIndex(NearDuplicateIndex):
+    """行程內索引，適合單次批量處理或測試"""
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 128):
+        super().__init__(threshold, num_perm)
+        self._buckets: Dict[str, Set[str]] = {}
+        self._docs: Dict[str, Tuple[np.ndarray, str, str]] = {}
+        self._members: Dict[str, Set[str]] = {}
+
+    async def candidates(self, signature: np.ndarray) -> List[Candidate]:
+        found: Set[str] = set()
+        for key in self.band_keys(signature):
+            found.update(self._buckets.get(key, ()))
+        return [(doc_id, *self._docs[doc_id]) for doc_id in found]
+
+    async def add(self, doc_id: str, signature: np.ndarray,
+                  cluster_id: str, source: str = ''):
+        for key in self.band_keys(signature):
+            self._buckets.setdefault(key, set()).add(doc_id)
+        self._docs[doc_id] = (signature, cluster_id, source)
+        self._members.setdefault(cluster_id, set()).add(doc_id)
+
+    async def get_cluster(self, doc_id: str) -> List[str]:
+        if doc_id not in self._docs:
+            return []
+        return sorted(self._members[self._docs[doc_id][1]])
+
+
+class RedisNearDuplicateIndex(NearDuplicateIndex):
+    """
+    存放在 Redis meta 分片的索引，多個 worker 共用
+    - dedup:band:{段}:{雜湊}  set  落在同一桶的文件ID
+    - dedup:doc:{文件ID}      string "簽章 群組ID 來源"
+    - dedup:cluster:{群組}    set  群組成員
+    索引鍵都設有 TTL，每份文件各自過期，過期的轉載不再比對；
+    桶與群組中已過期文件的ID在讀取時略過，隨桶與群組的 TTL 一併清除
+    """
+
+    def __init__(self, redis_client: RedisClient, threshold: float = 0.6,
+                 num_perm: int = 128, ttl: int = 7 * 86400):
+        super().__init__(threshold, num_perm)
+        self.redis_client = redis_client
+        self.ttl = ttl
+
+    def _key(self, name: str) -> str:
+        return self.redis_client.router.meta.key(f"dedup:{name}")
+
+    @staticmethod
+    def _decode_doc(value: str) -> Tuple[np.ndarray, str, str]:
+        signature, cluster_id, source = value.split(' ', 2)
+        return decode_signature(signature), cluster_id, source
+
+    async def candidates(self, signature: np.ndarray) -> List[Candidate]:
+        meta = self.redis_client.router.meta
+        async with self.redis_client.pipeline(meta) as pipe:
+            for key in self.band_keys(signature):
+                pipe.smembers(self._key(f"band:{key}"))
+            buckets = await pipe.execute()
+        doc_ids = sorted(set().union(*buckets))
+        if not doc_ids:
+            return []
+
+        values = await self.redis_client.redis.mget(
+            [self._key(f"doc:{doc_id}") for doc_id in doc_ids])
+        return [(doc_id, *self._decode_doc(value))
+                for doc_id, value in zip(doc_ids, values) if value]
+
+    async def add(self, doc_id: str, signature: np.ndarray,
+                  cluster_id: str, source: str = ''):
+        meta = self.redis_client.router.meta
+        cluster_key = self._key(f"cluster:{cluster_id}")
+        async with self.redis_client.pipeline(meta) as pipe:
+            for key in self.band_keys(signature):
+                band_key = self._key(f"band:{key}")
+                pipe.sadd(band_key, doc_id)
+                pipe.expire(band_key, self.ttl)
+            # 以空白分隔，來源放在最後，可包含空白
+            pipe.set(self._key(f"doc:{doc_id}"),
+                     f"{encode_signature(signature)} {cluster_id} {source}",
+                     ex=self.ttl)
+            pipe.sadd(cluster_key, doc_id)
+            pipe.expire(cluster_key, self.ttl)
+            await pipe.execute()
+
+    async def get_cluster(self, doc_id: str) -> List[str]:
+        client = self.redis_client.redis
+        value = await client.get(self._key(f"doc:{doc_id}"))
+        if not value:
+            return []
+        _, cluster_id, _ = self._decode_doc(value)
+        members = sorted(await client.smembers(
+            self._key(f"cluster:{cluster_id}")))  # type: ignore
+        # 只返回尚未過期的成員
+        values = await client.mget(
+            [self._key(f"doc:{member}") for member in members])
+        return [member for member, value in zip(members, values) if value]
+
+
+class NearDuplicateDetector:
+    """
+    跨媒體相似新聞偵測
+    以標題加摘要的 MinHash 查詢 LSH 索引，相似的新聞歸入同一群組
+    """
+
+    def __init__(self, index: NearDuplicateIndex,
+                 config: Optional[NearDuplicateConfig] = None):
+        self.index = index
+        self.config = config or NearDuplicateConfig()
+        self.hasher = MinHasher(self.config.num_perm,
+                                self.config.shingle_size)
+
+    def signature(self, news: News) -> np.ndarray:
+        return self.hasher.signature(f"{news.title} {news.description}")
+
+    async def check(self, news: News) -> DuplicateMatch:
+        return await self.index.match(
+            news.url, self.signature(news), news.media_name)
+
+    async def check_many(self, items: List[News]) -> List[DuplicateMatch]:
+        """依序比對一批新聞，同一批內的相似新聞也會互相歸群"""
+        started = time.perf_counter()
+        matches = [await self.check(news) for news in items]
+        duplicates = sum(match.is_duplicate for match in matches)
+        if duplicates:
+            logger.info(
+                f"相似新聞 {duplicates}/{len(items)} 筆, "
+                f"耗時 {time.perf_counter() - started:.3f}s")
+        return matches
+
+    def filter_duplicates(self, items: List[News],
+                          matches: List[DuplicateMatch]) -> List[News]:
+        """移除其他媒體已有的相似新聞，同一媒體的更新版本仍保留"""
+        return [news for news, match in zip(items, matches)
+                if not match.is_duplicate or match.source == news.media_name]
+
+    async def get_cluster(self, url: str) -> List[str]:
+        """返回與新聞相似的所有新聞URL"""
+        return await self.index.get_cluster(url)
+
+
+def create_near_duplicate_detector(
+        redis_client: Optional[RedisClient] = None,
+        config: Optional[NearDuplicateConfig] = None
+) -> NearDuplicateDetector:
+    """根據配置創建相似新聞偵測器"""
+    config = config or NearDuplicateConfig()
+    if config.backend == 'redis':
+        index: NearDuplicateIndex = RedisNearDuplicateIndex(
+            redis_client or RedisClient(), config.threshold,
+            config.num_perm, config.ttl)
+    elif config.backend == 'memory':
+        index = InMemoryNearDuplicateIndex(config.threshold, config.num_perm)
+    else:
+        raise ValueError(f"不支援的相似新聞索引後端: {config.backend}")
+    return NearDuplicateDetector(index, config)
@@ -0,0 +1,418 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from config.redis import constants as RedisConfig
+from config.storage.config import PageStoreConfig
+from utils.redis_pool import RedisPoolManager, redis_pool_manager
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # 未安裝 zstandard 時退回 gzip
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# html:pending 中儲存的引用前綴，用來區分舊版直接存放的 HTML
+REF_PREFIX = 'pagestore:'
+
+
+class PageCodec:
+    """網頁內容壓縮編解碼器，壓縮後的資料以 1 byte 標頭記錄壓縮方式"""
+    HEADERS = {'zstd': b'z', 'gzip': b'g', 'none': b'n'}
+
+    def __init__(self, name: str = 'zstd', level: int = 3):
+        if name == 'zstd' and zstandard is None:
+            logger.warning("未安裝 zstandard，改用 gzip 壓縮網頁內容")
+            name = 'gzip'
+        if name not in self.HEADERS:
+            raise ValueError(f"不支援的壓縮方式: {name}")
+
+        self.name = name
+        self.level = level
+        self._local = threading.local()  # zstd 壓縮器不可跨線程共用
+
+    def _zstd_compressor(self):
+        if not hasattr(self._local, 'compressor'):
+            self._local.compressor = zstandard.ZstdCompressor(
+                level=self.level)
+        return self._local.compressor
+
+    def _zstd_decompressor(self):
+        if not hasattr(self._local, 'decompressor'):
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.decompressor
+
+    def compress(self, data: bytes) -> bytes:
+        if self.name == 'zstd':
+            body = self._zstd_compressor().compress(data)
+        elif self.name == 'gzip':
+            body = gzip.compress(data, compresslevel=self.level)
+        else:
+            body = data
+        return self.HEADERS[self.name] + body
+
+    def decompress(self, payload: bytes) -> bytes:
+        header, body = payload[:1], payload[1:]
+        if header == b'z':
+            if zstandard is None:
+                raise RuntimeError("資料以 zstd 壓縮，但未安裝 zstandard")
+            return self._zstd_decompressor().decompress(body)
+        if header == b'g':
+            return gzip.decompress(body)
+        if header == b'n':
+            return body
+        raise ValueError(f"未知的壓縮標頭: {header!r}")
+
+
+class PageStore(ABC):
+    """原始網頁儲存的抽象基類，Redis 中只保留 put() 返回的引用"""
+    backend_name = ''
+
+    def __init__(self, config: Optional[PageStoreConfig] = None):
+        self.config = config or PageStoreConfig()
+        self.codec = PageCodec(self.config.codec,
+                               self.config.compression_level)
+
+    def make_key(self, url: str, data: bytes) -> str:
+        """產生儲存鍵，開啟去重時相同內容會得到相同的鍵"""
+        digest = hashlib.sha256(data)
+        if not self.config.dedup:
+            digest.update(url.encode('utf-8'))
+            digest.update(str(time.time_ns()).encode())
+        return digest.hexdigest()
+
+    def make_ref(self, key: str) -> str:
+        return f"{REF_PREFIX}{self.backend_name}:{key}"
+
+    def parse_ref(self, ref: str) -> Optional[str]:
+        """從引用中取出儲存鍵，引用不屬於此後端時返回None"""
+        prefix = f"{REF_PREFIX}{self.backend_name}:"
+        if not ref.startswith(prefix):
+            return None
+        return ref[len(prefix):]
+
+    @staticmethod
+    def is_ref(value: Optional[str]) -> bool:
+        return bool(value) and value.startswith(REF_PREFIX)  # type: ignore
+
+    @abstractmethod
+    async def put(self, url: str, html: str) -> str:
+        """保存網頁內容，返回引用"""
+        pass
+
+    @abstractmethod
+    async def get(self, ref: str) -> Optional[str]:
+        """根據引用讀取網頁內容，已被淘汰時返回None"""
+        pass
+
+    @abstractmethod
+    async def evict(self) -> int:
+        """依照 TTL 和容量上限淘汰舊資料，返回淘汰的筆數"""
+        pass
+
+    async def close(self):
+        """清理資源"""
+        pass
+
+
+@dataclass
+class _IndexEntry:
+    """分段檔索引項: 所在分段、偏移量、長度、寫入時間"""
+    segment: int
+    offset: int
+    length: int
+    timestamp: float
+
+
+@dataclass
+class _SegmentInfo:
+    size: int = 0
+    last_write: float = 0.0
+
+
+class SegmentedFilePageStore(PageStore):
+    """
+    本地分段追加式檔案儲存
+    - 內容依序追加到 segments/seg-XXXXXX.dat，超過容量後換新分段
+    - index.log 為追加式偏移索引，啟動時重播以還原索引
+    - 淘汰以整個分段為單位，淘汰後重寫索引
+    - mmap_reads 開啟時以 mmap 讀取分段檔，重複讀取不需要每次開檔與複製
+    索引保存在行程記憶體中，分段檔的追加與淘汰不跨行程協調，
+    只適用單一行程(離線語料、solo worker)；prefork worker 請使用 redis 後端
+    """
+    backend_name = 'file'
+
+    def __init__(self, config: Optional[PageStoreConfig] = None):
+        super().__init__(config)
+        self.root = Path(self.config.root_dir)
+        self.segment_dir = self.root / 'segments'
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / 'index.log'
+
+        self._lock = threading.Lock()
+        self._index: Dict[str, _IndexEntry] = {}
+        self._segments: Dict[int, _SegmentInfo] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._load_index()
+        self._active_segment = max(self._segments, default=0) or 1
+        self._segments.setdefault(self._active_segment, _SegmentInfo())
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.segment_dir / f"seg-{segment:06d}.dat"
+
+    def _load_index(self):
+        """重播索引日誌，只保留分段檔仍存在的項目"""
+        for path in self.segment_dir.glob('seg-*.dat'):
+            segment = int(path.stem.split('-')[1])
+            stat = path.stat()
+            self._segments[segment] = _SegmentInfo(
+                size=stat.st_size, last_write=stat.st_mtime)
+
+        if not self.index_path.exists():
+            return
+
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 最後一行可能因中斷而寫入不完整
+                    logger.warning("略過損壞的索引記錄")
+                    continue
+                if record['s'] not in self._segments:
+                    continue
+                self._index[record['k']] = _IndexEntry(
+                    record['s'], record['o'], record['n'], record['t'])
+
+    def _rewrite_index(self):
+        """以目前索引內容重寫 index.log"""
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key, entry in self._index.items():
+                f.write(json.dumps({
+                    'k': key, 's': entry.segment, 'o': entry.offset,
+                    'n': entry.length, 't': entry.timestamp}) + '\n')
+        os.replace(tmp_path, self.index_path)
+
+    def _put_sync(self, url: str, html: str) -> str:
+        data = html.encode('utf-8')
+        key = self.make_key(url, data)
+
+        rotated = False
+        with self._lock:
+            # 相同內容在使用中的分段才直接沿用，位於舊分段時重新寫入，
+            # 避免返回的引用隨舊分段一起被淘汰
+            existing = self._index.get(key) if self.config.dedup else None
+            if existing and existing.segment == self._active_segment:
+                return self.make_ref(key)
+
+            payload = self.codec.compress(data)
+            info = self._segments[self._active_segment]
+            # 超過分段容量則換新的分段檔
+            if info.size and info.size + len(payload) > self.config.segment_max_bytes:  # noqa
+                self._active_segment += 1
+                rotated = True
+                info = self._segments.setdefault(
+                    self._active_segment, _SegmentInfo())
+
+            now = time.time()
+            with open(self._segment_path(self._active_segment), 'ab') as f:
+                offset = f.tell()
+                f.write(payload)
+
+            entry = _IndexEntry(self._active_segment, offset, len(payload), now)
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    'k': key, 's': entry.segment, 'o': entry.offset,
+                    'n': entry.length, 't': entry.timestamp}) + '\n')
+
+            self._index[key] = entry
+            info.size += len(payload)
+            info.last_write = now
+
+        # 換分段時順便檢查淘汰條件
+        if rotated:
+            self._evict_sync()
+        return self.make_ref(key)
+
+    def _get_sync(self, ref: str) -> Optional[str]:
+        key = self.parse_ref(ref)
+        with self._lock:
+            entry = self._index.get(key) if key else None
+        if entry is None:
+            return None
+
+        try:
+            if self.config.mmap_reads:
+                payload = self._read_mapped(entry)
+            else:
+                with open(self._segment_path(entry.segment), 'rb') as f:
+                    f.seek(entry.offset)
+                    payload = f.read(entry.length)
+        except FileNotFoundError:
+            return None
+        return self.codec.decompress(payload).decode('utf-8')
+
+    def _read_mapped(self, entry: _IndexEntry) -> bytes:
+        with self._lock:
+            mapped = self._maps.get(entry.segment)
+            # 使用中的分段在映射後仍會追加，超出範圍時重新映射
+            if mapped is None or entry.offset + entry.length > len(mapped):
+                if mapped is not None:
+                    mapped.close()
+                with open(self._segment_path(entry.segment), 'rb') as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[entry.segment] = mapped
+            return mapped[entry.offset:entry.offset + entry.length]
+
+    def iter_pages(self) -> Iterator[Tuple[str, str]]:
+        """依寫入順序逐筆讀取所有網頁，返回 (儲存鍵, 網頁內容)"""
+        with self._lock:
+            entries = sorted(self._index.items(),
+                             key=lambda item: (item[1].segment, item[1].offset))
+        for key, _ in entries:
+            html = self._get_sync(self.make_ref(key))
+            if html is not None:
+                yield key, html
+
+    def _evict_sync(self) -> int:
+        with self._lock:
+            now = time.time()
+            expired = set()
+
+            # 1. TTL: 最後寫入時間已過期的分段
+            if self.config.ttl_seconds:
+                expired.update(
+                    segment for segment, info in self._segments.items()
+                    if segment != self._active_segment
+                    and now - info.last_write > self.config.ttl_seconds)
+
+            # 2. 容量: 從最舊的分段開始淘汰直到低於上限
+            if self.config.max_total_bytes:
+                total = sum(info.size for segment, info
+                            in self._segments.items()
+                            if segment not in expired)
+                for segment in sorted(self._segments):
+                    if total <= self.config.max_total_bytes:
+                        break
+                    if segment == self._active_segment or segment in expired:
+                        continue
+                    expired.add(segment)
+                    total -= self._segments[segment].size
+
+            if not expired:
+                return 0
+
+            removed_keys = [key for key, entry in self._index.items()
+                            if entry.segment in expired]
+            for key in removed_keys:
+                del self._index[key]
+            for segment in expired:
+                mapped = self._maps.pop(segment, None)
+                if mapped is not None:
+                    mapped.close()
+                self._segment_path(segment).unlink(missing_ok=True)
+                del self._segments[segment]
+            self._rewrite_index()
+
+        logger.info(f"已淘汰 {len(expired)} 個分段, 共 {len(removed_keys)} 筆網頁")
+        return len(removed_keys)
+
+    async def put(self, url: str, html: str) -> str:
+        return await asyncio.to_thread(self._put_sync, url, html)
+
+    async def get(self, ref: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get_sync, ref)
+
+    async def evict(self) -> int:
+        return await asyncio.to_thread(self._evict_sync)
+
+    # 同步介面，供語料與基準測試等離線工具使用
+    def put_sync(self, url: str, html: str) -> str:
+        return self._put_sync(url, html)
+
+    def get_sync(self, ref: str) -> Optional[str]:
+        return self._get_sync(ref)
+
+    def close_sync(self):
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+
+    async def close(self):
+        self.close_sync()
+
+
+class RedisPageStore(PageStore):
+    """
+    Redis 壓縮儲存，與URL佇列分開存放在 DB_PAGES
+    淘汰依靠鍵的 TTL，容量上限需搭配 Redis 的 maxmemory 設定
+    """
+    backend_name = 'redis'
+
+    def __init__(
+            self,
+            config: Optional[PageStoreConfig] = None,
+            host: str = RedisConfig.HOST,
+            port: int = RedisConfig.PORT,
+            pool_manager: Optional[RedisPoolManager] = None):
+        super().__init__(config)
+        self.host = host
+        self.port = port
+        self.pool_manager = pool_manager or redis_pool_manager
+
+    @property
+    def redis(self):
+        # 壓縮後為二進位資料，不能開啟 decode_responses
+        return self.pool_manager.get_client(
+            self.host, self.port, RedisConfig.DB_PAGES,
+            decode_responses=False)
+
+    async def put(self, url: str, html: str) -> str:
+        data = html.encode('utf-8')
+        key = self.make_key(url, data)
+        name = f"{self.config.redis_key_prefix}{key}"
+        async with self.redis.pipeline(transaction=False) as pipe:
+            # 開啟去重時使用 NX，相同內容只寫入一次
+            pipe.set(name, self.codec.compress(data),
+                     ex=self.config.ttl_seconds, nx=self.config.dedup)
+            if self.config.dedup and self.config.ttl_seconds:
+                # 已存在的內容延長保存時間，新的引用不會指向即將過期的資料
+                pipe.expire(name, self.config.ttl_seconds)
+            await pipe.execute()
+        return self.make_ref(key)
+
+    async def get(self, ref: str) -> Optional[str]:
+        key = self.parse_ref(ref)
+        if key is None:
+            return None
+        payload = await self.redis.get(f"{self.config.redis_key_prefix}{key}")
+        if payload is None:
+            return None
+        return self.codec.decompress(payload).decode('utf-8')
+
+    async def evict(self) -> int:
+        # 由 Redis TTL 自動淘汰
+        return 0
+
+
+def create_page_store(config: Optional[PageStoreConfig] = None) -> PageStore:
+    """根據配置創建網頁儲存後端"""
+    config = config or PageStoreConfig()
+    if config.backend == 'file':
+        return SegmentedFilePageStore(config)
+    if config.backend == 'redis':
+        return RedisPageStore(config)
+    raise ValueError(f"不支援的網頁儲存後端: {config.backend}")
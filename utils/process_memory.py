@@ -0,0 +1,45 @@
+import os
+from typing import Dict, Set
+
+
+def process_tree(pid: int) -> Set[int]:
+    """以 /proc 找出行程與其所有子孫行程"""
+    parents: Dict[int, int] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # comm 可能含空白，從最後一個右括號之後解析
+                fields = f.read().rsplit(')', 1)[1].split()
+            parents[int(entry)] = int(fields[1])
+        except (OSError, IndexError, ValueError):
+            continue
+
+    tree, frontier = {pid}, [pid]
+    while frontier:
+        current = frontier.pop()
+        for child, parent in parents.items():
+            if parent == current and child not in tree:
+                tree.add(child)
+                frontier.append(child)
+    return tree
+
+
+def process_memory_kb(pid: int) -> int:
+    """行程的 PSS(KB)，共用的頁面平均分攤；不支援 smaps_rollup 時改用 RSS"""
+    for path, field in ((f'/proc/{pid}/smaps_rollup', 'Pss:'),
+                        (f'/proc/{pid}/status', 'VmRSS:')):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1])
+        except OSError:
+            continue
+    return 0
+
+
+def tree_memory_mb(pid: int) -> float:
+    """行程樹的記憶體總量(MB)，用於統計 chromedriver 與其開啟的 Chrome"""
+    return sum(process_memory_kb(p) for p in process_tree(pid)) / 1024
@@ -1,54 +1,151 @@
+import asyncio
 import logging
 import json
 import time
 import redis.asyncio as redis
-from typing import Set, Optional, Dict, Any
+from collections import defaultdict
+from typing import Set, Optional, Dict, Any, List, Tuple, Iterable, Callable
 from datetime import datetime
 from config.redis import constants as RedisConfig
+from utils.page_store import PageStore
+from utils.redis_pool import RedisPoolManager, redis_pool_manager
+from utils.redis_sharding import Shard, ShardRouter, get_site_domain
+from utils.crawler_stats import StatsAggregator
+from utils.metrics import metrics
+from utils.tracing import tracer
+from utils.url_canonicalizer import URLCanonicalizer, url_canonicalizer
 
 logger = logging.getLogger(__name__)
 
 
 class RedisClient:
-    """Redis客戶端，管理所有數據庫操作"""
+    """
+    Redis客戶端，管理所有數據庫操作
+    URL 相關的鍵依網站網域分片，多分片時鍵名帶有 hash tag，例如 urls:all:{node1}
+    """
     KEYS = {
         'all': 'urls:all',              # hash 類型: URL 及其添加時間
         'pending': 'urls:pending',      # set 類型: 待處理的URLs佇列
         'failed': 'urls:failed',        # hash 類型: 失敗的URLs及其錯誤信息
         'completed': 'urls:completed',  # set 類型: 已完成處理的URLs
-        'html': 'html:pending',         # hash 類型: 儲存HTML內容
+        'html': 'html:pending',         # hash 類型: URL 及其網頁內容引用
         'stats': 'stats:crawler',       # hash 類型: 爬蟲統計信息
+        'retry': 'urls:retry',          # zset 類型: 等待重試的URLs，分數為下次嘗試時間
+        'dead': 'urls:dead',            # hash 類型: 超過重試上限的URLs
+        'backpressure': 'backpressure:state',  # hash 類型: 背壓狀態與觀測值
+        'trace': 'urls:trace',          # hash 類型: 待處理URL的追蹤上下文
     }
 
+    # 已初始化統計計數器的 Redis 目標，同一行程內只需初始化一次
+    _initialized_targets: Set[Tuple[str, int, int, Optional[str]]] = set()
+
     def __init__(
             self,
             host: str = RedisConfig.HOST,
-            port: int = RedisConfig.PORT):
-        # 創建Redis連接
-        self.redis = redis.Redis(
-            host=host,
-            port=port,
-            db=RedisConfig.DB_CRAWLER,
-            decode_responses=True,  # 將bytes解碼為str
-        )
+            port: int = RedisConfig.PORT,
+            page_store: Optional[PageStore] = None,
+            pool_manager: Optional[RedisPoolManager] = None,
+            router: Optional[ShardRouter] = None,
+            stats: Optional[StatsAggregator] = None,
+            canonicalizer: Optional[URLCanonicalizer] = None,
+            is_fetchable: Optional[Callable[[str], bool]] = None,
+            db: int = RedisConfig.DB_CRAWLER):
+        self.host = host
+        self.port = port
+        self.db = db
+        # 連接來自行程內共用的連接池，不再每個實例各自建立連接
+        self.pool_manager = pool_manager or redis_pool_manager
+        # 未指定分片配置時，以 host/port 作為唯一節點
+        self.router = router or ShardRouter(
+            nodes=[{'name': 'node0', 'host': host, 'port': port}]
+            if (host, port) != (RedisConfig.HOST, RedisConfig.PORT) else None)
+        self._clients: Dict[str, redis.Redis] = {}
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending_cursor = 0  # 輪流從各分片取出待處理URL
+        # 統計在本地聚合，定期或關閉時批量寫入
+        # 共用的統計由建立者負責定期寫入，關閉客戶端時不停止其背景任務
+        self._owns_stats = stats is None
+        self.stats = stats or StatsAggregator()
+        # 網頁內容儲存後端，未設置時沿用直接寫入 html:pending 的舊行為
+        self.page_store = page_store
+        # 寫入前統一URL形式，同一篇新聞只收錄一次
+        self.canonicalizer = canonicalizer or url_canonicalizer
+        # 只有第二層能消化的URL才進入待處理佇列，未設置時全部進入
+        self.is_fetchable = is_fetchable
+
+    def client_for(self, shard: Shard) -> redis.Redis:
+        """獲取綁定當前事件循環、指向指定分片的 Redis 客戶端"""
+        loop = asyncio.get_running_loop()
+        if self._client_loop is not loop:
+            self._clients = {}
+            self._client_loop = loop
+
+        client = self._clients.get(shard.name)
+        if client is None:
+            if self.router.cluster_mode:
+                client = self.pool_manager.get_cluster_client(
+                    shard.host, shard.port)
+            else:
+                client = self.pool_manager.get_client(
+                    shard.host, shard.port, self.db)
+            self._clients[shard.name] = client
+        return client
+
+    def pipeline(self, shard: Shard):
+        """創建分片上的 pipeline，Cluster 模式不支援 MULTI 交易"""
+        return self.client_for(shard).pipeline(
+            transaction=not self.router.cluster_mode)
+
+    def shard_key(self, shard: Shard, name: str) -> str:
+        """返回 KEYS 中指定鍵在分片上的實際鍵名"""
+        return shard.key(self.KEYS[name])
+
+    @property
+    def redis(self) -> redis.Redis:
+        """獲取存放全域資料的分片客戶端"""
+        return self.client_for(self.router.meta)
 
     async def close(self):
-        await self.redis.close()
-        await self.redis.connection_pool.disconnect()
+        """釋放客戶端，共用連接池由 pool_manager 在 worker 結束時關閉"""
+        if self._owns_stats:
+            await self.stats.stop()
+        if not self.stats.running and self.stats.has_pending():
+            await self.flush_stats()
+        if not self.router.cluster_mode:
+            for client in self._clients.values():
+                await client.close()
+        self._clients = {}
+        self._client_loop = None
+        if self.page_store:
+            await self.page_store.close()
+
+    def get_pool_metrics(self) -> List[Dict[str, Any]]:
+        """獲取連接池使用狀況"""
+        return self.pool_manager.metrics()
 
     async def __aenter__(self):
         """異步上下文管理器的進入方法"""
-        await self._initialize_redis()
+        await self._ensure_initialized()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """異步上下文管理器的退出方法"""
         await self.close()
 
+    async def _ensure_initialized(self):
+        """首次寫入前初始化Redis數據庫，不再依賴上下文管理器"""
+        meta = self.router.meta
+        target = (meta.host, meta.port, self.db, meta.tag)
+        if target in self._initialized_targets:
+            return
+        await self._initialize_redis()
+        self._initialized_targets.add(target)
+
     async def _initialize_redis(self):
         """初始化Redis數據庫"""
         # 檢查並初始化統計計數器
-        if not await self.redis.exists(self.KEYS['stats']):
+        stats_key = self.shard_key(self.router.meta, 'stats')
+        if not await self.redis.exists(stats_key):
             initial_stats = {
                 'total_urls': 0,
                 'success_count': 0,
@@ -56,123 +153,339 @@ class RedisClient:
                 'last_update': datetime.now().isoformat()
             }
             # 將整個initial_stats保存到 Redis中
-            await self.redis.hset(self.KEYS['stats'], mapping=initial_stats)
+            await self.redis.hset(stats_key, mapping=initial_stats)
 
-    async def add_urls(self, urls: Set[str]) -> Dict[str, int]:
-        """批量添加新URLs到Redis數據庫中的集合(urls:pending, urls:all)"""
-        stats = {
-            'total': len(urls),  # 輸入的URL總數
-            'new': 0,            # 新增的URL數量
-            'duplicate': 0       # 重複的URL數量
-        }
+    async def flush_stats(self) -> int:
+        """將本地累積的統計寫入 Redis"""
+        meta = self.router.meta
+        return await self.stats.flush(
+            self.client_for(meta), meta.key, self.shard_key(meta, 'stats'))
 
-        current_time = str(time.time())
+    def start_stats_flusher(self):
+        """在當前事件循環啟動定期寫入統計的背景任務"""
+        self.stats.start(self.flush_stats)
 
-        # 使用pipeline 減少與Redis通信次數，並保證操作的原子性
-        async with self.redis.pipeline() as pipe:
+    def record_latency(self, url: str, stage: str, seconds: float):
+        """記錄URL所屬網站某個處理階段的耗時"""
+        self.stats.observe_latency(get_site_domain(url), stage, seconds)
+
+    async def get_throughput(
+            self,
+            site: Optional[str] = None,
+            minutes: int = 15) -> Dict[str, List[Dict[str, Any]]]:
+        """查詢最近 N 分鐘各網站每分鐘的吞吐量與延遲"""
+        await self.flush_stats()
+        meta = self.router.meta
+        return await self.stats.query(
+            self.client_for(meta), meta.key, site=site, minutes=minutes)
+
+    async def _add_shard_urls(self, shard: Shard, urls: List[str],
+                              current_time: str,
+                              discovered_at: Optional[float] = None
+                              ) -> List[str]:
+        """將屬於同一分片的URLs寫入該分片，返回新增的URLs"""
+        all_key = self.shard_key(shard, 'all')
+
+        # 1. HSETNX 同時完成存在檢查與寫入，整批只需一次往返
+        async with self.pipeline(shard) as pipe:
             for url in urls:
-                # 檢查URL是否已存在
-                if not await self.redis.hexists(
-                        self.KEYS['all'], url):  # type: ignore
-                    # 新URL，添加到 all（帶時間戳）和 pending
-                    pipe.hset(self.KEYS['all'], url, current_time)
-                    pipe.sadd(self.KEYS['pending'], url)
-                    stats['new'] += 1
-                else:
-                    stats['duplicate'] += 1
-
-            # 更新統計信息
-            if stats['new'] > 0:  # 只有當有新URL時才更新統計
-                pipe.hincrby(self.KEYS['stats'], 'total_urls', stats['new'])
-                pipe.hset(self.KEYS['stats'], 'last_update',
-                          datetime.now().isoformat())
-
-            await pipe.execute()  # 執行所有命令
+                pipe.hsetnx(all_key, url, current_time)
+            results = await pipe.execute()
 
-        return stats
+        new_urls = [url for url, added in zip(urls, results) if added]
+        for url in new_urls:
+            self.stats.incr(get_site_domain(url), 'discovered')
+        # 2. 新URL加入待處理佇列，沒有第二層爬蟲的網站只記錄在 all 中去重
+        queued = [url for url in new_urls
+                  if self.is_fetchable is None or self.is_fetchable(url)]
+        if queued:
+            await self.client_for(shard).sadd(
+                self.shard_key(shard, 'pending'), *queued)
+            # 追蹤上下文隨URL存放在同一分片，下載時取回；
+            # 只為會被下載的URL建立，完成或移入死信時刪除
+            contexts = tracer.new_contexts(
+                queued, discovered_at or float(current_time),
+                float(current_time))
+            if contexts:
+                await self.client_for(shard).hset(
+                    self.shard_key(shard, 'trace'), mapping=contexts)
+        return new_urls
+
+    def canonicalize_urls(self, urls: Iterable[str]) -> List[str]:
+        """正規化並去重URLs，同時記錄各網站收集與合併的URL數"""
+        result = self.canonicalizer.canonicalize_many(urls)
+        seen: Dict[str, int] = defaultdict(int)
+        for url in result.urls:
+            seen[get_site_domain(url)] += 1
+        for site, collapsed in result.collapsed_by_site.items():
+            seen[site] += collapsed
+            self.stats.incr(site, 'collapsed', collapsed)
+        for site, count in seen.items():
+            self.stats.incr(site, 'seen', count)
+        return result.urls
+
+    @metrics.timed('redis_add_urls')
+    async def add_new_urls(self, urls: Iterable[str],
+                           discovered_at: Optional[float] = None
+                           ) -> List[str]:
+        """
+        批量添加URLs(寫入前先正規化)，返回其中首次出現的正規化URLs
+        Args:
+            discovered_at: 找到這些URL的列表加載開始時間，作為追蹤的起點
+        """
+        await self._ensure_initialized()
+        current_time = str(time.time())
+
+        # 依分片分組，各分片並行寫入
+        groups = self.router.group_by_shard(self.canonicalize_urls(urls))
+        results = await asyncio.gather(*[
+            self._add_shard_urls(
+                shard, shard_urls, current_time, discovered_at)
+            for shard, shard_urls in groups.items()
+        ])
+        return [url for new_urls in results for url in new_urls]
+
+    async def add_urls(self, urls: Set[str]) -> Dict[str, int]:
+        """批量添加新URLs到Redis數據庫中的集合(urls:pending, urls:all)"""
+        urls = set(urls)
+        new_urls = await self.add_new_urls(urls)
+        return {
+            'total': len(urls),                    # 輸入的URL總數
+            'new': len(new_urls),                  # 新增的URL數量
+            'duplicate': len(urls) - len(new_urls)  # 重複的URL數量
+        }
 
     async def get_pending_url(self) -> Optional[str]:
         """獲取一個待處理的URL"""
-        # spop 返回值為 str, list, None
-        result = await self.redis.spop(self.KEYS['pending'])  # type: ignore
-        return str(result) if result is not None else None
+        urls = await self.get_pending_urls(1)
+        return urls[0] if urls else None
+
+    @metrics.timed('redis_pending_urls')
+    async def get_pending_urls(self, count: int) -> List[str]:
+        """批量獲取待處理的URLs，輪流從各分片取出"""
+        shards = self.router.shards
+        results: List[str] = []
+        for i in range(len(shards)):
+            if len(results) >= count:
+                break
+            shard = shards[(self._pending_cursor + i) % len(shards)]
+            # spop 指定數量時返回列表
+            popped = await self.client_for(shard).spop(
+                self.shard_key(shard, 'pending'), count - len(results))  # type: ignore # noqa
+            results.extend(str(url) for url in popped or [])
+        self._pending_cursor = (self._pending_cursor + 1) % len(shards)
+        return results
 
     async def mark_url_completedd(self, url: str, html_content: Optional[str]
                                   ) -> bool:
         """標記URL為已完成"""
-        try:
-            async with self.redis.pipeline() as pipe:
-                # 從pending中刪除
-                pipe.srem(self.KEYS['pending'], url)
+        return await self.mark_urls_completed({url: html_content})
 
-                # 將URL添加到completed集合
-                pipe.sadd(self.KEYS['completed'], url)
+    async def _complete_shard_urls(self, shard: Shard,
+                                   pages: Dict[str, Optional[str]]):
+        """以一次 pipeline 標記同一分片上的多個URL為已完成"""
+        async with self.pipeline(shard) as pipe:
+            urls = list(pages)
+            # 從pending中刪除
+            pipe.srem(self.shard_key(shard, 'pending'), *urls)
 
-                # 保存網頁內容
-                if html_content:
-                    pipe.hset(self.KEYS['html'], url, html_content)
+            # 將URL添加到completed集合
+            pipe.sadd(self.shard_key(shard, 'completed'), *urls)
 
-                # 更新統計資料
-                pipe.hincrby(self.KEYS['stats'], 'success_count', 1)  # 增加成功數量
-                pipe.hset(self.KEYS['stats'], 'last_update',
-                          datetime.now().isoformat())
+            # 重試成功時清除失敗記錄
+            pipe.hdel(self.shard_key(shard, 'failed'), *urls)
 
-                # 執行所有操作
-                await pipe.execute()
+            # 追蹤已結束
+            pipe.hdel(self.shard_key(shard, 'trace'), *urls)
+
+            # 保存網頁內容
+            html_mapping = {url: html for url, html in pages.items() if html}
+            if html_mapping:
+                pipe.hset(self.shard_key(shard, 'html'), mapping=html_mapping)
+
+            # 執行所有操作
+            await pipe.execute()
+
+    @metrics.timed('redis_complete_urls')
+    async def mark_urls_completed(self, pages: Dict[str, Optional[str]]
+                                  ) -> bool:
+        """
+        批量標記URLs為已完成
+        Args:
+            pages: {URL: 網頁內容}，網頁內容可為None
+        """
+        try:
+            await self._ensure_initialized()
+            sizes = {url: len(html.encode('utf-8')) if html else 0
+                     for url, html in pages.items()}
+
+            # 網頁內容先寫入儲存後端，Redis 只保存引用
+            if self.page_store:
+                html_urls = [url for url, html in pages.items() if html]
+                refs = await asyncio.gather(*[
+                    self.page_store.put(url, pages[url])  # type: ignore
+                    for url in html_urls
+                ])
+                pages = {**pages, **dict(zip(html_urls, refs))}
+
+            groups = self.router.group_by_shard(pages)
+            await asyncio.gather(*[
+                self._complete_shard_urls(
+                    shard, {url: pages[url] for url in urls})
+                for shard, urls in groups.items()
+            ])
+
+            # 更新統計資料
+            for url, size in sizes.items():
+                site = get_site_domain(url)
+                self.stats.incr(site, 'fetched')
+                if size:
+                    self.stats.incr(site, 'bytes', size)
             return True
         except Exception as e:
             logger.error(f"標記URL為已完成時出現錯誤: {str(e)}")
             return False
 
-    async def mark_url_failed(self, url: str, error_msg: str) -> bool:
+    async def get_html(self, url: str) -> Optional[str]:
+        """獲取已完成URL的網頁內容"""
+        shard = self.router.shard_for_url(url)
+        value = await self.client_for(shard).hget(
+            self.shard_key(shard, 'html'), url)  # type: ignore
+        if value is None:
+            return None
+        if PageStore.is_ref(value):
+            if not self.page_store:
+                logger.warning(f"未設置網頁儲存後端，無法讀取引用: {value}")
+                return None
+            return await self.page_store.get(value)
+        return value
+
+    async def get_failure(self, url: str) -> Optional[Dict[str, Any]]:
+        """獲取URL的失敗記錄"""
+        shard = self.router.shard_for_url(url)
+        value = await self.client_for(shard).hget(
+            self.shard_key(shard, 'failed'), url)  # type: ignore
+        return json.loads(value) if value else None
+
+    async def get_trace_contexts(self, urls: Iterable[str]
+                                 ) -> Dict[str, str]:
+        """批量取回URLs的追蹤上下文，沒有上下文的URL不在結果中"""
+        groups = self.router.group_by_shard(urls)
+
+        async def _get(shard: Shard, shard_urls: List[str]):
+            values = await self.client_for(shard).hmget(
+                self.shard_key(shard, 'trace'), shard_urls)  # type: ignore
+            return {url: value for url, value in zip(shard_urls, values)
+                    if value}
+
+        results = await asyncio.gather(*[
+            _get(shard, shard_urls) for shard, shard_urls in groups.items()])
+        return {url: value for result in results
+                for url, value in result.items()}
+
+    async def mark_url_failed(self, url: str, error_msg: str,
+                              retries: int = 0) -> bool:
         """標記URL為失敗"""
         try:
+            await self._ensure_initialized()
             # Reids只能存字符串, 不能直接存python字典, 因此轉成json格式
             failed_info = json.dumps({
                 'error': error_msg,
                 'timestamp': datetime.now().isoformat(),
-                'retries': 0
+                'retries': retries
             })
 
-            async with self.redis.pipeline() as pipe:
-                pipe.hset(self.KEYS['failed'], url, failed_info)
-                pipe.hincrby(self.KEYS['stats'], 'failure_count', 1)
+            shard = self.router.shard_for_url(url)
+            async with self.pipeline(shard) as pipe:
+                pipe.hset(self.shard_key(shard, 'failed'), url, failed_info)
                 await pipe.execute()
+            self.stats.incr(get_site_domain(url), 'failed')
             return True
         except Exception as e:
             logger.error(f"標記URL為失敗時出現錯誤: {str(e)}")
             return False
 
     async def get_stats(self) -> Dict[Any, Any]:
-        """獲取爬蟲統計信息"""
-        return await self.redis.hgetall(self.KEYS['stats'])   # type: ignore
+        """獲取爬蟲統計信息，包含目前的背壓狀態"""
+        await self.flush_stats()
+        meta = self.router.meta
+        stats = await self.redis.hgetall(
+            self.shard_key(meta, 'stats'))   # type: ignore
+        stats['backpressure'] = await self.redis.hget(
+            self.shard_key(meta, 'backpressure'), 'status') or 'normal'
+        return stats
 
-    async def cleanup_old_urls(self, days: int = 7):
-        """清理指定天數前添加的URLs"""
-        cutoff_time = int(time.time()) - (days * 86400)
+    async def get_queue_depths(self) -> Dict[str, int]:
+        """獲取所有分片的待處理URL數與 html:pending 筆數"""
+        depths = {'pending': 0, 'html': 0, 'retry': 0}
+        for shard in self.router.shards:
+            async with self.pipeline(shard) as pipe:
+                pipe.scard(self.shard_key(shard, 'pending'))
+                pipe.hlen(self.shard_key(shard, 'html'))
+                pipe.zcard(self.shard_key(shard, 'retry'))
+                pending, html, retry = await pipe.execute()
+            depths['pending'] += pending
+            depths['html'] += html
+            depths['retry'] += retry
+        return depths
 
+    async def purge_unfetchable_pending(self) -> int:
+        """移除待處理佇列中第二層無法消化的URLs(設置 is_fetchable 前寫入的舊資料)"""
+        if self.is_fetchable is None:
+            return 0
+        removed = 0
+        for shard in self.router.shards:
+            client = self.client_for(shard)
+            pending_key = self.shard_key(shard, 'pending')
+            stale = [url async for url in client.sscan_iter(
+                pending_key, count=1000) if not self.is_fetchable(url)]
+            for i in range(0, len(stale), 1000):
+                removed += await client.srem(
+                    pending_key, *stale[i:i + 1000])  # type: ignore
+        if removed:
+            logger.info(f"已從待處理佇列移除 {removed} 個沒有第二層爬蟲的URLs")
+        return removed
+
+    async def _cleanup_shard(self, shard: Shard, cutoff_time: int) -> int:
+        """清理單一分片上的舊URLs"""
         # 獲取所有URL及其時間戳
-        all_urls: Dict = await self.redis.hgetall(
-            self.KEYS['all'])  # type: ignore
+        all_urls: Dict = await self.client_for(shard).hgetall(
+            self.shard_key(shard, 'all'))  # type: ignore
 
         # 找出需要刪除的URLs
         urls_to_delete = [
             url for url, timestamp in all_urls.items()
-            if int(timestamp) < cutoff_time
+            if float(timestamp) < cutoff_time
         ]
 
         if urls_to_delete:
-            async with self.redis.pipeline() as pipe:
+            async with self.pipeline(shard) as pipe:
                 # 從 all 中刪除舊的URLs
-                pipe.hdel(self.KEYS['all'], *urls_to_delete)
+                pipe.hdel(self.shard_key(shard, 'all'), *urls_to_delete)
 
                 # 同時從其他集合中也清理掉這些URL
-                for url in urls_to_delete:
-                    pipe.srem(self.KEYS['pending'], url)
-                    pipe.srem(self.KEYS['completed'], url)
-                    pipe.hdel(self.KEYS['failed'], url)
-                    pipe.hdel(self.KEYS['html'], url)
+                pipe.srem(self.shard_key(shard, 'pending'), *urls_to_delete)
+                pipe.srem(self.shard_key(shard, 'completed'), *urls_to_delete)
+                pipe.hdel(self.shard_key(shard, 'failed'), *urls_to_delete)
+                pipe.zrem(self.shard_key(shard, 'retry'), *urls_to_delete)
+                pipe.hdel(self.shard_key(shard, 'html'), *urls_to_delete)
+                pipe.hdel(self.shard_key(shard, 'dead'), *urls_to_delete)
+                pipe.hdel(self.shard_key(shard, 'trace'), *urls_to_delete)
 
                 await pipe.execute()
+        return len(urls_to_delete)
+
+    async def cleanup_old_urls(self, days: int = 7):
+        """清理指定天數前添加的URLs"""
+        cutoff_time = int(time.time()) - (days * 86400)
+
+        deleted = await asyncio.gather(*[
+            self._cleanup_shard(shard, cutoff_time)
+            for shard in self.router.shards
+        ])
+        if sum(deleted):
+            logger.info(f"已清理 {sum(deleted)} 個舊的URLs")
 
-            logger.info(f"已清理 {len(urls_to_delete)} 個舊的URLs")
+        # 網頁內容由儲存後端依 TTL 和容量上限自行淘汰
+        if self.page_store:
+            await self.page_store.evict()
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple, Any
+
+import redis.asyncio as redis
+from redis.asyncio.cluster import RedisCluster
+
+from config.redis import constants as RedisConfig
+
+logger = logging.getLogger(__name__)
+
+# 連接池鍵: (事件循環id, host, port, db, decode_responses)
+PoolKey = Tuple[int, str, int, int, bool]
+
+
+class RedisPoolManager:
+    """
+    行程內共用的 Redis 連接池管理器
+    redis.asyncio 的連接與事件循環綁定，因此每個事件循環各自持有一組連接池，
+    同一事件循環內的所有 RedisClient 共用連接，不再每次任務重新握手
+    """
+
+    def __init__(
+            self,
+            max_connections: int = RedisConfig.MAX_CONNECTIONS,
+            health_check_interval: int = RedisConfig.HEALTH_CHECK_INTERVAL,
+            socket_timeout: float = RedisConfig.SOCKET_TIMEOUT,
+            pool_timeout: float = RedisConfig.POOL_TIMEOUT):
+        self.max_connections = max_connections
+        self.health_check_interval = health_check_interval
+        self.socket_timeout = socket_timeout
+        self.pool_timeout = pool_timeout
+
+        self._pools: Dict[PoolKey, redis.BlockingConnectionPool] = {}
+        self._clusters: Dict[PoolKey, RedisCluster] = {}
+        # 保留事件循環的引用，避免 id 被重複使用
+        self._loops: Dict[int, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+
+    def _prune_closed_loops(self):
+        """丟棄已關閉事件循環的連接池，這些連接已無法在其他循環中使用"""
+        closed = [loop_id for loop_id, loop in self._loops.items()
+                  if loop.is_closed()]
+        for loop_id in closed:
+            for key in [k for k in self._pools if k[0] == loop_id]:
+                del self._pools[key]
+            for key in [k for k in self._clusters if k[0] == loop_id]:
+                del self._clusters[key]
+            del self._loops[loop_id]
+
+    def get_pool(
+            self,
+            host: str = RedisConfig.HOST,
+            port: int = RedisConfig.PORT,
+            db: int = RedisConfig.DB_CRAWLER,
+            decode_responses: bool = True
+    ) -> redis.BlockingConnectionPool:
+        """獲取當前事件循環的連接池，不存在時創建"""
+        loop = asyncio.get_running_loop()
+        key = (id(loop), host, port, db, decode_responses)
+
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                self._prune_closed_loops()
+                # 連接池滿時等待可用連接，而不是無上限地創建新連接
+                pool = redis.BlockingConnectionPool(
+                    host=host,
+                    port=port,
+                    db=db,
+                    decode_responses=decode_responses,
+                    max_connections=self.max_connections,
+                    timeout=self.pool_timeout,
+                    health_check_interval=self.health_check_interval,
+                    socket_timeout=self.socket_timeout,
+                    socket_connect_timeout=self.socket_timeout,
+                    retry_on_timeout=True,
+                )
+                self._pools[key] = pool
+                self._loops[id(loop)] = loop
+                logger.info(f"創建 Redis 連接池 {host}:{port}/{db}")
+        return pool
+
+    def get_client(
+            self,
+            host: str = RedisConfig.HOST,
+            port: int = RedisConfig.PORT,
+            db: int = RedisConfig.DB_CRAWLER,
+            decode_responses: bool = True
+    ) -> redis.Redis:
+        """
+        獲取使用共用連接池的客戶端
+        傳入現成連接池的客戶端在 close() 時不會斷開連接池
+        """
+        return redis.Redis(connection_pool=self.get_pool(
+            host, port, db, decode_responses))
+
+    def get_cluster_client(
+            self,
+            host: str = RedisConfig.HOST,
+            port: int = RedisConfig.PORT,
+            decode_responses: bool = True
+    ) -> RedisCluster:
+        """獲取當前事件循環的 Redis Cluster 客戶端，各節點連接池由客戶端自行管理"""
+        loop = asyncio.get_running_loop()
+        key = (id(loop), host, port, 0, decode_responses)
+
+        with self._lock:
+            client = self._clusters.get(key)
+            if client is None:
+                self._prune_closed_loops()
+                client = RedisCluster(
+                    host=host,
+                    port=port,
+                    decode_responses=decode_responses,
+                    max_connections=self.max_connections,
+                    health_check_interval=self.health_check_interval,
+                    socket_timeout=self.socket_timeout,
+                    socket_connect_timeout=self.socket_timeout,
+                )
+                self._clusters[key] = client
+                self._loops[id(loop)] = loop
+                logger.info(f"創建 Redis Cluster 客戶端 {host}:{port}")
+        return client
+
+    async def close_loop_pools(
+            self,
+            loop: Optional[asyncio.AbstractEventLoop] = None):
+        """斷開指定事件循環(預設為當前循環)的所有連接池"""
+        loop = loop or asyncio.get_running_loop()
+        with self._lock:
+            keys = [k for k in self._pools if k[0] == id(loop)]
+            pools = [self._pools.pop(k) for k in keys]
+            cluster_keys = [k for k in self._clusters if k[0] == id(loop)]
+            clusters = [self._clusters.pop(k) for k in cluster_keys]
+            self._loops.pop(id(loop), None)
+
+        for pool in pools:
+            await pool.disconnect()
+        for client in clusters:
+            await client.aclose()
+        if pools:
+            logger.info(f"已關閉 {len(pools)} 個 Redis 連接池")
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        """獲取各連接池的使用狀況"""
+        with self._lock:
+            items = list(self._pools.items())
+
+        metrics = []
+        for (loop_id, host, port, db, _), pool in items:
+            in_use = len(pool._in_use_connections)
+            available = len(pool._available_connections)
+            metrics.append({
+                'loop': loop_id,
+                'target': f"{host}:{port}/{db}",
+                'max_connections': pool.max_connections,
+                'created': in_use + available,
+                'in_use': in_use,
+                'available': available,
+            })
+        return metrics
+
+
+# 行程內共用的連接池管理器
+redis_pool_manager = RedisPoolManager()
@@ -0,0 +1,116 @@
+import bisect
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from config.redis import constants as RedisConfig
+
+# 兩段式的二級網域，例如 ltn.com.tw
+_SECOND_LEVEL_LABELS = {'com', 'org', 'net', 'gov', 'edu', 'co'}
+
+
+def get_site_domain(url: str) -> str:
+    """
+    取出URL所屬網站的主網域，同一網站的子網域會得到相同結果
+    例如 news.ltn.com.tw 與 ec.ltn.com.tw 都返回 ltn.com.tw
+    """
+    host = (urlparse(url).hostname or '').lower()
+    labels = host.split('.')
+    if len(labels) >= 3 and labels[-2] in _SECOND_LEVEL_LABELS \
+            and len(labels[-1]) == 2:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8],
+                          'big')
+
+
+class ConsistentHashRing:
+    """一致性雜湊環，增減分片時只有少部分網域需要搬移"""
+
+    def __init__(self, names: Iterable[str], virtual_nodes: int):
+        self._ring: List[int] = []
+        self._owners: Dict[int, str] = {}
+        for name in names:
+            for i in range(virtual_nodes):
+                point = _hash(f"{name}#{i}")
+                self._owners[point] = name
+                bisect.insort(self._ring, point)
+
+    def get(self, key: str) -> str:
+        index = bisect.bisect(self._ring, _hash(key)) % len(self._ring)
+        return self._owners[self._ring[index]]
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    單一分片
+    tag 為 Redis hash tag，同一分片的所有鍵落在同一個 slot，
+    因此在 Cluster 模式下仍可以用 pipeline 批量操作
+    """
+    name: str
+    host: str
+    port: int
+    tag: Optional[str] = None
+
+    def key(self, base: str) -> str:
+        """返回此分片上的實際鍵名"""
+        return f"{base}:{{{self.tag}}}" if self.tag else base
+
+
+class ShardRouter:
+    """
+    依網站網域將URL分配到分片
+    - 多節點模式: 每個 Redis 節點為一個分片
+    - Cluster 模式: 在同一個 Cluster 上切分固定數量的邏輯分片
+    只有單一節點時不加 hash tag，沿用原本的鍵名
+    """
+
+    def __init__(
+            self,
+            nodes: Optional[List[Dict]] = None,
+            cluster_mode: bool = RedisConfig.CLUSTER_MODE,
+            cluster_shard_count: int = RedisConfig.CLUSTER_SHARD_COUNT,
+            virtual_nodes: int = RedisConfig.SHARD_VIRTUAL_NODES):
+        nodes = nodes or RedisConfig.SHARD_NODES
+        self.cluster_mode = cluster_mode
+
+        if cluster_mode:
+            entry = nodes[0]
+            self.shards = [
+                Shard(f"s{i:02d}", entry['host'], entry['port'],
+                      tag=f"s{i:02d}")
+                for i in range(cluster_shard_count)
+            ]
+        else:
+            use_tag = len(nodes) > 1
+            self.shards = [
+                Shard(node['name'], node['host'], node['port'],
+                      tag=node['name'] if use_tag else None)
+                for node in nodes
+            ]
+
+        self._by_name = {shard.name: shard for shard in self.shards}
+        self._ring = ConsistentHashRing(self._by_name, virtual_nodes)
+
+    @property
+    def meta(self) -> Shard:
+        """存放全域資料(統計信息)的分片"""
+        return self.shards[0]
+
+    def shard_for_domain(self, domain: str) -> Shard:
+        return self._by_name[self._ring.get(domain)]
+
+    def shard_for_url(self, url: str) -> Shard:
+        return self.shard_for_domain(get_site_domain(url))
+
+    def group_by_shard(self, urls: Iterable[str]) -> Dict[Shard, List[str]]:
+        """將URLs依所屬分片分組，用於批量操作"""
+        groups: Dict[Shard, List[str]] = {}
+        for url in urls:
+            groups.setdefault(self.shard_for_url(url), []).append(url)
+        return groups
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import datetime
+from typing import List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from config.crawler.config import RetryConfig
+from utils.redis_client import RedisClient
+from utils.redis_sharding import Shard
+
+logger = logging.getLogger(__name__)
+
+# 視為暫時性錯誤的 HTTP 狀態碼，其餘 4xx(例如 404)直接移入死信
+TRANSIENT_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class RetryScheduler:
+    """
+    失敗URL重試排程器
+    - urls:retry zset 以下次嘗試時間為分數，到期後移回 urls:pending
+    - 重試延遲為指數退避加隨機抖動，避免同時重試
+    - 以主機為單位的斷路器，連續失敗過多時暫停該主機
+    - 超過最大嘗試次數或非暫時性錯誤移入 urls:dead
+    """
+
+    def __init__(
+            self,
+            redis_client: RedisClient,
+            config: Optional[RetryConfig] = None):
+        self.redis_client = redis_client
+        self.config = config or RetryConfig()
+
+    @staticmethod
+    def is_transient(error: BaseException) -> bool:
+        """
+        依例外類型判斷是否為暫時性錯誤(逾時、代理、連線、429 / 5xx)
+        不比對錯誤訊息，訊息中的URL可能含有與狀態碼相同的數字
+        """
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in TRANSIENT_STATUS_CODES
+        # TransportError 涵蓋逾時、連線、代理與協定錯誤
+        return isinstance(error, (httpx.TransportError, asyncio.TimeoutError,
+                                  ConnectionError))
+
+    def backoff(self, attempt: int) -> float:
+        """
+        計算第 attempt 次失敗後的重試延遲
+        取指數退避的一半作為下限，另一半隨機抖動
+        """
+        delay = min(self.config.max_delay,
+                    self.config.base_delay * (2 ** (attempt - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _breaker_key(self, shard: Shard, host: str) -> str:
+        return shard.key(f"breaker:{host}")
+
+    async def handle_failure(self, url: str, error: BaseException) -> str:
+        """
+        記錄失敗並排程重試，只有暫時性錯誤計入主機的斷路器
+        Returns:
+            str: 'retry' 已排入重試, 'dead' 已移入死信
+        """
+        error_msg = f"{type(error).__name__}: {error}"
+        transient = self.is_transient(error)
+        failure = await self.redis_client.get_failure(url)
+        attempts = (failure or {}).get('retries', 0) + 1
+        await self.redis_client.mark_url_failed(url, error_msg, attempts)
+
+        # 404、解析錯誤等與主機健康無關，不開啟斷路器
+        if transient:
+            await self._record_host_failure(url)
+
+        shard = self.redis_client.router.shard_for_url(url)
+
+        if not transient or attempts >= self.config.max_attempts:
+            dead_info = json.dumps({
+                'error': error_msg,
+                'attempts': attempts,
+                'timestamp': datetime.now().isoformat(),
+            })
+            async with self.redis_client.pipeline(shard) as pipe:
+                pipe.hset(self.redis_client.shard_key(shard, 'dead'),
+                          url, dead_info)
+                pipe.hdel(self.redis_client.shard_key(shard, 'failed'), url)
+                pipe.zrem(self.redis_client.shard_key(shard, 'retry'), url)
+                pipe.srem(self.redis_client.shard_key(shard, 'pending'), url)
+                pipe.hdel(self.redis_client.shard_key(shard, 'trace'), url)
+                await pipe.execute()
+            logger.warning(f"URL 已移入死信(嘗試 {attempts} 次): {url}")
+            return 'dead'
+
+        await self.defer(url, time.time() + self.backoff(attempts))
+        return 'retry'
+
+    async def defer(self, url: str, until: float):
+        """將URL移出待處理佇列，到指定時間後再由 promote_due 移回"""
+        shard = self.redis_client.router.shard_for_url(url)
+        async with self.redis_client.pipeline(shard) as pipe:
+            pipe.srem(self.redis_client.shard_key(shard, 'pending'), url)
+            pipe.zadd(self.redis_client.shard_key(shard, 'retry'),
+                      {url: until})
+            await pipe.execute()
+
+    async def _record_host_failure(self, url: str):
+        """累加主機連續失敗次數，達到門檻時開啟斷路器"""
+        host = urlparse(url).hostname or ''
+        shard = self.redis_client.router.shard_for_url(url)
+        key = self._breaker_key(shard, host)
+        client = self.redis_client.client_for(shard)
+
+        failures = await client.hincrby(key, 'failures', 1)  # type: ignore
+        if failures >= self.config.breaker_threshold:
+            opened_until = time.time() + self.config.breaker_cooldown
+            await client.hset(key, 'opened_until', str(opened_until))  # type: ignore # noqa
+            logger.warning(
+                f"主機 {host} 連續失敗 {failures} 次，暫停 "
+                f"{self.config.breaker_cooldown:.0f} 秒")
+        # 長時間沒有失敗時自動重置計數
+        await client.expire(key, int(self.config.breaker_cooldown * 2))
+
+    async def record_success(self, url: str):
+        """請求成功時重置主機的斷路器"""
+        host = urlparse(url).hostname or ''
+        shard = self.redis_client.router.shard_for_url(url)
+        await self.redis_client.client_for(shard).delete(
+            self._breaker_key(shard, host))
+
+    async def breaker_open_until(self, url: str) -> Optional[float]:
+        """返回主機斷路器開啟到的時間，未開啟時返回None"""
+        host = urlparse(url).hostname or ''
+        shard = self.redis_client.router.shard_for_url(url)
+        value = await self.redis_client.client_for(shard).hget(
+            self._breaker_key(shard, host), 'opened_until')  # type: ignore
+        if value and float(value) > time.time():
+            return float(value)
+        return None
+
+    async def promote_due(self) -> List[str]:
+        """將到期的重試URL移回待處理佇列，返回移回的URLs"""
+        promoted: List[str] = []
+        now = time.time()
+        for shard in self.redis_client.router.shards:
+            client = self.redis_client.client_for(shard)
+            retry_key = self.redis_client.shard_key(shard, 'retry')
+            due = await client.zrangebyscore(
+                retry_key, '-inf', now,
+                start=0, num=self.config.promote_batch_size)
+
+            ready, deferred = [], {}
+            breakers = {}
+            for url in due:
+                # 斷路器開啟中的主機延後到冷卻結束
+                host = urlparse(url).hostname or ''
+                if host not in breakers:
+                    breakers[host] = await self.breaker_open_until(url)
+                opened_until = breakers[host]
+                if opened_until:
+                    deferred[url] = opened_until
+                else:
+                    ready.append(url)
+
+            if not ready and not deferred:
+                continue
+
+            async with self.redis_client.pipeline(shard) as pipe:
+                if ready:
+                    pipe.zrem(retry_key, *ready)
+                    pipe.sadd(
+                        self.redis_client.shard_key(shard, 'pending'), *ready)
+                if deferred:
+                    pipe.zadd(retry_key, deferred)
+                await pipe.execute()
+            promoted.extend(ready)
+
+        if promoted:
+            logger.info(f"已將 {len(promoted)} 個重試URL移回待處理佇列")
+        return promoted
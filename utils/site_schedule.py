@@ -0,0 +1,120 @@
+import logging
+import time
+from typing import Dict, Optional, Any
+
+from config.crawler.config import ScheduleConfig
+from utils.distributed_lock import RedisLease
+from utils.redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+
+class SiteScheduler:
+    """
+    第一層爬蟲的網站排程
+    - 每個網站以租約防止前一次執行未結束時重複啟動
+    - 依上次新增的URL數調整下次執行間隔: 新聞多時縮短，沒有新聞時拉長
+    排程狀態存放在 meta 分片的 schedule:site:{網站} hash
+    """
+
+    def __init__(
+            self,
+            redis_client: RedisClient,
+            config: Optional[ScheduleConfig] = None):
+        self.redis_client = redis_client
+        self.config = config or ScheduleConfig()
+
+    def _key(self, kind: str, name: str) -> str:
+        return self.redis_client.router.meta.key(f"{kind}:site:{name}")
+
+    @property
+    def _client(self):
+        return self.redis_client.client_for(self.redis_client.router.meta)
+
+    def lease(self, name: str) -> RedisLease:
+        """創建網站的執行租約"""
+        return RedisLease(
+            self._client,
+            self._key('lease', name),
+            ttl=self.config.lease_ttl,
+            heartbeat_interval=self.config.heartbeat_interval)
+
+    async def is_running(self, name: str) -> bool:
+        """判斷網站是否有執行中的爬蟲(租約仍有效)"""
+        return bool(await self._client.exists(self._key('lease', name)))
+
+    async def get_state(self, name: str) -> Dict[str, Any]:
+        """獲取網站的排程狀態"""
+        return await self._client.hgetall(
+            self._key('schedule', name))  # type: ignore
+
+    async def is_due(self, name: str) -> bool:
+        """判斷網站是否已到下次執行時間"""
+        next_run_at = await self._client.hget(
+            self._key('schedule', name), 'next_run_at')  # type: ignore
+        return next_run_at is None or float(next_run_at) <= time.time()
+
+    async def mark_dispatched(self, name: str):
+        """
+        記錄網站已分派執行，在 dispatch_timeout 內不再重複分派
+        browser 佇列積壓時任務可能在租約有效時間之後才開始，
+        因此保護時間不以租約計算；實際的下次執行時間由 record_run、
+        postpone 在執行結束或略過時設定，任務遺失時逾時後重新分派
+        """
+        await self._client.hset(  # type: ignore
+            self._key('schedule', name), 'next_run_at',
+            time.time() + self.config.dispatch_timeout)
+
+    async def postpone(self, name: str, seconds: Optional[float] = None):
+        """延後網站的下次執行時間，不改變目前的執行間隔"""
+        await self._client.hset(  # type: ignore
+            self._key('schedule', name), 'next_run_at',
+            time.time() + (seconds or self.config.min_interval))
+
+    async def record_skip(self, name: str):
+        """記錄因前一次執行尚未結束而略過的次數"""
+        await self._client.hincrby(
+            self._key('schedule', name), 'skipped', 1)  # type: ignore
+
+    async def needs_backfill(self, name: str, interval: float) -> bool:
+        """有 feed 的網站是否已到瀏覽器補爬的時間"""
+        last = await self._client.hget(
+            self._key('schedule', name), 'last_backfill_at')  # type: ignore
+        return last is None or time.time() - float(last) >= interval
+
+    async def record_backfill(self, name: str):
+        """記錄完成一次瀏覽器補爬"""
+        await self._client.hset(  # type: ignore
+            self._key('schedule', name), 'last_backfill_at', time.time())
+
+    def next_interval(self, current: float, new_urls: int) -> float:
+        """根據本次新增URL數計算下次執行間隔"""
+        target = self.config.target_new_urls
+        if new_urls >= target * 2:
+            interval = current * 0.5
+        elif new_urls >= target:
+            interval = current * 0.8
+        elif new_urls == 0:
+            interval = current * 1.5
+        else:
+            interval = current * 1.2
+        return max(self.config.min_interval,
+                   min(self.config.max_interval, interval))
+
+    async def record_run(self, name: str, new_urls: int) -> float:
+        """記錄一次執行結果並排定下次執行時間，返回新的間隔秒數"""
+        key = self._key('schedule', name)
+        current = await self._client.hget(key, 'interval')  # type: ignore
+        interval = self.next_interval(
+            float(current) if current else self.config.initial_interval,
+            new_urls)
+
+        now = time.time()
+        await self._client.hset(key, mapping={  # type: ignore
+            'interval': interval,
+            'next_run_at': now + interval,
+            'last_run_at': now,
+            'last_new_urls': new_urls,
+        })
+        logger.info(f"{name} 新增 {new_urls} 筆, 下次執行間隔 {interval:.0f} 秒")
+        return interval
@@ -0,0 +1,330 @@
+import argparse
+import glob
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config.crawler.config import TracingConfig
+from utils.redis_sharding import get_site_domain
+
+logger = logging.getLogger(__name__)
+
+# 一則新聞的各階段，依發生順序；deferred 為斷路器開啟時延後下載的時間點
+STAGES = ('discovery', 'queue_wait', 'deferred', 'download', 'parse', 'sink')
+ROOT_SPAN = 'article'
+
+# OpenTelemetry 的 SpanKind.INTERNAL 與 StatusCode
+_KIND_INTERNAL = 1
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float                # Unix 時間(秒)
+    end: float
+    attributes: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_otlp(self) -> dict:
+        """OTLP/JSON 格式的 span"""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': _KIND_INTERNAL,
+            'startTimeUnixNano': str(int(self.start * 1e9)),
+            'endTimeUnixNano': str(int(self.end * 1e9)),
+            'attributes': [{'key': key, 'value': {'stringValue': value}}
+                           for key, value in self.attributes.items()],
+            'status': {'code': _STATUS_ERROR, 'message': self.error}
+            if self.error else {'code': _STATUS_OK},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def _span_id() -> str:
+    return os.urandom(8).hex()
+
+
+class ArticleTrace:
+    """
+    單一新聞的追蹤
+    上下文在URL首次寫入時建立並隨URL存放在 Redis，下載的 worker 取回後繼續記錄，
+    discovery / queue_wait 由上下文中的時間點推算，其餘階段在 worker 內計時
+    完成或移入死信時呼叫 end()，輸出根 span；失敗後等待重試的嘗試只輸出該次的 span，
+    重試時以同一個 trace 繼續記錄
+    """
+
+    def __init__(self, url: str, context: dict):
+        self.url = url
+        self.site = context.get('site') or get_site_domain(url)
+        self.trace_id: str = context['trace_id']
+        self.root_id: str = context['span_id']
+        self.discovered_at: float = context['discovered_at']
+        self.queued_at: float = context['queued_at']
+        self.spans: List[Span] = []
+        self.done = False
+        self.error: Optional[str] = None
+
+    def end(self, error: Optional[str] = None):
+        """追蹤結束，error 不為 None 時表示新聞最終未能保存"""
+        self.done = True
+        self.error = error
+
+    def add_span(self, name: str, start: float, end: float,
+                 error: Optional[str] = None):
+        self.spans.append(Span(
+            name, self.trace_id, _span_id(), self.root_id, start, end,
+            {'crawler.site': self.site}, error))
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.time()
+        try:
+            yield
+        except Exception as e:
+            self.add_span(name, start, time.time(), f"{type(e).__name__}: {e}")
+            raise
+        self.add_span(name, start, time.time())
+
+    def finish(self) -> List[Span]:
+        """
+        返回要輸出的 span
+        追蹤已結束時補上 discovery、queue_wait 與涵蓋全程的根 span，
+        否則只返回本次嘗試的 span
+        """
+        if not self.done:
+            return list(self.spans)
+        spans = sorted(self.spans, key=lambda span: span.start)
+        fetch_start = spans[0].start if spans else self.queued_at
+        end = max((span.end for span in spans), default=fetch_start)
+        self.add_span('discovery', self.discovered_at, self.queued_at)
+        self.add_span('queue_wait', self.queued_at, fetch_start)
+        root = Span(ROOT_SPAN, self.trace_id, self.root_id, None,
+                    self.discovered_at, end,
+                    {'crawler.site': self.site, 'url.full': self.url},
+                    self.error)
+        return [root] + self.spans
+
+
+class _NullArticleTrace:
+    """沒有追蹤上下文(停用或未抽樣)時使用，不讀取時鐘"""
+    done = False
+
+    def end(self, error: Optional[str] = None):
+        pass
+
+    def add_span(self, name: str, start: float, end: float,
+                 error: Optional[str] = None):
+        pass
+
+    @contextmanager
+    def span(self, name: str):
+        yield
+
+    def finish(self) -> List[Span]:
+        return []
+
+
+NULL_TRACE = _NullArticleTrace()
+
+
+class Tracer:
+    """
+    新聞從列表頁被發現到寫入輸出的端對端追蹤
+    每則新聞一條 trace，根 span 為 article，子 span 為
+    discovery(該次列表加載開始到寫入 Redis) / queue_wait / download / parse / sink
+    span 以 OTLP/JSON 格式逐批附加到本機檔案，每行一個 resourceSpans 物件，
+    可直接交給 OpenTelemetry Collector 的 otlpjsonfile receiver 或以 summarize 統計
+    """
+
+    def __init__(self, config: Optional[TracingConfig] = None):
+        self.config = config or TracingConfig()
+        self.enabled = self.config.enabled
+        self._lock = threading.Lock()
+
+    @property
+    def export_path(self) -> Path:
+        return Path(self.config.export_path.format(pid=os.getpid()))
+
+    def new_contexts(self, urls: Iterable[str], discovered_at: float,
+                     queued_at: float) -> Dict[str, str]:
+        """為新URLs建立追蹤上下文，返回 {URL: JSON}，未抽樣的URL不建立"""
+        if not self.enabled:
+            return {}
+        return {
+            url: json.dumps({
+                'trace_id': os.urandom(16).hex(),
+                'span_id': _span_id(),
+                'site': get_site_domain(url),
+                'discovered_at': discovered_at,
+                'queued_at': queued_at,
+            })
+            for url in urls
+            if random.random() < self.config.sample_rate
+        }
+
+    def resume(self, url: str, context: Optional[str]):
+        """以 Redis 取回的上下文繼續追蹤，沒有上下文時返回 NULL_TRACE"""
+        if not self.enabled or not context:
+            return NULL_TRACE
+        try:
+            return ArticleTrace(url, json.loads(context))
+        except (ValueError, KeyError) as e:
+            logger.warning(f"無法解析 {url} 的追蹤上下文: {e}")
+            return NULL_TRACE
+
+    @contextmanager
+    def batch_span(self, traces: Iterable, name: str):
+        """批次處理的階段(例如寫入輸出)，同一段時間記到每則新聞"""
+        traces = list(traces)
+        start = time.time()
+        try:
+            yield
+        except Exception as e:
+            for trace in traces:
+                trace.add_span(name, start, time.time(),
+                               f"{type(e).__name__}: {e}")
+            raise
+        end = time.time()
+        for trace in traces:
+            trace.add_span(name, start, end)
+
+    def export(self, traces: Iterable) -> int:
+        """將 span 附加到輸出檔，返回 span 數；未結束的追蹤只輸出本次嘗試"""
+        spans = [span for trace in traces for span in trace.finish()]
+        if not spans:
+            return 0
+        line = json.dumps({'resourceSpans': [{
+            'resource': {'attributes': [{
+                'key': 'service.name',
+                'value': {'stringValue': self.config.service_name}}]},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.to_otlp() for span in spans],
+            }],
+        }]}, ensure_ascii=False)
+        try:
+            path = self.export_path
+            with self._lock:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+        except OSError as e:
+            logger.warning(f"寫入追蹤資料失敗: {e}")
+            return 0
+        return len(spans)
+
+
+# 行程內共用的追蹤器
+tracer = Tracer()
+
+
+# ---- 統計 ----
+
+def read_spans(paths: Iterable[str]
+               ) -> Iterator[Tuple[str, str, float, bool]]:
+    """讀取 OTLP/JSON 檔案，逐一返回 (span 名稱, 網站, 耗時秒數, 是否錯誤)"""
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                for resource in json.loads(line).get('resourceSpans', []):
+                    for scope in resource.get('scopeSpans', []):
+                        for span in scope.get('spans', []):
+                            attributes = {
+                                item['key']: item['value'].get('stringValue', '')
+                                for item in span.get('attributes', [])}
+                            seconds = (int(span['endTimeUnixNano']) - int(
+                                span['startTimeUnixNano'])) / 1e9
+                            error = span.get('status', {}).get(
+                                'code') == _STATUS_ERROR
+                            yield (span['name'],
+                                   attributes.get('crawler.site', ''),
+                                   seconds, error)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """最近鄰排名法分位數"""
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(q * len(ordered))) - 1]
+
+
+def summarize(paths: Iterable[str], site: Optional[str] = None
+              ) -> List[dict]:
+    """各階段(全部網站與各網站)的延遲分位數，分位數只計算成功的 span"""
+    samples: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+    errors: Dict[Tuple[str, str], int] = defaultdict(int)
+    for name, span_site, seconds, error in read_spans(paths):
+        if site and span_site != site:
+            continue
+        for key in ((name, '*'), (name, span_site)):
+            if error:
+                errors[key] += 1
+                samples.setdefault(key, [])
+            else:
+                samples[key].append(seconds)
+
+    order = {name: index for index, name in enumerate(STAGES + (ROOT_SPAN,))}
+    rows = []
+    for (name, span_site), values in sorted(
+            samples.items(),
+            key=lambda item: (item[0][1] != '*', item[0][1],
+                              order.get(item[0][0], len(order)))):
+        rows.append({
+            'stage': name,
+            'site': span_site,
+            'count': len(values),
+            'errors': errors[(name, span_site)],
+            'p50': percentile(values, 0.5) if values else None,
+            'p90': percentile(values, 0.9) if values else None,
+            'p99': percentile(values, 0.99) if values else None,
+            'max': max(values, default=None),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='統計新聞各階段的延遲分位數')
+    parser.add_argument(
+        'paths', nargs='*',
+        help='OTLP/JSON 檔案，預設為 export_path 目錄下所有行程的檔案')
+    parser.add_argument('--site', help='只統計指定網站')
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(
+        tracer.config.export_path.format(pid='*')))
+    if not paths:
+        raise SystemExit("找不到追蹤資料")
+
+    def _seconds(value: Optional[float]) -> str:
+        return f"{value:>10.3f}" if value is not None else f"{'-':>10}"
+
+    print(f"{'site':<24}{'stage':<12}{'count':>8}{'errors':>8}"
+          f"{'p50 s':>10}{'p90 s':>10}{'p99 s':>10}{'max s':>10}")
+    for row in summarize(paths, args.site):
+        print(f"{row['site']:<24}{row['stage']:<12}{row['count']:>8}"
+              f"{row['errors']:>8}"
+              + ''.join(_seconds(row[key])
+                        for key in ('p50', 'p90', 'p99', 'max')))
+
+
+if __name__ == '__main__':
+    main()
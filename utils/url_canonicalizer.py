@@ -0,0 +1,184 @@
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from utils.redis_sharding import get_site_domain
+
+logger = logging.getLogger(__name__)
+
+# 常見的追蹤參數，所有網站都會移除
+TRACKING_PARAMS = re.compile(
+    r'^(utm_\w+|fbclid|gclid|dclid|msclkid|igshid|yclid|mc_cid|mc_eid|'
+    r'_ga|openExternalBrowser)$',
+    re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class CanonicalRule:
+    """
+    單一網站的URL正規化規則
+    Args:
+        allowed_params: 保留的查詢參數(比對時不分大小寫，輸出使用此處的寫法)，
+            None 表示只移除追蹤參數
+        host_aliases: 主機名稱別名(含行動版主機) -> 正式主機名稱
+        https: 是否統一使用 https
+        trailing_slash: 路徑結尾斜線 strip(移除) / keep(不處理)
+    """
+    allowed_params: Optional[FrozenSet[str]] = None
+    host_aliases: Dict[str, str] = field(default_factory=dict)
+    https: bool = True
+    trailing_slash: str = 'strip'
+
+    @cached_property
+    def param_names(self) -> Dict[str, str]:
+        """小寫參數名稱 -> 保留的參數名稱"""
+        return {name.lower(): name for name in self.allowed_params or ()}
+
+
+# 依網站網域(見 get_site_domain)設定的規則，新聞頁只靠路徑識別的網站不保留查詢參數
+SITE_RULES: Dict[str, CanonicalRule] = {
+    'setn.com': CanonicalRule(
+        allowed_params=frozenset({'NewsID'}),
+        host_aliases={'setn.com': 'www.setn.com',
+                      'm.setn.com': 'www.setn.com'}),
+    'ettoday.net': CanonicalRule(
+        allowed_params=frozenset(),
+        host_aliases={'ettoday.net': 'www.ettoday.net',
+                      'm.ettoday.net': 'www.ettoday.net'}),
+    'tvbs.com.tw': CanonicalRule(allowed_params=frozenset()),
+    'ltn.com.tw': CanonicalRule(
+        allowed_params=frozenset(),
+        host_aliases={'m.ltn.com.tw': 'news.ltn.com.tw'}),
+    'cna.com.tw': CanonicalRule(
+        allowed_params=frozenset(),
+        host_aliases={'cna.com.tw': 'www.cna.com.tw',
+                      'm.cna.com.tw': 'www.cna.com.tw'}),
+    'mnews.tw': CanonicalRule(
+        allowed_params=frozenset(),
+        host_aliases={'mnews.tw': 'www.mnews.tw'}),
+}
+
+DEFAULT_RULE = CanonicalRule(https=False, trailing_slash='keep')
+
+
+@dataclass
+class CanonicalizeResult:
+    """批量正規化結果"""
+    urls: List[str]                     # 去重後的正規化URLs，保持首次出現順序
+    total: int = 0                      # 輸入的URL數(含重複)
+    distinct_raw: int = 0               # 輸入中不同的原始URL數
+    collapsed_by_site: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def collapsed(self) -> int:
+        """因正規化而合併的原始URL數"""
+        return self.distinct_raw - len(self.urls)
+
+    @property
+    def collapse_rate(self) -> float:
+        return self.collapsed / self.distinct_raw if self.distinct_raw else 0.0
+
+
+class URLCanonicalizer:
+    """
+    依網站規則正規化新聞URL，讓同一篇新聞只對應一個URL
+    - 移除片段與追蹤參數，依規則只保留必要參數並排序
+    - 主機名稱轉小寫並套用別名，依規則統一 https 與結尾斜線
+    已是正規形式的URL走快速路徑，不做完整解析
+    """
+
+    def __init__(self, rules: Optional[Dict[str, CanonicalRule]] = None):
+        self.rules = SITE_RULES if rules is None else rules
+        # 主機名稱 -> (規則, 正式主機名稱)，每個主機只解析一次
+        self._resolve_host = lru_cache(maxsize=1024)(self._resolve)
+
+    def _resolve(self, host: str) -> Tuple[CanonicalRule, str]:
+        rule = self.rules.get(get_site_domain(f"//{host}"), DEFAULT_RULE)
+        return rule, rule.host_aliases.get(host, host)
+
+    def _is_canonical(self, url: str) -> bool:
+        """快速判斷: 沒有查詢與片段，且主機、協定、結尾斜線都已符合規則"""
+        if '?' in url or '#' in url:
+            return False
+        scheme, sep, rest = url.partition('://')
+        if not sep:
+            return False
+        host, slash, path = rest.partition('/')
+        if host != host.lower():
+            return False
+        rule, canonical_host = self._resolve_host(host)
+        if canonical_host != host or (rule.https and scheme != 'https'):
+            return False
+        if rule.trailing_slash == 'strip' and path.endswith('/'):
+            return False
+        return True
+
+    def canonicalize(self, url: str) -> str:
+        """返回URL的正規形式，無法解析的URL原樣返回"""
+        url = url.strip()
+        if self._is_canonical(url):
+            return url
+
+        parts = urlsplit(url)
+        if not parts.netloc:
+            return url
+        try:
+            port = parts.port
+        except ValueError:
+            # 連接埠不是合法數字
+            return url
+        host = (parts.hostname or '').lower()
+        rule, host = self._resolve_host(host)
+        netloc = f"{host}:{port}" if port else host
+
+        scheme = 'https' if rule.https else parts.scheme.lower()
+
+        path = parts.path or '/'
+        if rule.trailing_slash == 'strip' and len(path) > 1:
+            path = path.rstrip('/') or '/'
+
+        params = [(key, value) for key, value in
+                  parse_qsl(parts.query, keep_blank_values=True)
+                  if not TRACKING_PARAMS.match(key)]
+        if rule.allowed_params is not None:
+            names = rule.param_names
+            params = [(names[key.lower()], value) for key, value in params
+                      if key.lower() in names]
+        query = urlencode(sorted(params))
+
+        return urlunsplit((scheme, netloc, path, query, ''))
+
+    def canonicalize_many(self, urls: Iterable[str]) -> CanonicalizeResult:
+        """批量正規化並去重，同時統計各網站被合併的URL數"""
+        seen_raw = set()
+        canonical: Dict[str, None] = {}
+        collapsed: Dict[str, int] = defaultdict(int)
+        total = 0
+        for url in urls:
+            total += 1
+            if url in seen_raw:
+                continue
+            seen_raw.add(url)
+            result = self.canonicalize(url)
+            if result in canonical:
+                collapsed[get_site_domain(result)] += 1
+            else:
+                canonical[result] = None
+
+        if collapsed:
+            logger.debug(f"URL正規化合併: {dict(collapsed)}")
+        return CanonicalizeResult(
+            urls=list(canonical), total=total, distinct_raw=len(seen_raw),
+            collapsed_by_site=dict(collapsed))
+
+
+# 行程內共用的正規化器
+url_canonicalizer = URLCanonicalizer()
+
+
+def canonicalize_url(url: str) -> str:
+    return url_canonicalizer.canonicalize(url)